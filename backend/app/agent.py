@@ -1,21 +1,50 @@
+from __future__ import annotations
+
 import os
 import json
-from typing import Dict, Any, List
-
-from dotenv import load_dotenv
-from openai import OpenAI
-from openai.types.chat import (
-    ChatCompletionMessageParam,
-    ChatCompletionSystemMessageParam,
-    ChatCompletionUserMessageParam,
-    ChatCompletionAssistantMessageParam,
-)
+import time
+import hashlib
+import itertools
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Any, AsyncIterator, List, Optional
+
+from app.agent_context import serialize, truncate_history
+from app.agent_tools import TOOLS, MUTATING_TOOLS, execute_tool_calls
+from app.core.cache import TTLCache
+from app.core.ddb import run_ddb
+from app.services.appointment_versions import appointments_version
+from app.services.assistant_tools import user_timezone
+
+# The OpenAI SDK is the heaviest import in the app; it is only loaded when the
+# assistant is first used.
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from openai.types.chat import (
+        ChatCompletionMessageParam,
+        ChatCompletionSystemMessageParam,
+        ChatCompletionUserMessageParam,
+        ChatCompletionAssistantMessageParam,
+    )
 
-from app.services.agent_service import get_today_appointments
+MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+MAX_TOOL_ROUNDS = int(os.getenv("AGENT_MAX_TOOL_ROUNDS", "4"))
+TIME_BUDGET_SECONDS = float(os.getenv("AGENT_TIME_BUDGET_SECONDS", "20"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("AGENT_HISTORY_TOKEN_BUDGET", "1500"))
 
-load_dotenv()
+# Exact-match answer cache. Keys carry the business's appointment version
+# stamp (kept in DynamoDB, so writes from any instance count) and the local
+# date, so any appointment write or a new day misses.
+answer_cache = TTLCache(
+    maxsize=int(os.getenv("ASSISTANT_CACHE_MAXSIZE", "1024")),
+    ttl=float(os.getenv("ASSISTANT_CACHE_TTL_SECONDS", "300")),
+)
+
+@lru_cache(maxsize=1)
+def get_openai_client() -> AsyncOpenAI:
+    from openai import AsyncOpenAI
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 def system_msg(content: str) -> ChatCompletionSystemMessageParam:
     return {"role": "system", "content": content}
@@ -30,8 +59,8 @@ def build_base_messages(history: List[Dict[str, str]]) -> List[ChatCompletionMes
     messages: List[ChatCompletionMessageParam] = [
         system_msg(
             "You are OfficeMate Assistant for a scheduling app. "
-            "You can answer general questions and talk about the user's appointments "
-            "when given backend data."
+            "You can answer general questions and look up or change the user's "
+            "appointments with the provided tools."
         )
     ]
     for h in history:
@@ -47,40 +76,173 @@ def build_base_messages(history: List[Dict[str, str]]) -> List[ChatCompletionMes
             messages.append(system_msg(c))
     return messages
 
-def build_appointments_context(current_user: Dict[str, Any]) -> Dict[str, Any]:
-    data = get_today_appointments(
-        user_id=current_user["userId"],
-        business_id=current_user["defaultBusinessId"],
+def build_messages(
+    user_message: str,
+    history: List[Dict[str, str]],
+    current_user: Dict[str, Any],
+) -> List[ChatCompletionMessageParam]:
+    zone = user_timezone(current_user)
+    messages = build_base_messages(truncate_history(history, HISTORY_TOKEN_BUDGET))
+    messages.append(
+        system_msg(
+            f"Today is {datetime.now(zone).strftime('%A, %Y-%m-%d')} in {zone.key}. "
+            "Use the tools to look up or reschedule appointments instead of guessing. "
+            "When listing appointments, give time, title, and location."
+        )
     )
-    return {
-        "date": data["date"],
-        "count": data["count"],
-        "appointments": data["appointments"],
-    }
+    messages.append(user_msg(user_message))
+    return messages
+
+def _normalize_message(text: str) -> str:
+    return " ".join(text.casefold().split()).rstrip("?!. ")
 
-def run_agent(
+async def answer_cache_key(
+    user_message: str,
+    history: List[Dict[str, str]],
+    current_user: Dict[str, Any],
+) -> tuple:
+    zone = user_timezone(current_user)
+    business_id = current_user.get("defaultBusinessId") or ""
+    version = await run_ddb(appointments_version, business_id)
+    history_digest = hashlib.sha256(
+        serialize([[h.get("role"), h.get("content")] for h in history]).encode("utf-8")
+    ).hexdigest()
+    return (
+        current_user["userId"],
+        business_id,
+        version,
+        datetime.now(zone).date().isoformat(),
+        _normalize_message(user_message),
+        history_digest,
+    )
+
+def _tool_failed(output: str) -> bool:
+    try:
+        result = json.loads(output)
+    except ValueError:
+        return False
+    return isinstance(result, dict) and "error" in result
+
+def _cacheable(memo: Dict) -> bool:
+    # Turns that wrote, or whose answer rests on a failed tool call (a
+    # throttled read, a bad argument), are answered fresh next time.
+    return not any(
+        name in MUTATING_TOOLS or _tool_failed(output.result())
+        for (name, _), output in memo.items()
+    )
+
+def _tool_options(rounds: int, started: float) -> Dict[str, Any]:
+    # Once the round or latency budget is spent the model must answer with
+    # what it already has.
+    if rounds >= MAX_TOOL_ROUNDS or time.monotonic() - started >= TIME_BUDGET_SECONDS:
+        return {"tools": TOOLS, "tool_choice": "none"}
+    return {"tools": TOOLS}
+
+async def _append_tool_round(
+    messages: List[ChatCompletionMessageParam],
+    tool_calls: List[Dict[str, Any]],
+    current_user: Dict[str, Any],
+    memo: Dict,
+    content: Optional[str] = None,
+) -> None:
+    messages.append({"role": "assistant", "content": content, "tool_calls": tool_calls})
+    outputs = await execute_tool_calls(tool_calls, current_user, memo)
+    for call, output in zip(tool_calls, outputs):
+        messages.append({"role": "tool", "tool_call_id": call["id"], "content": output})
+
+async def run_agent(
     user_message: str,
     history: List[Dict[str, str]],
     current_user: Dict[str, Any],
 ) -> str:
-    txt = user_message.lower()
-    messages = build_base_messages(history)
-
-    if "appointment" in txt and "today" in txt:
-        summary = build_appointments_context(current_user)
-        messages.append(
-            system_msg(
-                "You have the user's appointments for today as JSON. "
-                "If zero, say no appointments. If present, list each with time, "
-                "title, and location."
-            )
+    key = await answer_cache_key(user_message, history, current_user)
+    cached = answer_cache.get(key)
+    if cached is not None:
+        return cached
+
+    messages = build_messages(user_message, history, current_user)
+    memo: Dict = {}
+    started = time.monotonic()
+
+    for rounds in itertools.count():
+        resp = await get_openai_client().chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            **_tool_options(rounds, started),
         )
-        messages.append(system_msg(json.dumps(summary)))
+        msg = resp.choices[0].message
+        if not msg.tool_calls:
+            output = msg.content or ""
+            if _cacheable(memo):
+                answer_cache.set(key, output)
+            return output
+        tool_calls = [
+            {
+                "id": tc.id,
+                "type": "function",
+                "function": {"name": tc.function.name, "arguments": tc.function.arguments},
+            }
+            for tc in msg.tool_calls
+        ]
+        await _append_tool_round(messages, tool_calls, current_user, memo, msg.content)
 
-    messages.append(user_msg(user_message))
+async def stream_agent(
+    user_message: str,
+    history: List[Dict[str, str]],
+    current_user: Dict[str, Any],
+) -> AsyncIterator[str]:
+    key = await answer_cache_key(user_message, history, current_user)
+    cached = answer_cache.get(key)
+    if cached is not None:
+        yield cached
+        return
 
-    resp = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=messages,
-    )
-    return resp.choices[0].message.content or ""
+    messages = build_messages(user_message, history, current_user)
+    memo: Dict = {}
+    started = time.monotonic()
+    parts: List[str] = []
+
+    for rounds in itertools.count():
+        stream = await get_openai_client().chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            stream=True,
+            **_tool_options(rounds, started),
+        )
+        calls: Dict[int, Dict[str, Any]] = {}
+        round_parts: List[str] = []
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta.content:
+                    round_parts.append(delta.content)
+                    yield delta.content
+                for tc in delta.tool_calls or []:
+                    call = calls.setdefault(
+                        tc.index,
+                        {"id": "", "type": "function", "function": {"name": "", "arguments": ""}},
+                    )
+                    if tc.id:
+                        call["id"] = tc.id
+                    if tc.function and tc.function.name:
+                        call["function"]["name"] += tc.function.name
+                    if tc.function and tc.function.arguments:
+                        call["function"]["arguments"] += tc.function.arguments
+        finally:
+            # Runs on normal completion and when the consumer is cancelled (client
+            # disconnect), closing the upstream HTTP stream so generation stops.
+            await stream.close()
+
+        # Text streamed alongside tool calls was shown to the user, so it is
+        # part of the answer and of the assistant message the model sees next.
+        parts.extend(round_parts)
+        if not calls:
+            if _cacheable(memo):
+                answer_cache.set(key, "".join(parts))
+            return
+        await _append_tool_round(
+            messages, [calls[i] for i in sorted(calls)], current_user, memo,
+            "".join(round_parts) or None,
+        )
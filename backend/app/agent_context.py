@@ -0,0 +1,126 @@
+"""
+Context compaction for the assistant prompt.
+
+Tool results are projected down to the fields the model needs and serialized
+deterministically, and chat history is trimmed to a token budget, so prompt
+size stays bounded regardless of how much data or history a chat carries.
+"""
+import json
+from datetime import tzinfo
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from app.services.appointment_service import parse_dt_utc
+
+# Rough token estimate (about four characters per token for English/JSON),
+# good enough for budgeting without shipping a tokenizer.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _json_default(o: Any) -> Any:
+    if isinstance(o, Decimal):
+        return int(o) if o == o.to_integral_value() else float(o)
+    if isinstance(o, (set, frozenset)):
+        return sorted(o)
+    return str(o)
+
+
+def serialize(obj: Any) -> str:
+    return json.dumps(
+        obj,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=_json_default,
+    )
+
+
+def _local_time(raw: Any, zone: tzinfo, fmt: str) -> str:
+    if not isinstance(raw, str):
+        return ""
+    try:
+        return parse_dt_utc(raw, zone).astimezone(zone).strftime(fmt)
+    except ValueError:
+        return raw
+
+
+def project_appointment(item: Dict[str, Any], zone: tzinfo) -> Dict[str, Any]:
+    start = _local_time(item.get("startTime"), zone, "%Y-%m-%d %H:%M")
+    end = _local_time(item.get("endTime"), zone, "%H:%M")
+    out = {
+        "id": item.get("appointmentId"),
+        "time": f"{start}-{end}" if end else start,
+        "title": item.get("title"),
+        "client": item.get("clientName"),
+        "location": item.get("location"),
+        "status": item.get("status"),
+    }
+    return {k: v for k, v in out.items() if v}
+
+
+def _is_appointment(obj: Any) -> bool:
+    return isinstance(obj, dict) and "appointmentId" in obj and "startTime" in obj
+
+
+def _project(obj: Any, zone: tzinfo) -> Any:
+    if _is_appointment(obj):
+        return project_appointment(obj, zone)
+    if isinstance(obj, list):
+        return [_project(o, zone) for o in obj]
+    if isinstance(obj, dict):
+        return {k: _project(v, zone) for k, v in obj.items()}
+    return obj
+
+
+def compact_tool_result(result: Any, zone: tzinfo, token_budget: int) -> str:
+    projected = _project(result, zone)
+    text = serialize(projected)
+    if estimate_tokens(text) <= token_budget:
+        return text
+
+    # Over budget: keep the head of the (first) appointment list and say how
+    # many rows were left out so the model can ask a narrower question.
+    rows = projected if isinstance(projected, list) else None
+    key = None
+    if isinstance(projected, dict):
+        key = next((k for k, v in projected.items() if isinstance(v, list)), None)
+        rows = projected[key] if key else None
+    if rows is None:
+        return text[: token_budget * CHARS_PER_TOKEN]
+
+    kept: List[Any] = []
+    used = 0
+    for row in rows:
+        cost = estimate_tokens(serialize(row)) + 1
+        if used + cost > token_budget:
+            break
+        kept.append(row)
+        used += cost
+    omitted = len(rows) - len(kept)
+    if key:
+        return serialize({**projected, key: kept, "omitted": omitted})
+    return serialize({"items": kept, "omitted": omitted})
+
+
+def truncate_history(history: List[Dict[str, str]], token_budget: int) -> List[Dict[str, str]]:
+    kept: List[Dict[str, str]] = []
+    used = 0
+    for h in reversed(history):
+        cost = estimate_tokens(h["content"]) + 4
+        if used + cost > token_budget:
+            break
+        kept.append(h)
+        used += cost
+    kept.reverse()
+
+    omitted = len(history) - len(kept)
+    if omitted:
+        kept.insert(
+            0,
+            {"role": "system", "content": f"({omitted} earlier message(s) omitted.)"},
+        )
+    return kept
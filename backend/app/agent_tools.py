@@ -1,10 +1,29 @@
-from app.services.agent_service import get_today_appointments
+import os
+import json
+import asyncio
+from typing import Any, Callable, Dict, List, Tuple
 
-def tool_get_today_appointments(current_user):
-    return get_today_appointments(
-        user_id=current_user["userId"],
-        business_id=current_user["defaultBusinessId"],
-    )
+from app.agent_context import compact_tool_result
+from app.core.ddb import run_ddb
+from app.services.assistant_tools import (
+    user_timezone,
+    tool_get_today_appointments,
+    tool_get_appointments_between_times,
+    tool_reschedule_appointment,
+    tool_search_appointments_by_name,
+)
+
+TOOL_RESULT_TOKEN_BUDGET = int(os.getenv("AGENT_TOOL_RESULT_TOKEN_BUDGET", "1200"))
+
+TOOL_HANDLERS: Dict[str, Callable[..., Any]] = {
+    "get_today_appointments": tool_get_today_appointments,
+    "get_appointments_between_times": tool_get_appointments_between_times,
+    "search_appointments_by_name": tool_search_appointments_by_name,
+    "reschedule_appointment": tool_reschedule_appointment,
+}
+
+# Tools that change data; answers from a turn that used one are not cached.
+MUTATING_TOOLS = {"reschedule_appointment"}
 
 TOOLS = [
     {
@@ -19,5 +38,114 @@ TOOLS = [
                 "additionalProperties": False,
             },
         },
-    }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_appointments_between_times",
+            "description": (
+                "Return the business's appointments starting between two local times "
+                "on one day (default today), in the user's timezone."
+            ),
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "start_time": {"type": "string", "description": "Local start time, HH:MM"},
+                    "end_time": {"type": "string", "description": "Local end time, HH:MM"},
+                    "date": {"type": "string", "description": "Local date, YYYY-MM-DD"},
+                },
+                "required": ["start_time", "end_time"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_appointments_by_name",
+            "description": (
+                "Find the business's appointments by client name, title or invitee "
+                "email. Matches words by prefix, case-insensitively."
+            ),
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string", "description": "Client name or the start of it"},
+                },
+                "required": ["name"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "reschedule_appointment",
+            "description": "Move an appointment to a new start and end time.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "appointment_id": {"type": "string"},
+                    "start_time": {"type": "string", "description": "New start, ISO 8601"},
+                    "end_time": {"type": "string", "description": "New end, ISO 8601"},
+                },
+                "required": ["appointment_id", "start_time", "end_time"],
+                "additionalProperties": False,
+            },
+        },
+    },
 ]
+
+
+def _call_key(name: str, arguments: str) -> Tuple[str, str]:
+    try:
+        args = json.loads(arguments or "{}")
+    except ValueError:
+        return name, arguments
+    return name, json.dumps(args, sort_keys=True)
+
+
+def _run_tool(name: str, arguments: str, current_user: Dict[str, Any]) -> str:
+    handler = TOOL_HANDLERS.get(name)
+    if handler is None:
+        return json.dumps({"error": f"Unknown tool '{name}'"})
+    try:
+        args = json.loads(arguments or "{}")
+        if not isinstance(args, dict):
+            raise ValueError("Tool arguments must be a JSON object")
+        result = handler(current_user, **args)
+    except Exception as e:
+        return json.dumps({"error": str(e)})
+    return compact_tool_result(result, user_timezone(current_user), TOOL_RESULT_TOKEN_BUDGET)
+
+
+async def execute_tool_calls(
+    tool_calls: List[Dict[str, Any]],
+    current_user: Dict[str, Any],
+    memo: Dict[Tuple[str, str], "asyncio.Future[str]"],
+) -> List[str]:
+    """
+    Run one model turn's tool calls concurrently and return their outputs in
+    call order. Identical calls (same name and arguments) within a chat turn
+    share one execution via memo, until a mutating call makes earlier reads
+    stale.
+    """
+    pending = []
+    mutated = False
+    for call in tool_calls:
+        name = call["function"]["name"]
+        arguments = call["function"].get("arguments") or "{}"
+        key = _call_key(name, arguments)
+        if key not in memo:
+            memo[key] = asyncio.ensure_future(
+                run_ddb(_run_tool, name, arguments, current_user)
+            )
+        mutated = mutated or name in MUTATING_TOOLS
+        pending.append(memo[key])
+    outputs = list(await asyncio.gather(*pending))
+    if mutated:
+        # Writes stay memoized: repeating one is a no-op, and the turn is
+        # still known to have mutated when deciding whether to cache it.
+        for key in [k for k in memo if k[0] not in MUTATING_TOOLS]:
+            del memo[key]
+    return outputs
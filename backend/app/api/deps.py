@@ -0,0 +1,16 @@
+from fastapi import Depends, HTTPException, status
+
+from app.core.auth_cognito import get_current_user, AuthUser
+from app.services.user_service import aget_user_by_id
+
+
+async def get_current_user_item(user: AuthUser = Depends(get_current_user)) -> dict:
+    # FastAPI resolves a dependency once per request, so every consumer in the
+    # same request shares this single (cached) users-table read.
+    item = await aget_user_by_id(user.sub)
+    if not item:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    return item
@@ -1,14 +1,19 @@
 from fastapi import APIRouter, Depends
-from app.core.auth_cognito import get_current_user
+from app.api.deps import get_current_user_item
 from app.services.agent_service import get_today_appointments
+from app.services.working_hours_service import user_timezone
 
 router = APIRouter(prefix="/agent", tags=["Agent"])
 
 @router.get("/appointments-today")
-def appointments_today(current_user=Depends(get_current_user)):
+def appointments_today(current_user: dict = Depends(get_current_user_item)):
     user_id = current_user["userId"]
     business_id = current_user["defaultBusinessId"]
-    data = get_today_appointments(user_id=user_id, business_id=business_id)
+    data = get_today_appointments(
+        user_id=user_id,
+        business_id=business_id,
+        zone=user_timezone(current_user),
+    )
     return {
         "date": data["date"],
         "count": data["count"],
@@ -1,32 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query
+from fastapi.responses import HTMLResponse, StreamingResponse
 from typing import Optional
-from datetime import datetime, time
-from zoneinfo import ZoneInfo
+from datetime import datetime, time, timezone
+from heapq import nsmallest
+from operator import itemgetter
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from app.core.auth_cognito import get_current_user, AuthUser
-from app.models.appointment import AppointmentCreate, AppointmentOut, AppointmentList
-from app.services.user_service import get_user_by_id
+from app.api.deps import get_current_user_item
+from app.core.ddb import encode_cursor, decode_cursor
+from app.models.appointment import (
+    AppointmentCreate,
+    AppointmentImportResult,
+    AppointmentList,
+    AppointmentOut,
+    AppointmentUpdate,
+)
+from app.services.appointment_import import IMPORT_FORMATS, import_appointments, import_format
 from app.services.appointment_service import (
+    AppointmentNotFoundError,
+    InvalidRsvpTokenError,
+    StaleAppointmentError,
+    check_start_key,
     create_appointment,
-    list_appointments_for_business,
-    get_appointment_by_id,
+    query_appointments_page,
+    iter_appointment_pages,
+    iter_appointments_between,
+    parse_dt_utc,
+    update_appointment,
     update_appointment_status,
 )
+from app.services.appointment_search import search_appointments
+from app.services.slot_service import BookingConflictError
 
 router = APIRouter(prefix="/appointments", tags=["appointments"])
 
 
-def _load_user_item(user: AuthUser):
-    item: Optional[dict] = get_user_by_id(user.sub)
-    if not item:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found",
-        )
-    return item
-
-
 def _item_to_appointment_out(item: dict) -> AppointmentOut:
     return AppointmentOut(
         appointmentId=item["appointmentId"],
@@ -42,52 +50,167 @@ def _item_to_appointment_out(item: dict) -> AppointmentOut:
         status=item.get("status", "pending"),
         createdAt=item.get("createdAt", ""),
         updatedAt=item.get("updatedAt", ""),
+        version=int(item.get("version", 0)),
     )
 
 
-def _parse_dt_utc(s: str, assumed_tz: ZoneInfo) -> datetime:
-    ss = s.strip()
-    if ss.endswith("Z"):
-        ss = ss[:-1] + "+00:00"
-    d = datetime.fromisoformat(ss)
-    if d.tzinfo is None:
-        d = d.replace(tzinfo=assumed_tz)
-    return d.astimezone(ZoneInfo("UTC"))
-
-
 @router.post("", response_model=AppointmentOut)
 def create_appointment_route(
     payload: AppointmentCreate,
-    user: AuthUser = Depends(get_current_user),
+    user_item: dict = Depends(get_current_user_item),
 ) -> AppointmentOut:
-    user_item = _load_user_item(user)
-    item = create_appointment(user_item, payload)
+    try:
+        item = create_appointment(user_item, payload)
+    except BookingConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return _item_to_appointment_out(item)
 
 
+@router.post("/import", response_model=AppointmentImportResult)
+async def import_appointments_route(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format"),
+    notify: str = Query("none"),
+    user_item: dict = Depends(get_current_user_item),
+):
+    # The body is the raw file (text/csv or text/calendar), read as a stream.
+    fmt = (fmt or import_format(request.headers.get("content-type", "")) or "").lower()
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Send text/csv or text/calendar, or pass format=csv|ics",
+        )
+    try:
+        return await import_appointments(user_item, request.stream(), fmt, notify)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.patch("/{appointment_id}", response_model=AppointmentOut)
+def update_appointment_route(
+    appointment_id: str,
+    payload: AppointmentUpdate,
+    user_item: dict = Depends(get_current_user_item),
+) -> AppointmentOut:
+    try:
+        item = update_appointment(user_item, appointment_id, payload)
+    except (BookingConflictError, StaleAppointmentError) as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not item:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Appointment not found",
+        )
+    return _item_to_appointment_out(item)
+
+
+def _parse_zone(tz: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown timezone '{tz}'",
+        )
+
+
+def _parse_bound(value: Optional[str], zone: ZoneInfo, name: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return parse_dt_utc(value, zone)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid '{name}' datetime",
+        )
+
+
+def _ndjson_rows(pages):
+    for page in pages:
+        for item in page:
+            yield _item_to_appointment_out(item).model_dump_json() + "\n"
+
+
 @router.get("", response_model=AppointmentList)
 def list_appointments_route(
-    user: AuthUser = Depends(get_current_user),
-) -> AppointmentList:
-    user_item = _load_user_item(user)
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = Query(None),
+    from_: Optional[str] = Query(None, alias="from"),
+    to: Optional[str] = Query(None),
+    tz: str = Query("UTC"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    user_item: dict = Depends(get_current_user_item),
+):
     business_id = user_item.get("defaultBusinessId")
     if not business_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User has no default business configured",
         )
-    items = list_appointments_for_business(business_id)
-    out_items = [_item_to_appointment_out(i) for i in items]
-    return AppointmentList(items=out_items)
+
+    zone = _parse_zone(tz)
+    start_utc = _parse_bound(from_, zone, "from")
+    end_utc = _parse_bound(to, zone, "to")
+
+    try:
+        start_key = decode_cursor(cursor) if cursor else None
+        if start_key:
+            check_start_key(business_id, start_key, start_utc is not None or end_utc is not None)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if format == "ndjson":
+        pages = iter_appointment_pages(
+            business_id, limit, start_key, start_utc, end_utc, zone
+        )
+        return StreamingResponse(_ndjson_rows(pages), media_type="application/x-ndjson")
+
+    if not limit:
+        items = [
+            i
+            for page in iter_appointment_pages(
+                business_id, None, start_key, start_utc, end_utc, zone
+            )
+            for i in page
+        ]
+        return AppointmentList(items=[_item_to_appointment_out(i) for i in items])
+
+    items, last_key = query_appointments_page(
+        business_id, limit, start_key, start_utc, end_utc, zone
+    )
+    return AppointmentList(
+        items=[_item_to_appointment_out(i) for i in items],
+        nextCursor=encode_cursor(last_key) if last_key else None,
+    )
+
+
+@router.get("/search", response_model=AppointmentList)
+def search_appointments_route(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    user_item: dict = Depends(get_current_user_item),
+):
+    business_id = user_item.get("defaultBusinessId")
+    if not business_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User has no default business configured",
+        )
+    items = search_appointments(business_id, q, limit)
+    return AppointmentList(items=[_item_to_appointment_out(i) for i in items])
 
 
 @router.get("/summary")
 def appointments_summary(
     date: str = Query(...),
     tz: str = Query("Asia/Singapore"),
-    user: AuthUser = Depends(get_current_user),
+    user_item: dict = Depends(get_current_user_item),
 ):
-    user_item = _load_user_item(user)
     business_id = user_item.get("defaultBusinessId")
     if not business_id:
         raise HTTPException(
@@ -95,33 +218,33 @@ def appointments_summary(
             detail="User has no default business configured",
         )
 
-    zone = ZoneInfo(tz)
-    day = datetime.fromisoformat(date).date()
-
-    start_local = datetime.combine(day, time.min).replace(tzinfo=zone)
-    end_local = datetime.combine(day, time.max).replace(tzinfo=zone)
-
-    utc = ZoneInfo("UTC")
-    start_utc = start_local.astimezone(utc)
-    end_utc = end_local.astimezone(utc)
+    zone = _parse_zone(tz)
+    try:
+        day = datetime.fromisoformat(date).date()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid 'date'",
+        )
 
-    items = list_appointments_for_business(business_id)
-    out_items = [_item_to_appointment_out(i) for i in items]
+    start_utc = datetime.combine(day, time.min).replace(tzinfo=zone).astimezone(timezone.utc)
+    end_utc = datetime.combine(day, time.max).replace(tzinfo=zone).astimezone(timezone.utc)
 
     todays = []
-    for a in out_items:
-        try:
-            d = _parse_dt_utc(a.startTime, zone)
-        except Exception:
-            continue
-        if start_utc <= d <= end_utc:
-            todays.append(a)
-
-    confirmed = sum(1 for a in todays if (a.status or "").lower() == "confirmed")
-    pending = sum(1 for a in todays if (a.status or "").lower() == "pending")
+    confirmed = 0
+    pending = 0
+    for d, item in iter_appointments_between(business_id, start_utc, end_utc, assumed_tz=zone):
+        todays.append((d, item))
+        st = (item.get("status", "pending") or "").lower()
+        if st == "confirmed":
+            confirmed += 1
+        elif st == "pending":
+            pending += 1
 
-    todays.sort(key=lambda a: _parse_dt_utc(a.startTime, zone))
-    upcoming = todays[:6]
+    upcoming = [
+        _item_to_appointment_out(item)
+        for _, item in nsmallest(6, todays, key=itemgetter(0))
+    ]
 
     return {
         "date": date,
@@ -142,20 +265,6 @@ def rsvp_appointment(
     token: str = Query(..., alias="token"),
     choice: str = Query(..., alias="choice"),
 ):
-    item = get_appointment_by_id(businessId, appointmentId)
-    if not item:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Appointment not found",
-        )
-
-    stored_token = item.get("rsvpToken")
-    if not stored_token or stored_token != token:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid RSVP token",
-        )
-
     c = choice.lower()
     if c == "accepted":
         new_status = "confirmed"
@@ -172,7 +281,15 @@ def rsvp_appointment(
             detail="Invalid RSVP choice",
         )
 
-    update_appointment_status(businessId, appointmentId, new_status)
+    # The token check rides on the write's condition, so this is one request.
+    try:
+        update_appointment_status(businessId, appointmentId, new_status, rsvp_token=token)
+    except AppointmentNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except InvalidRsvpTokenError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except StaleAppointmentError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
     html = (
         "<html><head><title>Appointment RSVP</title></head>"
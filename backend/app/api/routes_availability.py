@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+
+from app.api.deps import get_current_user_item
+from app.models.availability import Availability
+from app.services.availability_service import AvailabilityRangeError, get_availability
+
+router = APIRouter(prefix="/availability", tags=["availability"])
+
+
+@router.get("", response_model=Availability)
+def get_availability_route(
+    from_: str = Query(..., alias="from"),
+    to: str = Query(...),
+    duration: int = Query(30, ge=5, le=24 * 60),
+    user_item: dict = Depends(get_current_user_item),
+):
+    try:
+        return get_availability(user_item, from_, to, duration)
+    except AvailabilityRangeError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
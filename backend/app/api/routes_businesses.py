@@ -1,18 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Optional
+from typing import List
 from app.core.auth_cognito import get_current_user, AuthUser
 from app.models.business import BusinessCreate, BusinessOut
-from app.services.user_service import get_user_by_id
-from app.services.business_service import create_business_for_user, list_businesses_for_user
+from app.api.deps import get_current_user_item
+from app.services.business_service import (
+    BusinessNameTaken,
+    create_business_for_user,
+    list_businesses_for_user,
+)
 
 router = APIRouter(prefix="/businesses", tags=["businesses"])
 
-def _load_user_item(user: AuthUser):
-    item: Optional[dict] = get_user_by_id(user.sub)
-    if not item:
-        raise HTTPException(status_code=404, detail="User not found")
-    return item
-
 def _item_to_business_out(item: dict) -> BusinessOut:
     return BusinessOut(
         businessId=item["businessId"],
@@ -23,9 +21,11 @@ def _item_to_business_out(item: dict) -> BusinessOut:
     )
 
 @router.post("", response_model=BusinessOut)
-def create_business(payload: BusinessCreate, user: AuthUser = Depends(get_current_user)) -> BusinessOut:
-    user_item = _load_user_item(user)
-    item = create_business_for_user(user_item, payload)
+def create_business(payload: BusinessCreate, user_item: dict = Depends(get_current_user_item)) -> BusinessOut:
+    try:
+        item = create_business_for_user(user_item, payload)
+    except BusinessNameTaken as e:
+        raise HTTPException(status_code=409, detail=str(e))
     return _item_to_business_out(item)
 
 @router.get("", response_model=List[BusinessOut])
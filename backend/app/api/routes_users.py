@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Optional
+from fastapi import APIRouter, Depends
+from app.api.deps import get_current_user_item
 from app.core.auth_cognito import get_current_user, AuthUser
 from app.models.user import UserOut, UserBootstrapIn
-from app.services.user_service import get_user_by_id, bootstrap_user
+from app.services.user_service import bootstrap_user
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -19,10 +19,7 @@ def _item_to_user_out(item: dict) -> UserOut:
     )
 
 @router.get("/me", response_model=UserOut)
-def get_me(user: AuthUser = Depends(get_current_user)) -> UserOut:
-    item: Optional[dict] = get_user_by_id(user.sub)
-    if not item:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+def get_me(item: dict = Depends(get_current_user_item)) -> UserOut:
     return _item_to_user_out(item)
 
 @router.post("/bootstrap", response_model=UserOut)
@@ -1,16 +1,25 @@
-import os
-import httpx
-from functools import lru_cache
-from typing import Optional, List
+import time
+import asyncio
+import hashlib
+import threading
+from typing import Callable, Dict, Optional, List
 from fastapi import HTTPException, status, Header
-from jose import jwt, JWTError
-from dotenv import load_dotenv
+from jose import jwk, jwt, JWTError
+from jose.backends.base import Key
 
-load_dotenv()
+from app.core.cache import TTLCache
+from app.core.config import (
+    COG_CLIENT_ID,
+    COG_REGION,
+    COG_USER_POOL_ID,
+    JWKS_MISS_REFETCH_SECONDS,
+    JWKS_TTL_SECONDS,
+    TOKEN_CACHE_MAXSIZE,
+)
 
-REGION = os.getenv("COG_REGION")
-POOL = os.getenv("COG_USER_POOL_ID")
-CLIENT = os.getenv("COG_CLIENT_ID")
+REGION = COG_REGION
+POOL = COG_USER_POOL_ID
+CLIENT = COG_CLIENT_ID
 if not (REGION and POOL and CLIENT):
     raise RuntimeError("Missing env: COG_REGION / COG_USER_POOL_ID / COG_CLIENT_ID")
 
@@ -24,22 +33,148 @@ class AuthError(HTTPException):
         super().__init__(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
 
 
-@lru_cache(maxsize=1)
-def get_jwks():
-    with httpx.Client(timeout=5.0) as c:
-        r = c.get(JWKS_URL)
-        r.raise_for_status()
-        data = r.json()
-        if not isinstance(data.get("keys"), list):
+class JWKSStore:
+    """
+    Cognito signing keys indexed by kid, held as prebuilt jose key objects so
+    verification does not re-parse the JWK on every request.
+
+    Keys are fetched on first use and refreshed in the background once they
+    are older than the TTL; stale keys keep serving until the refresh lands.
+    A token whose kid is unknown triggers a refetch (to pick up key
+    rotation), rate-limited so bogus kids cannot hammer Cognito. The same
+    limit spaces out retries while Cognito is unreachable, before the first
+    fetch has succeeded too.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ttl: float = 3600.0,
+        miss_refetch_interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.url = url
+        self.ttl = ttl
+        self.miss_refetch_interval = miss_refetch_interval
+        self.clock = clock
+        self._keys: Dict[str, Key] = {}
+        self._fetched_at: Optional[float] = None
+        self._last_attempt = float("-inf")
+        self._inflight: Optional[asyncio.Task] = None
+        self._sync_lock = threading.Lock()
+
+    def _install(self, data: dict) -> None:
+        keys = data.get("keys")
+        if not isinstance(keys, list):
             raise RuntimeError("JWKS payload invalid")
-        return data
+        built: Dict[str, Key] = {}
+        for k in keys:
+            if not isinstance(k, dict) or not k.get("kid"):
+                continue
+            try:
+                built[k["kid"]] = jwk.construct(k, k.get("alg") or ALGS[0])
+            except Exception as e:
+                print("Skipping unusable JWK", k.get("kid"), repr(e))
+        self._keys = built
+        self._fetched_at = self.clock()
+
+    def _is_stale(self) -> bool:
+        return self._fetched_at is None or self.clock() - self._fetched_at >= self.ttl
+
+    def _may_refetch(self) -> bool:
+        return self.clock() - self._last_attempt >= self.miss_refetch_interval
+
+    async def refresh(self) -> None:
+        import httpx  # deferred: only needed once keys are fetched
+
+        self._last_attempt = self.clock()
+        async with httpx.AsyncClient(timeout=5.0) as c:
+            r = await c.get(self.url)
+            r.raise_for_status()
+            self._install(r.json())
+
+    def _fetch_sync(self) -> None:
+        import httpx
+
+        self._last_attempt = self.clock()
+        with httpx.Client(timeout=5.0) as c:
+            r = c.get(self.url)
+            r.raise_for_status()
+            self._install(r.json())
+
+    def refresh_sync(self) -> None:
+        with self._sync_lock:
+            self._fetch_sync()
+
+    def _refresh_sync_if_allowed(self) -> None:
+        # Checked under the lock, so threads queued behind a fetch use its
+        # result instead of repeating it.
+        with self._sync_lock:
+            if self._may_refetch():
+                self._fetch_sync()
+
+    def _refreshing(self) -> bool:
+        return self._inflight is not None and not self._inflight.done()
 
+    def _start_refresh(self) -> asyncio.Task:
+        if not self._refreshing():
+            self._inflight = asyncio.ensure_future(self.refresh())
+            self._inflight.add_done_callback(_log_refresh_failure)
+        return self._inflight
 
-def _find_key(kid: str):
-    for k in get_jwks()["keys"]:
-        if k.get("kid") == kid:
-            return k
-    return None
+    def _require_keys(self) -> None:
+        if self._fetched_at is None:
+            raise RuntimeError("Signing keys unavailable")
+
+    async def get_key(self, kid: str) -> Optional[Key]:
+        if self._fetched_at is None:
+            if self._refreshing() or self._may_refetch():
+                await asyncio.shield(self._start_refresh())
+            self._require_keys()
+        elif self._is_stale() and self._may_refetch():
+            self._start_refresh()
+
+        key = self._keys.get(kid)
+        if key is None and self._may_refetch():
+            await asyncio.shield(self._start_refresh())
+            key = self._keys.get(kid)
+        return key
+
+    def get_key_sync(self, kid: str) -> Optional[Key]:
+        if self._fetched_at is None:
+            self._refresh_sync_if_allowed()
+            self._require_keys()
+        elif self._is_stale():
+            try:
+                self._refresh_sync_if_allowed()
+            except Exception as e:
+                # Stale keys keep serving, as on the async path.
+                print("JWKS refresh failed:", repr(e))
+
+        key = self._keys.get(kid)
+        if key is None and self._may_refetch():
+            self._refresh_sync_if_allowed()
+            key = self._keys.get(kid)
+        return key
+
+
+def _log_refresh_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        print("JWKS refresh failed:", repr(task.exception()))
+
+
+jwks_store = JWKSStore(JWKS_URL, ttl=JWKS_TTL_SECONDS, miss_refetch_interval=JWKS_MISS_REFETCH_SECONDS)
+
+# Verified claims keyed by a digest of the raw token, each entry living until
+# the token's own exp. A cache hit skips header parsing and RS256 verification.
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_MAXSIZE)
+
+
+async def prewarm_jwks() -> None:
+    try:
+        await jwks_store.refresh()
+    except Exception as e:
+        print("JWKS prewarm failed:", repr(e))
 
 
 def _require_scopes(token_scope: Optional[str], required_scopes: Optional[List[str]]) -> None:
@@ -51,17 +186,25 @@ def _require_scopes(token_scope: Optional[str], required_scopes: Optional[List[s
         raise AuthError(f"Missing scope(s): {' '.join(missing)}")
 
 
-def verify_access_token(access_token: str, required_scopes: Optional[List[str]] = None) -> dict:
-    if not access_token:
-        raise AuthError("Missing token")
+def _token_digest(access_token: str) -> bytes:
+    return hashlib.sha256(access_token.encode("utf-8")).digest()
+
+
+def _token_kid(access_token: str) -> str:
     try:
         hdr = jwt.get_unverified_header(access_token)
-        kid = hdr.get("kid")
-        if not kid:
-            raise AuthError("Missing kid")
-        key = _find_key(kid)
-        if not key:
-            raise AuthError("Key not found")
+    except JWTError:
+        raise AuthError("Invalid or expired token")
+    kid = hdr.get("kid")
+    if not kid:
+        raise AuthError("Missing kid")
+    return kid
+
+
+def _decode_claims(access_token: str, key: Optional[Key]) -> dict:
+    if not key:
+        raise AuthError("Key not found")
+    try:
         claims = jwt.decode(
             access_token,
             key,
@@ -78,8 +221,6 @@ def verify_access_token(access_token: str, required_scopes: Optional[List[str]]
         )
         if claims.get("token_use") != "access":
             raise AuthError("Wrong token_use")
-        _require_scopes(claims.get("scope"), required_scopes)
-        return claims
     except AuthError:
         raise
     except JWTError:
@@ -87,6 +228,41 @@ def verify_access_token(access_token: str, required_scopes: Optional[List[str]]
     except Exception as e:
         raise AuthError(f"Token verification error: {e}")
 
+    ttl = float(claims["exp"]) - time.time()
+    if ttl > 0:
+        _token_cache.set(_token_digest(access_token), claims, ttl=ttl)
+    return claims
+
+
+def verify_access_token(access_token: str, required_scopes: Optional[List[str]] = None) -> dict:
+    if not access_token:
+        raise AuthError("Missing token")
+    claims = _token_cache.get(_token_digest(access_token))
+    if claims is None:
+        kid = _token_kid(access_token)
+        try:
+            key = jwks_store.get_key_sync(kid)
+        except Exception as e:
+            raise AuthError(f"Token verification error: {e}")
+        claims = _decode_claims(access_token, key)
+    _require_scopes(claims.get("scope"), required_scopes)
+    return dict(claims)
+
+
+async def verify_access_token_async(access_token: str, required_scopes: Optional[List[str]] = None) -> dict:
+    if not access_token:
+        raise AuthError("Missing token")
+    claims = _token_cache.get(_token_digest(access_token))
+    if claims is None:
+        kid = _token_kid(access_token)
+        try:
+            key = await jwks_store.get_key(kid)
+        except Exception as e:
+            raise AuthError(f"Token verification error: {e}")
+        claims = _decode_claims(access_token, key)
+    _require_scopes(claims.get("scope"), required_scopes)
+    return dict(claims)
+
 
 def _parse_bearer(authorization: Optional[str]) -> str:
     if not authorization or not authorization.startswith("Bearer "):
@@ -105,7 +281,7 @@ async def get_current_user(
     authorization: str = Header(None)
 ) -> AuthUser:
     token = _parse_bearer(authorization)
-    claims = verify_access_token(token)
+    claims = await verify_access_token_async(token)
     sub = claims.get("sub")
     if not sub:
         raise AuthError("Missing sub")
@@ -1,17 +1,63 @@
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
-load_dotenv()
+# The one place .env is read; modules that read os.environ at import time
+# import this module first.
+load_dotenv(Path(__file__).resolve().parents[2] / ".env")
 
 COG_REGION = os.getenv("COG_REGION")
 COG_USER_POOL_ID = os.getenv("COG_USER_POOL_ID")
 COG_CLIENT_ID = os.getenv("COG_CLIENT_ID")
 
+# Cognito signing keys: cache lifetime, the minimum gap between refetches
+# (unknown kids, failed fetches), and whether startup fetches them. Verified
+# tokens are cached separately, each until its own exp.
+JWKS_TTL_SECONDS = float(os.getenv("JWKS_TTL_SECONDS", "3600"))
+JWKS_MISS_REFETCH_SECONDS = float(os.getenv("JWKS_MISS_REFETCH_SECONDS", "30"))
+JWKS_PREWARM = os.getenv("JWKS_PREWARM", "false").lower() in ("1", "true", "yes")
+TOKEN_CACHE_MAXSIZE = int(os.getenv("TOKEN_CACHE_MAXSIZE", "4096"))
+
 AWS_REGION = os.getenv("AWS_REGION")
 
 DDB_TABLE_USERS = os.getenv("DDB_TABLE_USERS", "officemate_users")
 DDB_TABLE_BUSINESSES = os.getenv("DDB_TABLE_BUSINESSES", "officemate_businesses")
 DDB_TABLE_APPOINTMENTS = os.getenv("DDB_TABLE_APPTS", "officemate_appointments")
+DDB_TABLE_SLOTS = os.getenv("DDB_TABLE_SLOTS", "officemate_slots")
+
+DDB_APPTS_START_INDEX = os.getenv("DDB_APPTS_START_INDEX", "businessId-startTime-index")
+DDB_BUSINESSES_OWNER_INDEX = os.getenv("DDB_BUSINESSES_OWNER_INDEX", "ownerUserId-index")
+DDB_APPTS_REMINDER_INDEX = os.getenv("DDB_APPTS_REMINDER_INDEX", "reminderBucket-reminderAt-index")
+
+# DynamoDB client tuning. Async code runs DynamoDB calls on a dedicated
+# executor with one thread per pooled connection.
+DDB_MAX_POOL_CONNECTIONS = int(os.getenv("DDB_MAX_POOL_CONNECTIONS", "50"))
+DDB_CONNECT_TIMEOUT = float(os.getenv("DDB_CONNECT_TIMEOUT", "2"))
+DDB_READ_TIMEOUT = float(os.getenv("DDB_READ_TIMEOUT", "5"))
+DDB_MAX_ATTEMPTS = int(os.getenv("DDB_MAX_ATTEMPTS", "3"))
+DDB_TCP_KEEPALIVE = os.getenv("DDB_TCP_KEEPALIVE", "true").lower() in ("1", "true", "yes")
+API_THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", "40"))
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", "2048"))
+
+BOOKING_SLOT_MINUTES = int(os.getenv("BOOKING_SLOT_MINUTES", "15"))
+BOOKING_MAX_SLOTS = int(os.getenv("BOOKING_MAX_SLOTS", "48"))
+
+# Bulk import: rows accepted per upload, BatchWriteItem calls in flight, and
+# attempts for each batch's unprocessed items.
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "10000"))
+IMPORT_PARALLEL_BATCHES = int(os.getenv("IMPORT_PARALLEL_BATCHES", "8"))
+IMPORT_MAX_ATTEMPTS = int(os.getenv("IMPORT_MAX_ATTEMPTS", "5"))
+
+REMINDERS_ENABLED = os.getenv("REMINDERS_ENABLED", "false").lower() in ("1", "true", "yes")
+REMINDER_LEAD_HOURS = float(os.getenv("REMINDER_LEAD_HOURS", "24"))
+REMINDER_TICK_SECONDS = float(os.getenv("REMINDER_TICK_SECONDS", "60"))
+REMINDER_LOOKBACK_HOURS = int(os.getenv("REMINDER_LOOKBACK_HOURS", "6"))
+# How often the scheduler scans for reminders older than the lookback.
+REMINDER_SWEEP_SECONDS = float(os.getenv("REMINDER_SWEEP_SECONDS", "3600"))
+# How far back the first sweep (with no watermark yet) looks.
+REMINDER_SWEEP_MAX_HOURS = int(os.getenv("REMINDER_SWEEP_MAX_HOURS", "168"))
 
 FRONTEND_ORIGIN = os.getenv("FRONTEND_ORIGIN", "http://localhost:5173")
 
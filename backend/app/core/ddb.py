@@ -1,10 +1,26 @@
 import os
-from dotenv import load_dotenv
+import json
+import time
+import base64
+import random
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 import boto3
-from botocore.exceptions import BotoCoreError, NoCredentialsError
-from .config import AWS_REGION, DDB_TABLE_USERS, DDB_TABLE_BUSINESSES, DDB_TABLE_APPOINTMENTS
-
-load_dotenv()
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
+from .config import (
+    AWS_REGION,
+    DDB_CONNECT_TIMEOUT,
+    DDB_MAX_ATTEMPTS,
+    DDB_MAX_POOL_CONNECTIONS,
+    DDB_READ_TIMEOUT,
+    DDB_TCP_KEEPALIVE,
+    DDB_TABLE_USERS,
+    DDB_TABLE_BUSINESSES,
+    DDB_TABLE_APPOINTMENTS,
+    DDB_TABLE_SLOTS,
+)
 
 PROFILE = os.getenv("AWS_PROFILE")
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
@@ -23,17 +39,132 @@ def _make_session():
         )
     return boto3.Session(region_name=AWS_REGION)
 
-try:
-    _session = _make_session()
-    _ddb = _session.resource("dynamodb")
-except (BotoCoreError, NoCredentialsError) as e:
-    raise RuntimeError(f"{e}")
+_config = Config(
+    max_pool_connections=DDB_MAX_POOL_CONNECTIONS,
+    connect_timeout=DDB_CONNECT_TIMEOUT,
+    read_timeout=DDB_READ_TIMEOUT,
+    tcp_keepalive=DDB_TCP_KEEPALIVE,
+    retries={"max_attempts": DDB_MAX_ATTEMPTS, "mode": "standard"},
+)
+
+
+@functools.lru_cache(maxsize=1)
+def get_ddb():
+    # Built on first use: loading the DynamoDB service model is the bulk of
+    # this module's cost, and a cold start serving /health never needs it.
+    try:
+        return _make_session().resource("dynamodb", config=_config)
+    except (BotoCoreError, NoCredentialsError) as e:
+        raise RuntimeError(f"{e}")
+
+# One thread per pooled connection: async callers never queue on the
+# connection pool, and DynamoDB work stays off the event loop and out of the
+# threadpool that serves sync routes.
+_executor = ThreadPoolExecutor(max_workers=DDB_MAX_POOL_CONNECTIONS, thread_name_prefix="ddb")
+
+
+async def run_ddb(fn, *args, **kwargs):
+    # The one async entry point: services stay sync, and async routes and the
+    # assistant await their calls through here. Sync routes already run on
+    # AnyIO's thread pool and call services directly.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
 
 def users_table():
-    return _ddb.Table(DDB_TABLE_USERS)
+    return get_ddb().Table(DDB_TABLE_USERS)
 
 def businesses_table():
-    return _ddb.Table(DDB_TABLE_BUSINESSES)
+    return get_ddb().Table(DDB_TABLE_BUSINESSES)
 
 def appointments_table():
-    return _ddb.Table(DDB_TABLE_APPOINTMENTS)
+    return get_ddb().Table(DDB_TABLE_APPOINTMENTS)
+
+def slots_table():
+    return get_ddb().Table(DDB_TABLE_SLOTS)
+
+
+def query_all(table, **kwargs):
+    while True:
+        resp = table.query(**kwargs)
+        for item in resp.get("Items", []):
+            yield item
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def scan_all(table, **kwargs):
+    while True:
+        resp = table.scan(**kwargs)
+        yield from resp.get("Items", [])
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def encode_cursor(last_key: dict) -> str:
+    raw = json.dumps(last_key, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(key, dict):
+        raise ValueError("Invalid cursor")
+    return key
+
+
+def transact_write(actions: list) -> None:
+    # The resource's client marshals plain Python values like Table does.
+    get_ddb().meta.client.transact_write_items(TransactItems=actions)
+
+
+def cancellation_codes(e: ClientError) -> list:
+    if e.response.get("Error", {}).get("Code") != "TransactionCanceledException":
+        return []
+    return [r.get("Code") for r in e.response.get("CancellationReasons", [])]
+
+
+BATCH_WRITE_LIMIT = 25
+BATCH_GET_LIMIT = 100
+
+
+def _backoff(attempt: int) -> None:
+    time.sleep(min(0.05 * 2 ** attempt, 2.0) * random.uniform(0.5, 1.0))
+
+
+def batch_write(request_items: dict, max_attempts: int) -> dict:
+    # One BatchWriteItem of at most BATCH_WRITE_LIMIT requests. Throttled
+    # items come back as UnprocessedItems rather than an error; they are
+    # resent with backoff, and whatever is still unprocessed is returned.
+    for attempt in range(max_attempts):
+        resp = get_ddb().meta.client.batch_write_item(RequestItems=request_items)
+        request_items = resp.get("UnprocessedItems") or {}
+        if not request_items:
+            return {}
+        if attempt + 1 < max_attempts:
+            _backoff(attempt)
+    return request_items
+
+
+def batch_get_keys(table_name: str, keys: list, projection: str, max_attempts: int) -> list:
+    items = []
+    for i in range(0, len(keys), BATCH_GET_LIMIT):
+        pending = {table_name: {"Keys": keys[i:i + BATCH_GET_LIMIT], "ProjectionExpression": projection}}
+        for attempt in range(max_attempts):
+            resp = get_ddb().meta.client.batch_get_item(RequestItems=pending)
+            items.extend(resp.get("Responses", {}).get(table_name, []))
+            pending = resp.get("UnprocessedKeys") or {}
+            if not pending:
+                break
+            if attempt + 1 < max_attempts:
+                _backoff(attempt)
+        else:
+            raise RuntimeError("DynamoDB did not return every requested key")
+    return items
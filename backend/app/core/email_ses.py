@@ -1,17 +1,74 @@
 import os
+import math
+import threading
+import time
 import boto3
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from botocore.config import Config
 from botocore.exceptions import BotoCoreError, ClientError
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
 
+from app.core.rate_limit import TokenBucket
 
+# SES rejections that will fail the same way on every retry.
+PERMANENT_ERROR_CODES = {
+    "MessageRejected",
+    "MailFromDomainNotVerified",
+    "InvalidParameterValue",
+    "ConfigurationSetDoesNotExist",
+}
+
+SES_QUOTA_RETRY_SECONDS = float(os.getenv("SES_QUOTA_RETRY_SECONDS", "60"))
+
+_limiter: Optional[TokenBucket] = None
+_limiter_lock = threading.Lock()
+_fallback_limiter = TokenBucket(1.0)
+_quota_retry_at = 0.0
+
+
+@lru_cache(maxsize=1)
 def get_ses_client():
     region = os.getenv("AWS_REGION", "us-east-1")
-    return boto3.client("ses", region_name=region)
+    return boto3.client(
+        "ses",
+        region_name=region,
+        endpoint_url=os.getenv("SES_ENDPOINT_URL") or None,
+        config=Config(retries={"max_attempts": 2, "mode": "standard"}),
+    )
 
 
-def send_raw_email(to_email: str, subject: str, body_text: str, body_html: Optional[str] = None):
+def get_send_limiter() -> TokenBucket:
+    # Sized from the account's SES quota so every sender in this process
+    # (bulk sends, the email queue workers) shares one send-rate budget.
+    # Only a real quota is kept: after a failed GetSendQuota senders share a
+    # 1 msg/s fallback until the quota is asked for again.
+    global _limiter, _quota_retry_at
+    if _limiter is not None:
+        return _limiter
+    with _limiter_lock:
+        if _limiter is None and time.monotonic() >= _quota_retry_at:
+            rate = os.getenv("SES_MAX_SEND_RATE")
+            try:
+                if not rate:
+                    rate = get_ses_client().get_send_quota()["MaxSendRate"]
+                _limiter = TokenBucket(float(rate))
+            except (BotoCoreError, ClientError) as e:
+                print("SES get_send_quota failed, assuming 1 msg/s:", repr(e))
+                _quota_retry_at = time.monotonic() + SES_QUOTA_RETRY_SECONDS
+        return _limiter or _fallback_limiter
+
+
+def is_retryable(e: Exception) -> bool:
+    if isinstance(e, ClientError):
+        return e.response.get("Error", {}).get("Code") not in PERMANENT_ERROR_CODES
+    return True
+
+
+def send_email(to_email: str, subject: str, body_text: str, body_html: Optional[str] = None) -> str:
     client = get_ses_client()
     source = os.environ["SES_FROM_EMAIL"]
+    get_send_limiter().acquire()
 
     body = {
         "Text": {"Data": body_text, "Charset": "UTF-8"}
@@ -19,14 +76,50 @@ def send_raw_email(to_email: str, subject: str, body_text: str, body_html: Optio
     if body_html:
         body["Html"] = {"Data": body_html, "Charset": "UTF-8"}
 
+    resp = client.send_email(
+        Source=source,
+        Destination={"ToAddresses": [to_email]},
+        Message={
+            "Subject": {"Data": subject, "Charset": "UTF-8"},
+            "Body": body,
+        },
+    )
+    return resp["MessageId"]
+
+
+def send_raw_email(to_email: str, subject: str, body_text: str, body_html: Optional[str] = None):
     try:
-        client.send_email(
-            Source=source,
-            Destination={"ToAddresses": [to_email]},
-            Message={
-                "Subject": {"Data": subject, "Charset": "UTF-8"},
-                "Body": body,
-            },
-        )
+        send_email(to_email, subject, body_text, body_html)
     except (BotoCoreError, ClientError) as e:
         print("SES send_email failed:", repr(e))
+
+
+def _send_one(message: Dict) -> Dict:
+    try:
+        message_id = send_email(
+            message["to"],
+            message["subject"],
+            message["body_text"],
+            message.get("body_html"),
+        )
+        return {"to": message["to"], "ok": True, "messageId": message_id}
+    except (BotoCoreError, ClientError) as e:
+        return {"to": message["to"], "ok": False, "error": repr(e), "retryable": is_retryable(e)}
+    except Exception as e:
+        # Not an SES answer (e.g. SES_FROM_EMAIL unset); sending again won't help.
+        return {"to": message["to"], "ok": False, "error": repr(e), "retryable": False}
+
+
+def send_bulk_email(messages: Iterable[Dict], max_workers: Optional[int] = None) -> List[Dict]:
+    """
+    Send many messages ({"to", "subject", "body_text", "body_html"}) concurrently
+    without exceeding the SES send rate. Returns one result per message, in
+    input order, instead of raising.
+    """
+    messages = list(messages)
+    if not messages:
+        return []
+    if max_workers is None:
+        max_workers = min(32, max(1, math.ceil(get_send_limiter().rate)))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ses-bulk") as pool:
+        return list(pool.map(_send_one, messages))
@@ -1,22 +1,40 @@
-from dotenv import load_dotenv
-from pathlib import Path
+from contextlib import asynccontextmanager
+from typing import Optional
+import json
 import os
 
+import anyio
 from fastapi import FastAPI, HTTPException, status, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
-from app.agent import run_agent
-from app.core.config import FRONTEND_ORIGIN
+from app.agent import run_agent, stream_agent, answer_cache
+from app.core.config import API_THREADPOOL_SIZE, FRONTEND_ORIGIN, JWKS_PREWARM, REMINDERS_ENABLED
 from app.api.routes_working_hours import router as working_hours_router
 from app.api.routes_users import router as users_router
 from app.api.routes_businesses import router as businesses_router
 from app.api.routes_appointments import router as appointments_router
-from app.core.auth_cognito import get_current_user
-from app.services.user_service import get_user_by_id
+from app.api.routes_availability import router as availability_router
+from app.api.deps import get_current_user_item
+from app.core.auth_cognito import prewarm_jwks
+from app.services.email_queue import email_dispatcher
+from app.services.reminder_service import reminder_scheduler
 
-load_dotenv(Path(__file__).resolve().parents[1] / ".env")
 
-app = FastAPI(title="OfficeMate API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sync routes and dependencies run on AnyIO's default thread limiter.
+    anyio.to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+    if JWKS_PREWARM:
+        await prewarm_jwks()
+    if REMINDERS_ENABLED:
+        reminder_scheduler.start()
+    yield
+    reminder_scheduler.stop()
+    email_dispatcher.stop()
+
+
+app = FastAPI(title="OfficeMate API", lifespan=lifespan)
 
 _cors_origins = [
     "http://localhost:5173",
@@ -39,14 +57,13 @@ def health():
     return {
         "ok": True,
         "service": "officemate-api",
-        "assistant_version": "chat-ddb-no-model",
+        "assistant_version": "chat-ddb-tools",
+        "assistant_cache": answer_cache.stats(),
+        "email_queue": email_dispatcher.stats(),
+        "reminders": reminder_scheduler.stats(),
     }
 
-@app.post("/assistant/ui-chat")
-async def assistant_ui_chat(
-    request: Request,
-    current_user=Depends(get_current_user),
-):
+async def _parse_chat_request(request: Request):
     try:
         data = await request.json()
     except Exception:
@@ -79,15 +96,21 @@ async def assistant_ui_chat(
             continue
         history.append({"role": r, "content": c})
 
-    user_data = get_user_by_id(current_user.sub)
-    if not user_data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found in database",
-        )
+    return message, history
+
+def _sse(data: dict, event: Optional[str] = None) -> str:
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data)}\n\n"
+
+@app.post("/assistant/ui-chat")
+async def assistant_ui_chat(
+    request: Request,
+    user_data: dict = Depends(get_current_user_item),
+):
+    message, history = await _parse_chat_request(request)
 
     try:
-        output = run_agent(
+        output = await run_agent(
             user_message=message,
             history=history,
             current_user=user_data,
@@ -99,10 +122,39 @@ async def assistant_ui_chat(
             detail=str(e),
         )
 
+@app.post("/assistant/ui-chat/stream")
+async def assistant_ui_chat_stream(
+    request: Request,
+    user_data: dict = Depends(get_current_user_item),
+):
+    message, history = await _parse_chat_request(request)
+
+    async def events():
+        # Starlette cancels this generator when the client disconnects; the
+        # cancellation propagates into stream_agent, which closes the model stream.
+        try:
+            async for delta in stream_agent(
+                user_message=message,
+                history=history,
+                current_user=user_data,
+            ):
+                yield _sse({"delta": delta})
+        except Exception as e:
+            yield _sse({"detail": str(e)}, event="error")
+            return
+        yield _sse({}, event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 app.include_router(users_router)
 app.include_router(businesses_router)
 app.include_router(appointments_router)
 app.include_router(working_hours_router)
+app.include_router(availability_router)
 
 if __name__ == "__main__":
     import uvicorn
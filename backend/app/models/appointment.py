@@ -12,6 +12,18 @@ class AppointmentCreate(BaseModel):
     notes: Optional[str] = ""
 
 
+class AppointmentUpdate(BaseModel):
+    title: Optional[str] = None
+    email: Optional[EmailStr] = None
+    client_name: Optional[str] = None
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    location: Optional[str] = None
+    notes: Optional[str] = None
+    # When set, the update only applies if the stored version still matches.
+    version: Optional[int] = None
+
+
 class AppointmentOut(BaseModel):
     appointmentId: str
     businessId: str
@@ -26,7 +38,25 @@ class AppointmentOut(BaseModel):
     status: str
     createdAt: str
     updatedAt: str
+    version: int = 0
 
 
 class AppointmentList(BaseModel):
     items: List[AppointmentOut]
+    nextCursor: Optional[str] = None
+
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class AppointmentImportResult(BaseModel):
+    format: str
+    rows: int
+    imported: int
+    skipped: int
+    failed: int
+    errors: List[ImportRowError]
+    seconds: float
+    rowsPerSecond: float
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class TimeSlot(BaseModel):
+    start: str
+    end: str
+
+
+class Availability(BaseModel):
+    timezone: str
+    duration: int
+    slots: List[TimeSlot]
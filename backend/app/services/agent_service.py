@@ -1,28 +1,30 @@
-from datetime import datetime, timezone
-from boto3.dynamodb.conditions import Key, Attr
-from app.core.ddb import appointments_table
+from datetime import datetime, time, timedelta, timezone, tzinfo
+from typing import Optional
+from app.services.appointment_service import iter_appointments_between
 
-def today_bounds():
-    now = datetime.now(timezone.utc)
-    start = datetime(now.year, now.month, now.day, 0, 0, 0, tzinfo=timezone.utc)
-    end = datetime(now.year, now.month, now.day, 23, 59, 59, tzinfo=timezone.utc)
-    return start.isoformat(), end.isoformat()
+def today_bounds(zone: tzinfo = timezone.utc, now: Optional[datetime] = None):
+    # The local calendar day in `zone`, as UTC instants.
+    day = (now or datetime.now(timezone.utc)).astimezone(zone).date()
+    start = datetime.combine(day, time.min, tzinfo=zone).astimezone(timezone.utc)
+    end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=zone).astimezone(timezone.utc)
+    return day, start, end - timedelta(microseconds=1)
 
-def get_today_appointments(user_id: str, business_id: str):
-    start_iso, end_iso = today_bounds()
-    table = appointments_table()
-    
-    resp = table.scan(
-        FilterExpression=(
-            Attr("businessId").eq(business_id)
-            & Attr("userId").eq(user_id)
-            & Attr("startTime").between(start_iso, end_iso)
+def get_today_appointments(
+    user_id: str,
+    business_id: str,
+    zone: tzinfo = timezone.utc,
+    now: Optional[datetime] = None,
+):
+    day, start, end = today_bounds(zone, now)
+
+    items = [
+        item
+        for _, item in iter_appointments_between(
+            business_id, start, end, assumed_tz=zone, user_id=user_id
         )
-    )
-    
-    items = resp.get("Items", [])
+    ]
     return {
-        "date": start_iso[:10],
+        "date": day.isoformat(),
         "count": len(items),
         "appointments": items,
-    }
\ No newline at end of file
+    }
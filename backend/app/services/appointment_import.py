@@ -0,0 +1,449 @@
+"""
+Bulk appointment import from CSV or iCalendar uploads.
+
+The request body is parsed as it arrives: bytes are decoded incrementally and
+each parser hands back a record as soon as it is complete, so memory is
+bounded by the batches in flight rather than by the upload. Every row is
+validated with AppointmentCreate and built exactly as POST /appointments
+builds it, then written with BatchWriteItem in chunks of up to 25 requests
+(an appointment plus its slot claims), IMPORT_PARALLEL_BATCHES at a time.
+
+BatchWriteItem takes no conditions, so slot claims are checked before the
+write instead of by it: overlaps inside the upload are caught in memory, and
+claims already in the slots table with one BatchGetItem per chunk. A live
+booking that lands on the same slot between that read and the write is not
+detected; imports are meant for onboarding a business's existing bookings.
+"""
+import asyncio
+import codecs
+import csv
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from botocore.exceptions import BotoCoreError, ClientError
+from pydantic import ValidationError
+
+from app.core.config import IMPORT_MAX_ATTEMPTS, IMPORT_MAX_ROWS, IMPORT_PARALLEL_BATCHES
+from app.core.ddb import (
+    BATCH_WRITE_LIMIT,
+    appointments_table,
+    batch_get_keys,
+    batch_write,
+    run_ddb,
+    slots_table,
+)
+from app.models.appointment import AppointmentCreate
+from app.services.appointment_search import drop_search_index
+from app.services.appointment_service import build_appointment_item
+from app.services.appointment_versions import bump_appointments_version
+from app.services.email_queue import enqueue_appointment_emails
+from app.services.slot_service import claim_items, release_slots
+
+IMPORT_FORMATS = ("csv", "ics")
+NOTIFY_MODES = ("none", "queue")
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "text/calendar": "ics",
+}
+# Errors listed in the result; the failed count covers every row.
+MAX_REPORTED_ERRORS = 100
+# A quoted CSV field may span lines, but not without limit.
+MAX_RECORD_LINES = 200
+
+# Accepted CSV headers (lowercased, spaces and dashes as underscores) mapped
+# to AppointmentCreate fields.
+CSV_COLUMNS = {
+    "title": "title",
+    "subject": "title",
+    "client_name": "client_name",
+    "client": "client_name",
+    "name": "client_name",
+    "email": "email",
+    "client_email": "email",
+    "invitee_email": "email",
+    "start_time": "start_time",
+    "start": "start_time",
+    "end_time": "end_time",
+    "end": "end_time",
+    "location": "location",
+    "notes": "notes",
+    "description": "notes",
+}
+REQUIRED_COLUMNS = ("title", "client_name", "email", "start_time", "end_time")
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def import_format(content_type: str) -> Optional[str]:
+    return CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    try:
+        async for chunk in chunks:
+            lines = (tail + decoder.decode(chunk)).split("\n")
+            tail = lines.pop()
+            for line in lines:
+                yield line.rstrip("\r")
+        tail += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ImportFormatError("Upload is not valid UTF-8")
+    if tail:
+        yield tail.rstrip("\r")
+
+
+def _column(header: str) -> str:
+    return header.strip().lower().replace(" ", "_").replace("-", "_")
+
+
+class CsvRows:
+    def __init__(self):
+        self.columns: Optional[List[Optional[str]]] = None
+        self.pending: List[str] = []
+
+    def feed(self, line: str) -> Optional[Dict[str, str]]:
+        self.pending.append(line)
+        # An odd number of quotes so far means a quoted field continues on
+        # the next line ("" escapes count twice, so they keep the parity).
+        if sum(p.count('"') for p in self.pending) % 2:
+            if len(self.pending) > MAX_RECORD_LINES:
+                raise ImportFormatError("CSV has an unterminated quoted field")
+            return None
+        lines, self.pending = self.pending, []
+        values = next(csv.reader(line + "\n" for line in lines), [])
+        if not any(v.strip() for v in values):
+            return None
+        if self.columns is None:
+            self.columns = [CSV_COLUMNS.get(_column(v)) for v in values]
+            missing = [c for c in REQUIRED_COLUMNS if c not in self.columns]
+            if missing:
+                raise ImportFormatError(f"CSV is missing columns: {', '.join(missing)}")
+            return None
+        return {c: v.strip() for c, v in zip(self.columns, values) if c}
+
+    def finish(self) -> Optional[Dict[str, str]]:
+        if self.pending:
+            raise ImportFormatError("CSV has an unterminated quoted field")
+        if self.columns is None:
+            raise ImportFormatError("CSV has no header row")
+        return None
+
+
+def _split_property(line: str) -> Tuple[str, Dict[str, str], str]:
+    # NAME;PARAM=value;PARAM="quoted: value":VALUE
+    quoted = False
+    for i, ch in enumerate(line):
+        if ch == '"':
+            quoted = not quoted
+        elif ch == ":" and not quoted:
+            break
+    else:
+        return line.upper(), {}, ""
+    name, *params = line[:i].split(";")
+    parsed = {}
+    for p in params:
+        key, _, value = p.partition("=")
+        parsed[key.upper()] = value.strip('"')
+    return name.upper(), parsed, line[i + 1:]
+
+
+def _ics_text(value: str) -> str:
+    out = []
+    chars = iter(value)
+    for ch in chars:
+        if ch == "\\":
+            nxt = next(chars, "")
+            out.append("\n" if nxt in ("n", "N") else nxt)
+        else:
+            out.append(ch)
+    return "".join(out).strip()
+
+
+class IcsRows:
+    def __init__(self):
+        self.line: Optional[str] = None
+        self.event: Optional[Dict[str, Any]] = None
+        self.nested: List[str] = []
+
+    def feed(self, line: str) -> Optional[Dict[str, Any]]:
+        # Long lines are folded: a leading space or tab continues the previous one.
+        if line[:1] in (" ", "\t"):
+            if self.line is not None:
+                self.line += line[1:]
+            return None
+        prev, self.line = self.line, line
+        return self._property(prev) if prev else None
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        prev, self.line = self.line, None
+        row = self._property(prev) if prev else None
+        if self.event is not None:
+            raise ImportFormatError("Calendar ends inside an event")
+        return row
+
+    def _property(self, line: str) -> Optional[Dict[str, Any]]:
+        name, params, value = _split_property(line)
+        if name == "BEGIN":
+            if self.event is None and value.upper() == "VEVENT":
+                self.event = {}
+            elif self.event is not None:
+                self.nested.append(value.upper())
+            return None
+        if self.event is None:
+            return None
+        if name == "END":
+            if self.nested:
+                self.nested.pop()
+                return None
+            event, self.event = self.event, None
+            return event
+        # Properties of an alarm inside the event are not the event's own.
+        if not self.nested and name not in self.event:
+            self.event[name] = (params, value)
+        return None
+
+
+def _ics_datetime(params: Dict[str, str], value: str) -> str:
+    value = value.strip()
+    if params.get("VALUE", "").upper() == "DATE" or len(value) == 8:
+        d = datetime.strptime(value[:8], "%Y%m%d")
+    else:
+        d = datetime.strptime(value.rstrip("Zz"), "%Y%m%dT%H%M%S")
+        if value[-1:] in ("Z", "z"):
+            return d.strftime("%Y-%m-%dT%H:%M:%SZ")
+    if "TZID" in params:
+        try:
+            return d.replace(tzinfo=ZoneInfo(params["TZID"])).isoformat()
+        except (KeyError, ValueError):
+            raise ValueError(f"Unknown time zone '{params['TZID']}'")
+    # Floating time: read in the user's time zone, like any naive timestamp.
+    return d.isoformat()
+
+
+def _csv_payload(row: Dict[str, str]) -> Optional[AppointmentCreate]:
+    return AppointmentCreate(**row)
+
+
+def _ics_payload(event: Dict[str, Any]) -> Optional[AppointmentCreate]:
+    def text(name: str) -> str:
+        return _ics_text(event[name][1]) if name in event else ""
+
+    if text("STATUS").upper() == "CANCELLED":
+        return None
+    if "RRULE" in event:
+        raise ValueError("Recurring events are not supported")
+    for name in ("DTSTART", "DTEND"):
+        if name not in event:
+            raise ValueError(f"Event has no {name}")
+    params, attendee = event.get("ATTENDEE", ({}, ""))
+    email = attendee.split(":", 1)[1] if attendee.lower().startswith("mailto:") else attendee
+    try:
+        start = _ics_datetime(*event["DTSTART"])
+        end = _ics_datetime(*event["DTEND"])
+    except ValueError as e:
+        raise ValueError(f"Invalid event time: {e}")
+    return AppointmentCreate(
+        title=text("SUMMARY"),
+        client_name=params.get("CN", ""),
+        email=email.strip(),
+        start_time=start,
+        end_time=end,
+        location=text("LOCATION"),
+        notes=text("DESCRIPTION"),
+    )
+
+
+def _row_error(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" if err["loc"] else err["msg"]
+            for err in e.errors()
+        )
+    return str(e)
+
+
+def _write_chunk(rows: List[Tuple[int, Dict, List[Dict]]]) -> Tuple[List[Dict], List[Tuple[int, str]]]:
+    # rows are (row number, appointment, claims); returns the appointments
+    # written and (row number, error) for the rest.
+    failed: List[Tuple[int, str]] = []
+    try:
+        keys = [{"slotKey": c["slotKey"]} for _, _, claims in rows for c in claims]
+        taken = {
+            item["slotKey"]
+            for item in batch_get_keys(slots_table().name, keys, "slotKey", IMPORT_MAX_ATTEMPTS)
+        }
+    except (BotoCoreError, ClientError, RuntimeError) as e:
+        return [], [(n, f"Could not check slot claims: {e}") for n, _, _ in rows]
+
+    free = []
+    for n, item, claims in rows:
+        if any(c["slotKey"] in taken for c in claims):
+            failed.append((n, "The requested time overlaps an existing appointment"))
+        else:
+            free.append((n, item, claims))
+
+    appts, slots = appointments_table().name, slots_table().name
+    requests = [
+        (n, item["appointmentId"], table, entry)
+        for n, item, claims in free
+        for table, entry in [(slots, c) for c in claims] + [(appts, item)]
+    ]
+    broken: Dict[str, str] = {}
+    for i in range(0, len(requests), BATCH_WRITE_LIMIT):
+        batch = requests[i:i + BATCH_WRITE_LIMIT]
+        request_items: Dict[str, List[Dict]] = {}
+        for _, _, table, entry in batch:
+            request_items.setdefault(table, []).append({"PutRequest": {"Item": entry}})
+        try:
+            left = batch_write(request_items, IMPORT_MAX_ATTEMPTS)
+        except (BotoCoreError, ClientError) as e:
+            for _, appointment_id, _, _ in batch:
+                broken.setdefault(appointment_id, str(e))
+            continue
+        for entries in left.values():
+            for r in entries:
+                broken.setdefault(
+                    r["PutRequest"]["Item"]["appointmentId"],
+                    "DynamoDB throttled the write; retry this row",
+                )
+
+    written = []
+    for n, item, _ in free:
+        if item["appointmentId"] in broken:
+            failed.append((n, _rollback(item, broken[item["appointmentId"]])))
+        else:
+            written.append(item)
+    return written, failed
+
+
+def _rollback(item: Dict, error: str) -> str:
+    # A row's requests can span BatchWriteItem calls, so part of it may be
+    # saved. Claims left behind would block real bookings until TTL, and an
+    # appointment without its claims could be double-booked.
+    try:
+        release_slots(item["slotKeys"], item["appointmentId"])
+        appointments_table().delete_item(
+            Key={"businessId": item["businessId"], "appointmentId": item["appointmentId"]}
+        )
+    except (BotoCoreError, ClientError) as e:
+        print("Failed to undo partial import of", item["appointmentId"], repr(e))
+        return f"{error}; the partial write could not be undone ({item['appointmentId']})"
+    return error
+
+
+async def import_appointments(
+    user_item: Dict,
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    notify: str = "none",
+) -> Dict[str, Any]:
+    if fmt not in IMPORT_FORMATS:
+        raise ImportFormatError(f"Unsupported import format '{fmt}'")
+    if notify not in NOTIFY_MODES:
+        raise ValueError(f"notify must be one of: {', '.join(NOTIFY_MODES)}")
+    if not user_item.get("defaultBusinessId"):
+        raise ValueError("User has no default business")
+
+    started = time.monotonic()
+    parser = CsvRows() if fmt == "csv" else IcsRows()
+    to_payload = _csv_payload if fmt == "csv" else _ics_payload
+    result: Dict[str, Any] = {"format": fmt, "rows": 0, "imported": 0, "skipped": 0, "failed": 0, "errors": []}
+    claimed = set()
+    chunk: List[Tuple[int, Dict, List[Dict]]] = []
+    chunk_size = 0
+    in_flight = asyncio.Semaphore(IMPORT_PARALLEL_BATCHES)
+    tasks = set()
+
+    def fail(row: int, error: str) -> None:
+        result["failed"] += 1
+        if len(result["errors"]) < MAX_REPORTED_ERRORS:
+            result["errors"].append({"row": row, "error": error})
+
+    async def write(rows):
+        try:
+            written, failed = await run_ddb(_write_chunk, rows)
+        finally:
+            in_flight.release()
+        result["imported"] += len(written)
+        for n, error in failed:
+            fail(n, error)
+        if notify == "queue":
+            try:
+                enqueue_appointment_emails(written)
+            except Exception as e:
+                print("Failed to queue appointment emails:", repr(e))
+
+    async def flush():
+        nonlocal chunk, chunk_size
+        if not chunk:
+            return
+        rows, chunk, chunk_size = chunk, [], 0
+        await in_flight.acquire()
+        task = asyncio.create_task(write(rows))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def add(raw: Dict[str, Any]):
+        nonlocal chunk_size
+        result["rows"] += 1
+        n = result["rows"]
+        try:
+            payload = to_payload(raw)
+            if payload is None:
+                result["skipped"] += 1
+                return
+            item, end_utc = build_appointment_item(user_item, payload)
+        except (ValidationError, ValueError) as e:
+            fail(n, _row_error(e))
+            return
+        keys = item["slotKeys"]
+        if claimed.intersection(keys):
+            fail(n, "Overlaps an earlier row in this import")
+            return
+        claimed.update(keys)
+        # Keep an appointment and its claims in one BatchWriteItem when they fit.
+        size = 1 + len(keys)
+        if chunk_size + size > BATCH_WRITE_LIMIT:
+            await flush()
+        chunk.append((n, item, claim_items(keys, item, end_utc)))
+        chunk_size += size
+
+    try:
+        async for line in iter_lines(chunks):
+            raw = parser.feed(line)
+            if raw is None:
+                continue
+            if result["rows"] >= IMPORT_MAX_ROWS:
+                fail(result["rows"] + 1, f"Imports are limited to {IMPORT_MAX_ROWS} rows; the rest was not read")
+                break
+            await add(raw)
+        else:
+            raw = parser.finish()
+            if raw is not None:
+                await add(raw)
+    except ImportFormatError as e:
+        # A bad header or encoding rejects the upload; later it ends the
+        # import and the rows before it stand.
+        if result["rows"] == 0:
+            raise
+        fail(result["rows"] + 1, str(e))
+    await flush()
+    if tasks:
+        await asyncio.gather(*tasks)
+
+    business_id = user_item["defaultBusinessId"]
+    if result["imported"]:
+        bump_appointments_version(business_id)
+        drop_search_index(business_id)
+
+    seconds = time.monotonic() - started
+    result["seconds"] = round(seconds, 3)
+    result["rowsPerSecond"] = round(result["rows"] / seconds, 1) if seconds > 0 else 0.0
+    return result
@@ -0,0 +1,196 @@
+"""
+In-process search over a business's appointments by client name, title and
+invitee email.
+
+Each business gets an inverted index built from one partition query: a sorted
+vocabulary of casefolded word tokens and, per token, a posting list of
+appointments ordered by startTime. A query matches when every query word is a
+prefix of some token of the appointment. Bisecting the vocabulary expands each
+word to its tokens; the word with the fewest postings drives a newest-first
+merge of its posting lists, and the scan stops once `limit` appointments also
+match the other words.
+
+Indexes live in a bounded TTLCache. Writes in this process update a cached
+index in place (index_appointment); the TTL bounds staleness from writes
+handled by other workers.
+"""
+import os
+import re
+import threading
+from bisect import bisect_left, insort
+from heapq import merge, nlargest
+from typing import Dict, List, Set, Tuple
+
+from boto3.dynamodb.conditions import Key
+
+from app.core.cache import TTLCache
+from app.core.ddb import appointments_table, query_all
+
+SEARCH_FIELDS = ("clientName", "title", "inviteeEmail")
+SEARCH_INDEX_TTL_SECONDS = float(os.getenv("SEARCH_INDEX_TTL_SECONDS", "300"))
+SEARCH_INDEX_MAX_BUSINESSES = int(os.getenv("SEARCH_INDEX_MAX_BUSINESSES", "256"))
+
+SHORT_PREFIX_LEN = 2
+
+_WORD_RE = re.compile(r"\w+")
+# Sorts after any character a token can contain.
+_PREFIX_END = "\U0010ffff"
+
+
+def tokenize(text: str) -> Set[str]:
+    return set(_WORD_RE.findall(text.casefold()))
+
+
+def _posting_entry(item: Dict) -> Tuple[str, str]:
+    # Postings are kept in startTime order so results come back newest first.
+    return (item.get("startTime") or "", item["appointmentId"])
+
+
+def _item_tokens(item: Dict) -> Set[str]:
+    tokens: Set[str] = set()
+    for field in SEARCH_FIELDS:
+        tokens |= tokenize(item.get(field) or "")
+    return tokens
+
+
+def _short_prefixes(tokens: Set[str]) -> Set[str]:
+    return {t[:n] for t in tokens for n in range(1, SHORT_PREFIX_LEN + 1) if len(t) >= n}
+
+
+def _add(postings: Dict[str, List[Tuple[str, str]]], key: str, entry: Tuple[str, str]) -> bool:
+    """Insert entry into key's posting list; True when the key is new."""
+    lst = postings.get(key)
+    if lst is None:
+        postings[key] = [entry]
+        return True
+    insort(lst, entry)
+    return False
+
+
+def _discard(postings: Dict[str, List[Tuple[str, str]]], key: str, entry: Tuple[str, str]) -> bool:
+    """Remove entry from key's posting list; True when the key is now gone."""
+    lst = postings[key]
+    del lst[bisect_left(lst, entry)]
+    if lst:
+        return False
+    del postings[key]
+    return True
+
+
+class AppointmentSearchIndex:
+    def __init__(self, items: List[Dict]):
+        self._lock = threading.Lock()
+        self._docs: Dict[str, Tuple[Set[str], Tuple[str, str], Dict]] = {}
+        # token -> entries, and 1-2 character prefix -> entries. Short query
+        # words expand to thousands of tokens; their merged list is kept ready.
+        self._postings: Dict[str, List[Tuple[str, str]]] = {}
+        self._short: Dict[str, List[Tuple[str, str]]] = {}
+        for item in items:
+            entry = _posting_entry(item)
+            tokens = _item_tokens(item)
+            self._docs[item["appointmentId"]] = (tokens, entry, item)
+            for token in tokens:
+                self._postings.setdefault(token, []).append(entry)
+            for prefix in _short_prefixes(tokens):
+                self._short.setdefault(prefix, []).append(entry)
+        for postings in (*self._postings.values(), *self._short.values()):
+            postings.sort()
+        self._vocab = sorted(self._postings)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _remove(self, appointment_id: str) -> None:
+        doc = self._docs.pop(appointment_id, None)
+        if doc is None:
+            return
+        tokens, entry, _ = doc
+        for token in tokens:
+            if _discard(self._postings, token, entry):
+                del self._vocab[bisect_left(self._vocab, token)]
+        for prefix in _short_prefixes(tokens):
+            _discard(self._short, prefix, entry)
+
+    def upsert(self, item: Dict) -> None:
+        entry = _posting_entry(item)
+        tokens = _item_tokens(item)
+        with self._lock:
+            self._remove(item["appointmentId"])
+            self._docs[item["appointmentId"]] = (tokens, entry, item)
+            for token in tokens:
+                if _add(self._postings, token, entry):
+                    insort(self._vocab, token)
+            for prefix in _short_prefixes(tokens):
+                _add(self._short, prefix, entry)
+
+    def _word_postings(self, word: str) -> List[List[Tuple[str, str]]]:
+        if len(word) <= SHORT_PREFIX_LEN:
+            return [self._short[word]] if word in self._short else []
+        lo = bisect_left(self._vocab, word)
+        hi = bisect_left(self._vocab, word + _PREFIX_END, lo)
+        return [self._postings[t] for t in self._vocab[lo:hi]]
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        words = tokenize(query)
+        if not words:
+            return []
+        with self._lock:
+            expanded = {w: self._word_postings(w) for w in words}
+            # Drive the scan from the word with the fewest postings; the rest
+            # are checked against each candidate's own tokens.
+            driver = min(words, key=lambda w: sum(len(p) for p in expanded[w]))
+            rest = [w for w in words if w != driver]
+            if not rest:
+                # Only each posting list's newest `limit` entries can make the cut.
+                entries = {e for p in expanded[driver] for e in p[-limit:]}
+                return [self._docs[a][2] for _, a in nlargest(limit, entries)]
+            stream = merge(*(reversed(p) for p in expanded[driver]), reverse=True)
+            seen: Set[str] = set()
+            found: List[Dict] = []
+            for _, appointment_id in stream:
+                if appointment_id in seen:
+                    continue
+                seen.add(appointment_id)
+                tokens, _, item = self._docs[appointment_id]
+                if all(any(t.startswith(w) for t in tokens) for w in rest):
+                    found.append(item)
+                    if len(found) >= limit:
+                        break
+        return found
+
+
+_indexes = TTLCache(maxsize=SEARCH_INDEX_MAX_BUSINESSES, ttl=SEARCH_INDEX_TTL_SECONDS)
+
+
+def build_search_index(business_id: str) -> AppointmentSearchIndex:
+    items = query_all(
+        appointments_table(),
+        KeyConditionExpression=Key("businessId").eq(business_id),
+    )
+    return AppointmentSearchIndex(list(items))
+
+
+def get_search_index(business_id: str) -> AppointmentSearchIndex:
+    index = _indexes.get(business_id)
+    if index is None:
+        index = build_search_index(business_id)
+        _indexes.set(business_id, index)
+    return index
+
+
+def search_appointments(business_id: str, query: str, limit: int = 20) -> List[Dict]:
+    if not tokenize(query):
+        return []
+    return get_search_index(business_id).search(query, limit)
+
+
+def index_appointment(item: Dict) -> None:
+    # Only indexes already built need updating; the next build reads the write.
+    index = _indexes.get(item["businessId"])
+    if index is not None:
+        index.upsert(item)
+
+
+def drop_search_index(business_id: str) -> None:
+    # For bulk writes: one rebuild on the next search beats upserting each item.
+    _indexes.pop(business_id)
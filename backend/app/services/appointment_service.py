@@ -1,19 +1,115 @@
 from uuid import uuid4
-from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
 
-from app.core.ddb import appointments_table
-from app.models.appointment import AppointmentCreate
-from app.services.notification_service import send_appointment_email
+from app.core.config import DDB_APPTS_START_INDEX, REMINDER_LEAD_HOURS
+from app.core.ddb import appointments_table, cancellation_codes, query_all, transact_write
+from app.models.appointment import AppointmentCreate, AppointmentUpdate
+from app.services.appointment_search import index_appointment
+from app.services.appointment_versions import bump_appointments_version, version_bump_action
+from app.services.email_queue import enqueue_appointment_email
+from app.services.slot_service import (
+    BookingConflictError,
+    InvalidBookingError,
+    claim_actions,
+    is_slot_conflict,
+    release_actions,
+    release_slots,
+    slot_keys,
+)
+from app.services.working_hours_service import user_timezone
+
+
+# Stored startTime values are ISO strings that may be naive (local wall clock),
+# "Z"-suffixed or carry an offset. Range keys on the startTime index are
+# widened by the largest possible UTC offset and then filtered exactly.
+_MAX_UTC_OFFSET = timedelta(hours=14)
+
+# Pending reminders are indexed by the UTC hour they fall due in. The index is
+# sparse: the bucket attribute is removed once the reminder has been sent.
+REMINDER_BUCKET_FORMAT = "%Y-%m-%dT%H"
+REMINDER_AT_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# AppointmentUpdate field -> item attribute
+UPDATE_FIELDS = {
+    "title": "title",
+    "client_name": "clientName",
+    "email": "inviteeEmail",
+    "start_time": "startTime",
+    "end_time": "endTime",
+    "location": "location",
+    "notes": "notes",
+}
+
+_deserializer = TypeDeserializer()
+
+
+class AppointmentNotFoundError(ValueError):
+    pass
+
+
+class InvalidRsvpTokenError(ValueError):
+    pass
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+class StaleAppointmentError(ValueError):
+    """The appointment changed since the caller read it (version mismatch)."""
 
 
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def create_appointment(user_item: Dict, payload: AppointmentCreate) -> Dict:
+def parse_dt_utc(s: str, assumed_tz: tzinfo = timezone.utc) -> datetime:
+    ss = s.strip()
+    if ss.endswith("Z"):
+        ss = ss[:-1] + "+00:00"
+    d = datetime.fromisoformat(ss)
+    if d.tzinfo is None:
+        d = d.replace(tzinfo=assumed_tz)
+    return d.astimezone(timezone.utc)
+
+
+def reminder_bucket(d: datetime) -> str:
+    return d.astimezone(timezone.utc).strftime(REMINDER_BUCKET_FORMAT)
+
+
+def reminder_stamp(d: datetime) -> str:
+    return d.astimezone(timezone.utc).strftime(REMINDER_AT_FORMAT)
+
+
+def reminder_fields(
+    start_time: str,
+    assumed_tz: tzinfo = timezone.utc,
+    now: Optional[datetime] = None,
+) -> Dict[str, str]:
+    try:
+        start = parse_dt_utc(start_time, assumed_tz)
+    except ValueError:
+        return {}
+    due = start - timedelta(hours=REMINDER_LEAD_HOURS)
+    if due <= (now or datetime.now(timezone.utc)):
+        return {}
+    return {"reminderAt": reminder_stamp(due), "reminderBucket": reminder_bucket(due)}
+
+
+def _booking_range(start_time: str, end_time: str, assumed_tz: tzinfo) -> Tuple[datetime, datetime]:
+    try:
+        return parse_dt_utc(start_time, assumed_tz), parse_dt_utc(end_time, assumed_tz)
+    except ValueError:
+        raise InvalidBookingError("Start and end times must be ISO datetimes")
+
+
+def build_appointment_item(user_item: Dict, payload: AppointmentCreate) -> Tuple[Dict, datetime]:
+    # Returns the item and its UTC end, which dates the slot claims' expiry.
     if not user_item.get("defaultBusinessId"):
         raise ValueError("User has no default business")
 
@@ -34,26 +130,175 @@ def create_appointment(user_item: Dict, payload: AppointmentCreate) -> Dict:
         "notes": (payload.notes or "").strip(),
         "status": "pending",
         "rsvpToken": str(uuid4()),
+        "version": 1,
         "createdAt": t,
         "updatedAt": t,
     }
+    zone = user_timezone(user_item)
+    start_utc, end_utc = _booking_range(payload.start_time, payload.end_time, zone)
+    item["slotKeys"] = slot_keys(item["userId"], start_utc, end_utc)
+    item.update(reminder_fields(payload.start_time, zone))
+    return item, end_utc
+
 
-    appointments_table().put_item(Item=item)
+def create_appointment(user_item: Dict, payload: AppointmentCreate) -> Dict:
+    item, end_utc = build_appointment_item(user_item, payload)
+    keys = item["slotKeys"]
 
     try:
-        send_appointment_email(item)
+        transact_write([
+            {"Put": {"TableName": appointments_table().name, "Item": item}},
+            *claim_actions(keys, item, end_utc),
+            version_bump_action(item["businessId"]),
+        ])
+    except ClientError as e:
+        if is_slot_conflict(e, range(1, len(keys) + 1)):
+            raise BookingConflictError("The requested time overlaps an existing appointment")
+        raise
+    index_appointment(item)
+    _queue_email(item, "confirmation")
+    return item
+
+
+def _queue_email(item: Dict, template: str) -> None:
+    # The write has happened; a queueing failure must not fail the request.
+    try:
+        enqueue_appointment_email(item, template)
     except Exception as e:
-        print("Failed to send appointment email:", repr(e))
+        print("Failed to queue appointment email:", repr(e))
 
-    return item
+
+def _index_bound(d: datetime) -> str:
+    return d.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M")
+
+
+def _start_time_condition(
+    business_id: str,
+    start_utc: Optional[datetime],
+    end_utc: Optional[datetime],
+):
+    cond = Key("businessId").eq(business_id)
+    lo = _index_bound(start_utc - _MAX_UTC_OFFSET) if start_utc else None
+    hi = _index_bound(end_utc + _MAX_UTC_OFFSET) + "~" if end_utc else None
+    if lo and hi:
+        return cond & Key("startTime").between(lo, hi)
+    if lo:
+        return cond & Key("startTime").gte(lo)
+    return cond & Key("startTime").lte(hi)
+
+
+def _in_window(
+    item: Dict,
+    start_utc: Optional[datetime],
+    end_utc: Optional[datetime],
+    assumed_tz: tzinfo,
+) -> bool:
+    try:
+        d = parse_dt_utc(item["startTime"], assumed_tz)
+    except (KeyError, ValueError):
+        return False
+    return (start_utc is None or d >= start_utc) and (end_utc is None or d <= end_utc)
+
+
+def check_start_key(
+    business_id: str,
+    start_key: Dict,
+    bounded: bool,
+) -> None:
+    # A cursor is a LastEvaluatedKey we handed out: exactly the table key,
+    # plus startTime when it came from the start-time index. Anything else
+    # (another business's key, a cursor from the other listing) is rejected
+    # here rather than by DynamoDB.
+    expected = {"businessId", "appointmentId"} | ({"startTime"} if bounded else set())
+    if (
+        set(start_key) != expected
+        or not all(isinstance(v, str) and v for v in start_key.values())
+        or start_key["businessId"] != business_id
+    ):
+        raise InvalidCursorError("Invalid cursor")
+
+
+def query_appointments_page(
+    business_id: str,
+    limit: Optional[int] = None,
+    start_key: Optional[Dict] = None,
+    start_utc: Optional[datetime] = None,
+    end_utc: Optional[datetime] = None,
+    assumed_tz: tzinfo = timezone.utc,
+) -> Tuple[List[Dict], Optional[Dict]]:
+    # With a limit the page is topped up past rows the window filter drops,
+    # so it is short only at the end. A returned key means DynamoDB stopped
+    # early, not that rows remain: the page it leads to may be empty.
+    bounded = start_utc is not None or end_utc is not None
+    if bounded:
+        kwargs = {
+            "IndexName": DDB_APPTS_START_INDEX,
+            "KeyConditionExpression": _start_time_condition(business_id, start_utc, end_utc),
+        }
+    else:
+        kwargs = {"KeyConditionExpression": Key("businessId").eq(business_id)}
+    if start_key:
+        check_start_key(business_id, start_key, bounded)
+
+    items: List[Dict] = []
+    while True:
+        if limit:
+            kwargs["Limit"] = limit - len(items)
+        if start_key:
+            kwargs["ExclusiveStartKey"] = start_key
+
+        resp = appointments_table().query(**kwargs)
+        page = resp.get("Items", [])
+        if bounded:
+            page = [i for i in page if _in_window(i, start_utc, end_utc, assumed_tz)]
+        items.extend(page)
+        start_key = resp.get("LastEvaluatedKey")
+        if not start_key or not limit or len(items) >= limit:
+            return items, start_key
+
+
+def iter_appointment_pages(
+    business_id: str,
+    page_size: Optional[int] = None,
+    start_key: Optional[Dict] = None,
+    start_utc: Optional[datetime] = None,
+    end_utc: Optional[datetime] = None,
+    assumed_tz: tzinfo = timezone.utc,
+) -> Iterator[List[Dict]]:
+    while True:
+        items, start_key = query_appointments_page(
+            business_id, page_size, start_key, start_utc, end_utc, assumed_tz
+        )
+        yield items
+        if not start_key:
+            return
 
 
 def list_appointments_for_business(business_id: str) -> List[Dict]:
-    table = appointments_table()
-    resp = table.query(
-        KeyConditionExpression=Key("businessId").eq(business_id)
-    )
-    return resp.get("Items", [])
+    return [item for page in iter_appointment_pages(business_id) for item in page]
+
+
+def iter_appointments_between(
+    business_id: str,
+    start_utc: datetime,
+    end_utc: datetime,
+    assumed_tz: tzinfo = timezone.utc,
+    user_id: Optional[str] = None,
+) -> Iterator[Tuple[datetime, Dict]]:
+    kwargs = {
+        "IndexName": DDB_APPTS_START_INDEX,
+        "KeyConditionExpression": _start_time_condition(business_id, start_utc, end_utc),
+    }
+    if user_id:
+        kwargs["FilterExpression"] = Attr("userId").eq(user_id)
+
+    for item in query_all(appointments_table(), **kwargs):
+        try:
+            d = parse_dt_utc(item["startTime"], assumed_tz)
+        except (KeyError, ValueError):
+            continue
+        if start_utc <= d <= end_utc:
+            yield d, item
 
 
 def get_appointment_by_id(business_id: str, appointment_id: str) -> Optional[Dict]:
@@ -64,13 +309,237 @@ def get_appointment_by_id(business_id: str, appointment_id: str) -> Optional[Dic
     return resp.get("Item")
 
 
-def update_appointment_status(business_id: str, appointment_id: str, status: str) -> Optional[Dict]:
-    table = appointments_table()
-    t = now_iso()
-    table.update_item(
-        Key={"businessId": business_id, "appointmentId": appointment_id},
-        UpdateExpression="SET #s = :s, updatedAt = :u",
-        ExpressionAttributeNames={"#s": "status"},
-        ExpressionAttributeValues={":s": status, ":u": t},
+def _failed_item(e: ClientError) -> Optional[Dict]:
+    # Present when the write used ReturnValuesOnConditionCheckFailure=ALL_OLD
+    # and the item exists, so a failed condition needs no follow-up read.
+    raw = e.response.get("Item")
+    if not raw:
+        return None
+    return {k: _deserializer.deserialize(v) for k, v in raw.items()}
+
+
+def _version_condition(expected_version: int, values: Dict[str, Any]) -> str:
+    # Items written before versioning count as version 0.
+    if expected_version == 0:
+        return "attribute_not_exists(version)"
+    values[":v"] = expected_version
+    return "version = :v"
+
+
+def update_appointment_status(
+    business_id: str,
+    appointment_id: str,
+    status: str,
+    rsvp_token: Optional[str] = None,
+    expected_version: Optional[int] = None,
+) -> Dict:
+    values: Dict[str, Any] = {":s": status, ":u": now_iso(), ":zero": 0, ":one": 1}
+    conditions = ["attribute_exists(appointmentId)"]
+    if rsvp_token is not None:
+        # A declined appointment has released its slots; its link is spent.
+        conditions.append("rsvpToken = :t AND #s <> :cancelled")
+        values[":t"] = rsvp_token
+        values[":cancelled"] = "cancelled"
+    if expected_version is not None:
+        conditions.append(_version_condition(expected_version, values))
+
+    try:
+        resp = appointments_table().update_item(
+            Key={"businessId": business_id, "appointmentId": appointment_id},
+            UpdateExpression="SET #s = :s, updatedAt = :u, version = if_not_exists(version, :zero) + :one",
+            ConditionExpression=" AND ".join(conditions),
+            ExpressionAttributeNames={"#s": "status"},
+            ExpressionAttributeValues=values,
+            ReturnValues="ALL_NEW",
+            ReturnValuesOnConditionCheckFailure="ALL_OLD",
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        old = _failed_item(e)
+        if old is None:
+            raise AppointmentNotFoundError("Appointment not found")
+        if rsvp_token is not None and old.get("rsvpToken") != rsvp_token:
+            raise InvalidRsvpTokenError("Invalid RSVP token")
+        if rsvp_token is not None and old.get("status") == "cancelled":
+            raise StaleAppointmentError("This appointment has already been cancelled")
+        raise StaleAppointmentError("The appointment was changed by another request")
+
+    item = resp["Attributes"]
+    if status == "cancelled":
+        # slotKeys stays on the item; releases only delete claims it still owns.
+        release_slots(item.get("slotKeys") or [], appointment_id)
+    bump_appointments_version(business_id)
+    index_appointment(item)
+    if status == "cancelled":
+        _queue_email(item, "cancellation")
+    return item
+
+
+def _update_fields(
+    business_id: str,
+    appointment_id: str,
+    changes: Dict[str, Any],
+    expected_version: Optional[int],
+) -> Optional[Dict]:
+    names: Dict[str, str] = {}
+    values: Dict[str, Any] = {":u": now_iso(), ":zero": 0, ":one": 1}
+    sets = ["updatedAt = :u", "version = if_not_exists(version, :zero) + :one"]
+    for i, (attr, value) in enumerate(sorted(changes.items())):
+        names[f"#f{i}"] = attr
+        values[f":f{i}"] = value
+        sets.append(f"#f{i} = :f{i}")
+    conditions = ["attribute_exists(appointmentId)"]
+    if expected_version is not None:
+        conditions.append(_version_condition(expected_version, values))
+
+    try:
+        resp = appointments_table().update_item(
+            Key={"businessId": business_id, "appointmentId": appointment_id},
+            UpdateExpression="SET " + ", ".join(sets),
+            ConditionExpression=" AND ".join(conditions),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+            ReturnValues="ALL_NEW",
+            ReturnValuesOnConditionCheckFailure="ALL_OLD",
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        if _failed_item(e) is None:
+            return None
+        raise StaleAppointmentError("The appointment was changed by another request")
+    return resp["Attributes"]
+
+
+def _move_appointment(
+    business_id: str,
+    appointment_id: str,
+    changes: Dict[str, Any],
+    assumed_tz: tzinfo,
+    expected_version: Optional[int],
+) -> Optional[Dict]:
+    # Moving the slot claims needs the current item; the write itself is one
+    # transaction guarded on the version that was read.
+    current = get_appointment_by_id(business_id, appointment_id)
+    if not current:
+        return None
+    version = int(current.get("version", 0))
+    if expected_version is not None and expected_version != version:
+        raise StaleAppointmentError("The appointment was changed by another request")
+
+    item = {**current, **changes}
+    start_utc, end_utc = _booking_range(item["startTime"], item["endTime"], assumed_tz)
+    if (current.get("status") or "").lower() == "cancelled":
+        # Cancelling released these claims; the keys left on the item may
+        # belong to other bookings by now.
+        old_keys: List[str] = []
+        new_keys: List[str] = []
+    else:
+        old_keys = current.get("slotKeys") or []
+        new_keys = slot_keys(current["userId"], start_utc, end_utc)
+    claim = [k for k in new_keys if k not in old_keys]
+    release = [k for k in old_keys if k not in new_keys]
+
+    item.update(updatedAt=now_iso(), slotKeys=new_keys, version=version + 1)
+    item.pop("reminderAt", None)
+    item.pop("reminderBucket", None)
+    reminder = reminder_fields(item["startTime"], assumed_tz)
+    item.update(reminder)
+
+    names: Dict[str, str] = {}
+    values: Dict[str, Any] = {}
+    sets = []
+    for i, attr in enumerate(sorted({*changes, "updatedAt", "slotKeys", "version", *reminder})):
+        names[f"#f{i}"] = attr
+        values[f":f{i}"] = item[attr]
+        sets.append(f"#f{i} = :f{i}")
+    update = "SET " + ", ".join(sets)
+    if not reminder:
+        update += " REMOVE reminderAt, reminderBucket"
+
+    try:
+        transact_write([
+            {"Update": {
+                "TableName": appointments_table().name,
+                "Key": {"businessId": business_id, "appointmentId": appointment_id},
+                "UpdateExpression": update,
+                "ConditionExpression": _version_condition(version, values),
+                "ExpressionAttributeNames": names,
+                "ExpressionAttributeValues": values,
+            }},
+            *claim_actions(claim, current, end_utc),
+            *release_actions(release, appointment_id),
+            version_bump_action(business_id),
+        ])
+    except ClientError as e:
+        codes = cancellation_codes(e)
+        if codes and codes[0] == "ConditionalCheckFailed":
+            raise StaleAppointmentError("The appointment was changed by another request")
+        if is_slot_conflict(e, range(1, len(claim) + 1)):
+            raise BookingConflictError("The requested time overlaps an existing appointment")
+        raise
+
+    moved = (item["startTime"], item["endTime"]) != (current["startTime"], current["endTime"])
+    if moved and (current.get("status") or "").lower() != "cancelled":
+        _queue_email(item, "reschedule")
+    return item
+
+
+def _apply_update(
+    business_id: str,
+    appointment_id: str,
+    changes: Dict[str, Any],
+    assumed_tz: tzinfo = timezone.utc,
+    expected_version: Optional[int] = None,
+) -> Optional[Dict]:
+    if "startTime" in changes or "endTime" in changes:
+        item = _move_appointment(business_id, appointment_id, changes, assumed_tz, expected_version)
+    else:
+        item = _update_fields(business_id, appointment_id, changes, expected_version)
+        if item is not None:
+            # A single UpdateItem returns the new item, which a transaction
+            # cannot; the stamp follows the write instead of joining it.
+            bump_appointments_version(business_id)
+    if item is None:
+        return None
+    index_appointment(item)
+    return item
+
+
+def update_appointment(
+    user_item: Dict,
+    appointment_id: str,
+    payload: AppointmentUpdate,
+) -> Optional[Dict]:
+    if not user_item.get("defaultBusinessId"):
+        raise ValueError("User has no default business")
+    changes = {
+        UPDATE_FIELDS[field]: value.strip() if isinstance(value, str) else value
+        for field, value in payload.model_dump(exclude_unset=True, exclude={"version"}).items()
+        if value is not None
+    }
+    if not changes:
+        raise ValueError("No changes to apply")
+    return _apply_update(
+        user_item["defaultBusinessId"],
+        appointment_id,
+        changes,
+        user_timezone(user_item),
+        payload.version,
+    )
+
+
+def reschedule_appointment(
+    business_id: str,
+    appointment_id: str,
+    start_time: str,
+    end_time: str,
+    assumed_tz: tzinfo = timezone.utc,
+) -> Optional[Dict]:
+    return _apply_update(
+        business_id,
+        appointment_id,
+        {"startTime": start_time, "endTime": end_time},
+        assumed_tz,
     )
-    return get_appointment_by_id(business_id, appointment_id)
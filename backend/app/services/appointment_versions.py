@@ -0,0 +1,38 @@
+from typing import Dict
+
+from app.core.ddb import businesses_table
+
+# Per-business counter on the business item, bumped by every appointment
+# write: inside the write's transaction where it is one, otherwise right
+# after the write. Caches derived from a business's appointments include the
+# stamp in their keys, so a write from any process makes older entries
+# unreachable without tracking them.
+VERSION_ATTR = "appointmentsVersion"
+
+
+def appointments_version(business_id: str) -> int:
+    if not business_id:
+        return 0
+    item = businesses_table().get_item(
+        Key={"businessId": business_id},
+        ProjectionExpression=VERSION_ATTR,
+        ConsistentRead=True,
+    ).get("Item") or {}
+    return int(item.get(VERSION_ATTR, 0))
+
+
+def version_bump_action(business_id: str) -> Dict:
+    return {"Update": {
+        "TableName": businesses_table().name,
+        "Key": {"businessId": business_id},
+        "UpdateExpression": f"ADD {VERSION_ATTR} :one",
+        "ExpressionAttributeValues": {":one": 1},
+    }}
+
+
+def bump_appointments_version(business_id: str) -> None:
+    businesses_table().update_item(
+        Key={"businessId": business_id},
+        UpdateExpression=f"ADD {VERSION_ATTR} :one",
+        ExpressionAttributeValues={":one": 1},
+    )
@@ -1,46 +1,75 @@
-from datetime import datetime, time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
 from app.services.agent_service import get_today_appointments
-from app.services.agent_service import list_appointments_for_user
-from app.services.agent_service import update_appointment
-from app.services.agent_service import search_appointments_by_client_name
+from app.services.appointment_service import (
+    iter_appointments_between,
+    reschedule_appointment,
+)
+from app.services.appointment_search import search_appointments
+from app.services.working_hours_service import user_timezone
 
-# Tool 1
-def tool_get_appointments_between_times(user_id, business_id, start_time, end_time):
-    all_today = get_today_appointments(user_id, business_id)["appointments"]
-    start = datetime.strptime(start_time, "%H:%M").time()
-    end = datetime.strptime(end_time, "%H:%M").time()
 
-    filtered = []
-    for appt in all_today:
-        appt_time = datetime.fromisoformat(appt["startTime"]).time()
-        if start <= appt_time <= end:
-            filtered.append(appt)
+def _business_id(current_user: Dict[str, Any]) -> str:
+    business_id = current_user.get("defaultBusinessId")
+    if not business_id:
+        raise ValueError("User has no default business configured")
+    return business_id
+
 
-    return filtered
+# Tool 1
+def tool_get_today_appointments(current_user: Dict[str, Any]) -> Dict[str, Any]:
+    return get_today_appointments(
+        user_id=current_user["userId"],
+        business_id=_business_id(current_user),
+        zone=user_timezone(current_user),
+    )
 
 
 # Tool 2
-def tool_get_appointment_by_time(user_id, business_id, target_time):
-    all_today = get_today_appointments(user_id, business_id)["appointments"]
-    t = datetime.strptime(target_time, "%H:%M").time()
-    for appt in all_today:
-        appt_time = datetime.fromisoformat(appt["startTime"]).time()
-        if appt_time == t:
-            return appt
-    return None
+def tool_get_appointments_between_times(
+    current_user: Dict[str, Any],
+    start_time: str,
+    end_time: str,
+    date: Optional[str] = None,
+) -> List[Dict]:
+    zone = user_timezone(current_user)
+    day = datetime.fromisoformat(date).date() if date else datetime.now(zone).date()
+    start = datetime.strptime(start_time, "%H:%M").time()
+    end = datetime.strptime(end_time, "%H:%M").time()
 
+    start_utc = datetime.combine(day, start, tzinfo=zone).astimezone(timezone.utc)
+    end_utc = datetime.combine(day, end, tzinfo=zone).astimezone(timezone.utc)
+    if end_utc < start_utc:
+        end_utc += timedelta(days=1)
 
-# Tool 3
-def tool_reschedule_appointment(appointment_id, new_datetime):
-    return update_appointment(appointment_id, new_datetime)
+    return [
+        item
+        for _, item in iter_appointments_between(
+            _business_id(current_user), start_utc, end_utc, assumed_tz=zone
+        )
+    ]
 
 
-# Tool 4
-def tool_search_appointments_by_name(user_id, business_id, name):
-    return search_appointments_by_client_name(user_id, business_id, name)
+# Tool 3
+def tool_reschedule_appointment(
+    current_user: Dict[str, Any],
+    appointment_id: str,
+    start_time: str,
+    end_time: str,
+) -> Dict[str, Any]:
+    item = reschedule_appointment(
+        _business_id(current_user),
+        appointment_id,
+        start_time,
+        end_time,
+        user_timezone(current_user),
+    )
+    if not item:
+        return {"error": "Appointment not found"}
+    return item
 
 
-# Tool 5
-def tool_send_email_confirmation(to_email, subject, body):
-    # You can plug in SES, MailJet, SendGrid, etc.
-    return {"status": "sent", "to": to_email}
+# Tool 4
+def tool_search_appointments_by_name(current_user: Dict[str, Any], name: str) -> List[Dict]:
+    return search_appointments(_business_id(current_user), name)
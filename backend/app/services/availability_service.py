@@ -0,0 +1,169 @@
+"""
+Bookable time from a user's WorkingHours minus their existing appointments.
+
+Weekly rules and date overrides are expanded day by day as wall-clock times
+in the user's timezone, so DST changes shift the UTC instants rather than the
+local hours. Intervals are half-open (start, end) pairs of aware UTC
+datetimes; booked intervals are subtracted with a single sorted sweep.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from app.services.appointment_service import iter_appointments_between, parse_dt_utc
+from app.services.working_hours_service import ResolvedWorkingHours, resolved_working_hours
+
+Interval = Tuple[datetime, datetime]
+
+MAX_RANGE_DAYS = 62
+# Bookings that start up to this long before the window can still overlap it.
+MAX_APPOINTMENT_HOURS = 24
+INACTIVE_STATUSES = {"cancelled"}
+
+
+class AvailabilityRangeError(ValueError):
+    pass
+
+
+def _wall_clock_utc(day: date, minutes: int, zone: ZoneInfo) -> datetime:
+    # Aware + timedelta is wall-clock arithmetic; astimezone then applies the
+    # offset in force at that local time. Ambiguous times take their first
+    # occurrence.
+    local = datetime.combine(day, time(), tzinfo=zone) + timedelta(minutes=minutes)
+    utc = local.astimezone(timezone.utc)
+    if utc.astimezone(zone).replace(tzinfo=None) == local.replace(tzinfo=None):
+        return utc
+    # A time the clock skips (spring forward): the first instant at or after
+    # it is the transition, which lies between the two offsets' readings.
+    lo = int(local.replace(fold=1).astimezone(timezone.utc).timestamp())
+    hi = int(utc.timestamp())
+    after = utc.astimezone(zone).utcoffset()
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if datetime.fromtimestamp(mid, zone).utcoffset() == after:
+            hi = mid
+        else:
+            lo = mid
+    return datetime.fromtimestamp(hi, timezone.utc)
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    out: List[Interval] = []
+    for s, e in sorted(intervals):
+        if out and s <= out[-1][1]:
+            if e > out[-1][1]:
+                out[-1] = (out[-1][0], e)
+        else:
+            out.append((s, e))
+    return out
+
+
+def subtract_intervals(free: List[Interval], busy: List[Interval]) -> List[Interval]:
+    """Both inputs sorted and non-overlapping (see merge_intervals)."""
+    out: List[Interval] = []
+    j = 0
+    for s, e in free:
+        while j < len(busy) and busy[j][1] <= s:
+            j += 1
+        cur = s
+        k = j
+        while k < len(busy) and busy[k][0] < e:
+            if busy[k][0] > cur:
+                out.append((cur, busy[k][0]))
+            cur = max(cur, busy[k][1])
+            k += 1
+        if cur < e:
+            out.append((cur, e))
+    return out
+
+
+def working_intervals(
+    wh: ResolvedWorkingHours,
+    start_utc: datetime,
+    end_utc: datetime,
+) -> List[Interval]:
+    zone = wh.zone
+    out: List[Interval] = []
+    day = start_utc.astimezone(zone).date()
+    last = end_utc.astimezone(zone).date()
+    while day <= last:
+        minutes = wh.minutes_for(day)
+        if minutes:
+            s = max(_wall_clock_utc(day, minutes[0], zone), start_utc)
+            e = min(_wall_clock_utc(day, minutes[1], zone), end_utc)
+            if s < e:
+                out.append((s, e))
+        day += timedelta(days=1)
+    return merge_intervals(out)
+
+
+def booked_intervals(
+    user_item: Mapping[str, Any],
+    start_utc: datetime,
+    end_utc: datetime,
+    zone: ZoneInfo,
+) -> List[Interval]:
+    business_id = user_item.get("defaultBusinessId")
+    if not business_id:
+        return []
+    out: List[Interval] = []
+    for start, item in iter_appointments_between(
+        business_id,
+        start_utc - timedelta(hours=MAX_APPOINTMENT_HOURS),
+        end_utc,
+        zone,
+        user_item["userId"],
+    ):
+        if (item.get("status") or "").lower() in INACTIVE_STATUSES:
+            continue
+        try:
+            end = parse_dt_utc(item["endTime"], zone)
+        except (KeyError, ValueError):
+            continue
+        if end > start and end > start_utc:
+            out.append((start, end))
+    return merge_intervals(out)
+
+
+def free_intervals(
+    wh: ResolvedWorkingHours,
+    busy: List[Interval],
+    start_utc: datetime,
+    end_utc: datetime,
+    duration: Optional[timedelta] = None,
+) -> List[Interval]:
+    free = subtract_intervals(working_intervals(wh, start_utc, end_utc), busy)
+    if duration:
+        free = [(s, e) for s, e in free if e - s >= duration]
+    return free
+
+
+def get_availability(
+    user_item: Mapping[str, Any],
+    from_: str,
+    to: str,
+    duration_minutes: int,
+) -> Dict[str, Any]:
+    wh = resolved_working_hours(user_item)
+    zone = wh.zone
+    # Naive bounds are read as wall-clock times in the user's timezone.
+    try:
+        start_utc = parse_dt_utc(from_, zone)
+        end_utc = parse_dt_utc(to, zone)
+    except ValueError:
+        raise AvailabilityRangeError("'from' and 'to' must be ISO datetimes")
+    if end_utc <= start_utc:
+        raise AvailabilityRangeError("'to' must be after 'from'")
+    if end_utc - start_utc > timedelta(days=MAX_RANGE_DAYS):
+        raise AvailabilityRangeError(f"Range is limited to {MAX_RANGE_DAYS} days")
+
+    busy = booked_intervals(user_item, start_utc, end_utc, zone)
+    free = free_intervals(wh, busy, start_utc, end_utc, timedelta(minutes=duration_minutes))
+    return {
+        "timezone": zone.key,
+        "duration": duration_minutes,
+        "slots": [
+            {"start": s.astimezone(zone).isoformat(), "end": e.astimezone(zone).isoformat()}
+            for s, e in free
+        ],
+    }
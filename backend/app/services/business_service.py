@@ -1,16 +1,44 @@
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
-from boto3.dynamodb.conditions import Attr
-
-from app.core.ddb import businesses_table, users_table
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+from app.core.config import DDB_BUSINESSES_OWNER_INDEX
+from app.core.ddb import (
+    businesses_table,
+    users_table,
+    query_all,
+    transact_write,
+    cancellation_codes,
+)
 from app.models.business import BusinessCreate
+from app.services.user_cache import invalidate_user
+
+# Each business has a companion name item in the businesses table, keyed by
+# its normalized name and written in the same transaction as the business.
+# It makes names unique and points at the business by id only, so lookups by
+# name read the live business rather than a copy frozen at creation.
+NAME_KEY_PREFIX = "name#"
+NAME_TARGET_ATTR = "targetBusinessId"
+
+
+class BusinessNameTaken(ValueError):
+    pass
 
 
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def normalize_business_name(business_name: str) -> str:
+    return " ".join(business_name.split()).casefold()
+
+
+def name_key(business_name: str) -> Dict[str, str]:
+    return {"businessId": NAME_KEY_PREFIX + normalize_business_name(business_name)}
+
+
 def create_business_for_user(user_item: Dict, payload: BusinessCreate) -> Dict:
     table = businesses_table()
     t = now_iso()
@@ -26,32 +54,75 @@ def create_business_for_user(user_item: Dict, payload: BusinessCreate) -> Dict:
         "updatedAt": t,
     }
 
-    table.put_item(Item=item)
-
-    users_table().update_item(
-        Key={"userId": user_item["userId"]},
-        UpdateExpression="SET defaultBusinessId = :b, updatedAt = :u",
-        ExpressionAttributeValues={":b": business_id, ":u": t},
-    )
+    try:
+        transact_write([
+            {"Put": {
+                "TableName": table.name,
+                "Item": item,
+                "ConditionExpression": "attribute_not_exists(businessId)",
+            }},
+            {"Put": {
+                "TableName": table.name,
+                "Item": {**name_key(item["businessName"]), NAME_TARGET_ATTR: business_id},
+                "ConditionExpression": "attribute_not_exists(businessId)",
+            }},
+            {"Update": {
+                "TableName": users_table().name,
+                "Key": {"userId": user_item["userId"]},
+                "UpdateExpression": "SET defaultBusinessId = :b, updatedAt = :u",
+                "ExpressionAttributeValues": {":b": business_id, ":u": t},
+            }},
+        ])
+    except ClientError as e:
+        codes = cancellation_codes(e)
+        if len(codes) > 1 and codes[1] == "ConditionalCheckFailed":
+            raise BusinessNameTaken(f"Business name '{item['businessName']}' is already taken")
+        raise
+    finally:
+        invalidate_user(user_item["userId"])
 
     return item
 
 
 def list_businesses_for_user(user_id: str) -> List[Dict]:
-    resp = businesses_table().scan()
-    items = resp.get("Items", [])
-    return [b for b in items if b.get("ownerUserId") == user_id]
+    return list(
+        query_all(
+            businesses_table(),
+            IndexName=DDB_BUSINESSES_OWNER_INDEX,
+            KeyConditionExpression=Key("ownerUserId").eq(user_id),
+        )
+    )
+
+
+def name_target(name_item: Dict) -> str:
+    # Name items written before NAME_TARGET_ATTR embedded the whole business.
+    if NAME_TARGET_ATTR in name_item:
+        return name_item[NAME_TARGET_ATTR]
+    return name_item["business"]["businessId"]
 
 
 def find_business_by_name(business_name: str) -> Optional[Dict]:
     table = businesses_table()
-    resp = table.scan(
-        FilterExpression=Attr("businessName").eq(business_name.strip())
-    )
-    items = resp.get("Items") or []
-    if not items:
+    resp = table.get_item(Key=name_key(business_name), ConsistentRead=True)
+    name_item = resp.get("Item")
+    if not name_item:
         return None
-    return items[0]
+    resp = table.get_item(Key={"businessId": name_target(name_item)}, ConsistentRead=True)
+    return resp.get("Item")
+
+
+def join_or_create_business(user_item: Dict, payload: BusinessCreate) -> Dict:
+    business = find_business_by_name(payload.businessName)
+    if not business:
+        try:
+            return create_business_for_user(user_item, payload)
+        except BusinessNameTaken:
+            business = find_business_by_name(payload.businessName)
+            if not business:
+                raise
+
+    set_default_business_for_user(user_item["userId"], business["businessId"])
+    return business
 
 
 def set_default_business_for_user(user_id: str, business_id: str) -> None:
@@ -61,3 +132,4 @@ def set_default_business_for_user(user_id: str, business_id: str) -> None:
         UpdateExpression="SET defaultBusinessId = :b, updatedAt = :u",
         ExpressionAttributeValues={":b": business_id, ":u": t},
     )
+    invalidate_user(user_id)
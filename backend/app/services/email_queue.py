@@ -0,0 +1,208 @@
+"""
+Outbound email delivery off the request path.
+
+Routes enqueue a job and return; a small pool of worker threads renders and
+sends it through SES, retrying transient failures with exponential backoff
+and recording jobs that exhaust their attempts (or fail permanently) as dead
+letters. The queue backend is pluggable: anything with put/get/dead_letter
+can replace the in-process one (e.g. an SQS- or DynamoDB-backed queue).
+"""
+import os
+import queue
+import random
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from app.core.email_ses import is_retryable, send_bulk_email
+from app.services.notification_service import render_appointment_emails, send_appointment_email
+
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", "2"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "2"))
+EMAIL_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", "300"))
+
+
+class BatchSendError(Exception):
+    """
+    Raised by a batch handler when only part of its payload went out.
+    `retry` and `dead` are payloads narrowed to the failed items; the
+    dispatcher retries the first and dead-letters the second.
+    """
+
+    def __init__(self, error: str, sent: int, retry: Optional[Dict] = None, dead: Optional[Dict] = None):
+        super().__init__(error)
+        self.error = error
+        self.sent = sent
+        self.retry = retry
+        self.dead = dead
+
+
+class InMemoryEmailQueue:
+    def __init__(self, dead_letter_limit: int = 1000):
+        self._q: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self.dead_letters: Deque[Dict[str, Any]] = deque(maxlen=dead_letter_limit)
+
+    def put(self, job: Dict[str, Any]) -> None:
+        self._q.put(job)
+
+    def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        try:
+            return self._q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def dead_letter(self, job: Dict[str, Any], error: str) -> None:
+        record = {**job, "error": error, "deadAt": datetime.now(timezone.utc).isoformat()}
+        self.dead_letters.append(record)
+        print("Email dead-lettered:", job.get("kind"), error)
+
+    def qsize(self) -> int:
+        return self._q.qsize()
+
+
+class EmailDispatcher:
+    def __init__(
+        self,
+        backend,
+        handlers: Dict[str, Callable[[Dict[str, Any]], Any]],
+        workers: int = EMAIL_WORKERS,
+        max_attempts: int = EMAIL_MAX_ATTEMPTS,
+        retry_base: float = EMAIL_RETRY_BASE_SECONDS,
+        retry_max: float = EMAIL_RETRY_MAX_SECONDS,
+    ):
+        self.backend = backend
+        self.handlers = handlers
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.sent = 0
+        self.failed = 0
+        self._threads: List[threading.Thread] = []
+        self._timers: List[threading.Timer] = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            for i in range(self.workers):
+                t = threading.Thread(target=self._run, name=f"email-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        for timer in self._timers:
+            timer.cancel()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+        self._timers = []
+
+    def enqueue(self, kind: str, payload: Dict[str, Any]) -> None:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown email kind '{kind}'")
+        self.start()
+        self.backend.put({"kind": kind, "payload": payload, "attempts": 0})
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.retry_max, self.retry_base * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _count(self, sent: int = 0, failed: int = 0) -> None:
+        # Workers finish jobs concurrently; += on a shared int is not atomic.
+        with self._lock:
+            self.sent += sent
+            self.failed += failed
+
+    def _retry_later(self, job: Dict[str, Any]) -> None:
+        timer = threading.Timer(self._backoff(job["attempts"]), self.backend.put, (job,))
+        timer.daemon = True
+        with self._lock:
+            self._timers = [t for t in self._timers if t.is_alive()] + [timer]
+        timer.start()
+
+    def _fail(self, job: Dict[str, Any], error: str, retryable: bool) -> None:
+        job = {**job, "attempts": job["attempts"] + 1}
+        if job["attempts"] >= self.max_attempts or not retryable:
+            self._count(failed=1)
+            self.backend.dead_letter(job, error)
+        else:
+            self._retry_later(job)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            job = self.backend.get(timeout=0.5)
+            if job is None:
+                continue
+            try:
+                sent = self.handlers[job["kind"]](job["payload"])
+                self._count(sent=sent if isinstance(sent, int) else 1)
+            except BatchSendError as e:
+                self._count(sent=e.sent)
+                if e.dead:
+                    self._fail({**job, "payload": e.dead}, e.error, retryable=False)
+                if e.retry:
+                    self._fail({**job, "payload": e.retry}, e.error, retryable=True)
+            except Exception as e:
+                self._fail(job, repr(e), is_retryable(e))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sent, failed = self.sent, self.failed
+        return {
+            "sent": sent,
+            "failed": failed,
+            "queued": self.backend.qsize() if hasattr(self.backend, "qsize") else None,
+        }
+
+
+def _send_appointment_email_job(payload: Dict[str, Any]) -> None:
+    send_appointment_email(payload["appointment"], payload["template"])
+
+
+def _send_appointment_emails_job(payload: Dict[str, Any]) -> int:
+    # One job per batch (an import chunk, a reminder tick): the messages go
+    # out together through send_bulk_email, and only the failures come back.
+    messages = render_appointment_emails(payload["template"], payload["appointments"])
+    results = send_bulk_email(messages)
+    failed = {m["appointmentId"]: r for m, r in zip(messages, results) if not r["ok"]}
+    if not failed:
+        return len(results)
+
+    def narrowed(retryable: bool) -> Optional[Dict[str, Any]]:
+        appointments = [
+            a for a in payload["appointments"]
+            if a.get("appointmentId") in failed and failed[a["appointmentId"]]["retryable"] == retryable
+        ]
+        return {**payload, "appointments": appointments} if appointments else None
+
+    raise BatchSendError(
+        next(iter(failed.values()))["error"],
+        sent=len(results) - len(failed),
+        retry=narrowed(True),
+        dead=narrowed(False),
+    )
+
+
+email_dispatcher = EmailDispatcher(
+    InMemoryEmailQueue(),
+    handlers={
+        "appointment_email": _send_appointment_email_job,
+        "appointment_emails": _send_appointment_emails_job,
+    },
+)
+
+
+def enqueue_appointment_email(appointment: Dict[str, Any], template: str = "confirmation") -> None:
+    email_dispatcher.enqueue("appointment_email", {"template": template, "appointment": appointment})
+
+
+def enqueue_appointment_emails(appointments: List[Dict[str, Any]], template: str = "confirmation") -> None:
+    if appointments:
+        email_dispatcher.enqueue("appointment_emails", {"template": template, "appointments": appointments})
@@ -1,108 +1,112 @@
 import os
 from datetime import datetime
-from typing import Dict, Optional
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode
 
-from app.core.email_ses import send_raw_email
+from app.core.email_ses import send_email
 from app.services.user_service import get_user_by_id
 
-
-def _parse_iso(dt: str) -> datetime:
-    return datetime.fromisoformat(dt.replace("Z", "+00:00"))
+TEMPLATE_DIR = Path(__file__).resolve().parents[1] / "templates" / "email"
+EMAIL_KINDS = ("confirmation", "reschedule", "cancellation", "reminder")
 
 
-def send_appointment_email(appointment: Dict):
-    invitee_email: Optional[str] = appointment.get("inviteeEmail")
-    if not invitee_email:
-        return
+@lru_cache(maxsize=1)
+def _templates() -> Dict:
+    # Every template is compiled together on the first render, not at import,
+    # so cold starts that send no email skip Jinja entirely.
+    from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
 
-    user_id: str = appointment["userId"]
-    user = get_user_by_id(user_id) or {}
-    provider_name = user.get("name") or "your provider"
-
-    title = appointment.get("title") or "Appointment"
+    env = Environment(
+        loader=FileSystemLoader(str(TEMPLATE_DIR)),
+        autoescape=select_autoescape(enabled_extensions=("html",), default_for_string=False),
+        undefined=StrictUndefined,
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+    return {
+        kind: (
+            env.get_template(f"{kind}.subject.txt"),
+            env.get_template(f"{kind}.txt"),
+            env.get_template(f"{kind}.html"),
+        )
+        for kind in EMAIL_KINDS
+    }
 
-    start_raw = appointment["startTime"]
-    end_raw = appointment["endTime"]
 
-    start_dt = _parse_iso(start_raw)
-    end_dt = _parse_iso(end_raw)
+def _parse_iso(dt: str) -> datetime:
+    return datetime.fromisoformat(dt.replace("Z", "+00:00"))
 
-    date_str = start_dt.strftime("%A, %B %d, %Y")
-    start_str = start_dt.strftime("%I:%M %p").lstrip("0")
-    end_str = end_dt.strftime("%I:%M %p").lstrip("0")
 
+def _rsvp_links(appointment: Dict) -> Optional[Dict[str, str]]:
     base = os.getenv("APPOINTMENT_RSVP_BASE_URL", "").rstrip("/")
     rsvp_token = appointment.get("rsvpToken")
-
-    accepted_url = ""
-    declined_url = ""
-    maybe_url = ""
-
-    if base and rsvp_token:
-        link_base = base + "/appointments/rsvp"
-        common = (
-            "businessId={}&appointmentId={}&token={}".format(
-                appointment["businessId"],
-                appointment["appointmentId"],
-                rsvp_token,
-            )
+    if not (base and rsvp_token):
+        return None
+
+    link_base = base + "/appointments/rsvp?"
+    common = {
+        "businessId": appointment["businessId"],
+        "appointmentId": appointment["appointmentId"],
+        "token": rsvp_token,
+    }
+    return {
+        choice: link_base + urlencode({**common, "choice": choice})
+        for choice in ("accepted", "declined", "maybe")
+    }
+
+
+def appointment_email_context(appointment: Dict, provider_name: str) -> Dict:
+    start_dt = _parse_iso(appointment["startTime"])
+    end_dt = _parse_iso(appointment["endTime"])
+    return {
+        "title": appointment.get("title") or "Appointment",
+        "provider": provider_name,
+        "date": start_dt.strftime("%A, %B %d, %Y"),
+        "start": start_dt.strftime("%I:%M %p").lstrip("0"),
+        "end": end_dt.strftime("%I:%M %p").lstrip("0"),
+        "rsvp": _rsvp_links(appointment),
+    }
+
+
+def render_email(kind: str, context: Dict) -> Tuple[str, str, str]:
+    subject_t, text_t, html_t = _templates()[kind]
+    return subject_t.render(context), text_t.render(context), html_t.render(context)
+
+
+def render_appointment_emails(
+    kind: str,
+    appointments: Iterable[Dict],
+    provider_names: Optional[Dict[str, str]] = None,
+) -> List[Dict]:
+    """
+    Render one message per appointment with an invitee, ready for
+    email_ses.send_bulk_email. provider_names maps userId to display name;
+    missing entries are looked up (cached) once per provider.
+    """
+    names = dict(provider_names or {})
+    messages = []
+    for appointment in appointments:
+        invitee_email = appointment.get("inviteeEmail")
+        if not invitee_email:
+            continue
+        user_id = appointment["userId"]
+        if user_id not in names:
+            names[user_id] = (get_user_by_id(user_id) or {}).get("name") or "your provider"
+        subject, body_text, body_html = render_email(
+            kind, appointment_email_context(appointment, names[user_id])
         )
-        accepted_url = "{}?{}&choice=accepted".format(link_base, common)
-        declined_url = "{}?{}&choice=declined".format(link_base, common)
-        maybe_url = "{}?{}&choice=maybe".format(link_base, common)
-
-    subject = "Appointment confirmation: {}".format(title)
-
-    body_text_lines = [
-        "Hi,",
-        "",
-        'You have an appointment titled "{}" with {} on {} from {} to {}.'.format(
-            title, provider_name, date_str, start_str, end_str
-        ),
-    ]
-
-    if accepted_url:
-        body_text_lines.append("")
-        body_text_lines.append("Please confirm your attendance:")
-        body_text_lines.append("Accept: {}".format(accepted_url))
-        body_text_lines.append("Decline: {}".format(declined_url))
-        body_text_lines.append("Maybe: {}".format(maybe_url))
-
-    body_text_lines.append("")
-    body_text_lines.append("If you have any questions, please reply to this email.")
-    body_text_lines.append("")
-    body_text_lines.append("Best,")
-    body_text_lines.append("OfficeMate")
-
-    body_text = "\n".join(body_text_lines)
-
-    if accepted_url:
-        rsvp_html = (
-            '<p>Please confirm your attendance:</p>'
-            '<p>'
-            '<a href="{a}" style="padding:8px 14px;background:#16a34a;color:#ffffff;text-decoration:none;border-radius:6px;margin-right:8px;">Accept</a>'
-            '<a href="{d}" style="padding:8px 14px;background:#dc2626;color:#ffffff;text-decoration:none;border-radius:6px;margin-right:8px;">Decline</a>'
-            '<a href="{m}" style="padding:8px 14px;background:#eab308;color:#111827;text-decoration:none;border-radius:6px;">Maybe</a>'
-            "</p>"
-        ).format(a=accepted_url, d=declined_url, m=maybe_url)
-    else:
-        rsvp_html = ""
-
-    body_html = (
-        "<p>Hi,</p>"
-        "<p>You have an appointment titled <strong>{title}</strong> with <strong>{provider}</strong>.</p>"
-        "<p><strong>Date</strong>: {date}<br>"
-        "<strong>Time</strong>: {start} – {end}</p>"
-        "{rsvp}"
-        "<p>If you have any questions, please reply to this email.</p>"
-        "<p>Best,<br>OfficeMate</p>"
-    ).format(
-        title=title,
-        provider=provider_name,
-        date=date_str,
-        start=start_str,
-        end=end_str,
-        rsvp=rsvp_html,
-    )
-
-    send_raw_email(invitee_email, subject, body_text, body_html)
+        messages.append({
+            "to": invitee_email,
+            "subject": subject,
+            "body_text": body_text,
+            "body_html": body_html,
+            "appointmentId": appointment.get("appointmentId"),
+        })
+    return messages
+
+
+def send_appointment_email(appointment: Dict, kind: str = "confirmation"):
+    for message in render_appointment_emails(kind, [appointment]):
+        send_email(message["to"], message["subject"], message["body_text"], message["body_html"])
@@ -0,0 +1,250 @@
+"""
+Appointment reminders, sent REMINDER_LEAD_HOURS before startTime.
+
+Appointments carry a reminderBucket (the UTC hour the reminder falls due in)
+and a reminderAt stamp, which key a sparse GSI. A tick queries only the
+current hour's bucket and a few previous ones (to catch up after downtime),
+each bounded by reminderAt <= now, so its cost tracks the number of due
+reminders rather than the size of the table. A reminder is claimed by a
+conditional update that removes the bucket before it is queued for delivery,
+so concurrent schedulers in several workers send each reminder once.
+
+Reminders that fell due before the lookback (a longer outage) are found by
+a periodic sweep: they are still sent if the appointment has not started,
+and otherwise dropped from the index. The sweep queries only the hourly
+buckets that left the lookback since the last sweep, tracked by a watermark
+item, so it too reads due reminders only. With no watermark it reaches back
+REMINDER_SWEEP_MAX_HOURS.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, Optional
+
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+from app.core.config import (
+    DDB_APPTS_REMINDER_INDEX,
+    REMINDER_LEAD_HOURS,
+    REMINDER_LOOKBACK_HOURS,
+    REMINDER_SWEEP_MAX_HOURS,
+    REMINDER_SWEEP_SECONDS,
+    REMINDER_TICK_SECONDS,
+)
+from app.core.ddb import appointments_table, query_all
+from app.services.appointment_service import (
+    REMINDER_AT_FORMAT,
+    REMINDER_BUCKET_FORMAT,
+    reminder_bucket,
+    reminder_stamp,
+)
+from app.services.email_queue import enqueue_appointment_emails
+
+SKIP_STATUSES = {"cancelled"}
+
+# Holds the sweep watermark. It has no startTime or reminderBucket, so it
+# stays out of both appointment indexes.
+SWEEP_STATE_KEY = {"businessId": "meta#reminders", "appointmentId": "sweep"}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def due_buckets(now: datetime, lookback_hours: int = REMINDER_LOOKBACK_HOURS) -> List[str]:
+    return [reminder_bucket(now - timedelta(hours=h)) for h in range(lookback_hours, -1, -1)]
+
+
+def iter_due_reminders(now: datetime) -> Iterator[Dict]:
+    stamp = reminder_stamp(now)
+    for bucket in due_buckets(now):
+        yield from query_all(
+            appointments_table(),
+            IndexName=DDB_APPTS_REMINDER_INDEX,
+            KeyConditionExpression=Key("reminderBucket").eq(bucket) & Key("reminderAt").lte(stamp),
+        )
+
+
+def _bucket_start(bucket: str) -> datetime:
+    return datetime.strptime(bucket, REMINDER_BUCKET_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def swept_until() -> Optional[str]:
+    item = appointments_table().get_item(Key=SWEEP_STATE_KEY, ConsistentRead=True).get("Item")
+    return item.get("sweptUntil") if item else None
+
+
+def mark_swept(bucket: str) -> None:
+    # Only moves forward, so a slow sweep in another worker cannot rewind it.
+    try:
+        appointments_table().update_item(
+            Key=SWEEP_STATE_KEY,
+            UpdateExpression="SET sweptUntil = :b",
+            ConditionExpression=Attr("sweptUntil").not_exists() | Attr("sweptUntil").lt(bucket),
+            ExpressionAttributeValues={":b": bucket},
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+
+def stale_buckets(now: datetime, since: Optional[str]) -> List[str]:
+    # Buckets that left the ticks' lookback at or after `since`, oldest first.
+    end = _bucket_start(due_buckets(now)[0])
+    start = end - timedelta(hours=REMINDER_SWEEP_MAX_HOURS)
+    if since:
+        start = max(start, _bucket_start(since))
+    hours = max(0, int((end - start).total_seconds() // 3600))
+    return [reminder_bucket(start + timedelta(hours=h)) for h in range(hours)]
+
+
+def iter_stale_reminders(buckets: List[str]) -> Iterator[Dict]:
+    for bucket in buckets:
+        yield from query_all(
+            appointments_table(),
+            IndexName=DDB_APPTS_REMINDER_INDEX,
+            KeyConditionExpression=Key("reminderBucket").eq(bucket),
+        )
+
+
+def _take_reminder(item: Dict, now: datetime, marker: str) -> Optional[Dict]:
+    try:
+        resp = appointments_table().update_item(
+            Key={"businessId": item["businessId"], "appointmentId": item["appointmentId"]},
+            UpdateExpression=f"SET {marker} = :n REMOVE reminderBucket",
+            ConditionExpression=Attr("reminderBucket").eq(item["reminderBucket"])
+            & Attr("reminderAt").eq(item["reminderAt"]),
+            ExpressionAttributeValues={":n": now.astimezone(timezone.utc).isoformat()},
+            ReturnValues="ALL_NEW",
+        )
+    except ClientError as e:
+        # Claimed by another scheduler, or rescheduled since the index was read.
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            return None
+        raise
+    return resp.get("Attributes")
+
+
+def claim_reminder(item: Dict, now: datetime) -> Optional[Dict]:
+    return _take_reminder(item, now, "reminderSentAt")
+
+
+def expire_reminder(item: Dict, now: datetime) -> Optional[Dict]:
+    return _take_reminder(item, now, "reminderExpiredAt")
+
+
+def _claim(item: Dict, now: datetime, counts: Dict[str, int], batch: List[Dict]) -> None:
+    claimed = claim_reminder(item, now)
+    if claimed is None or (claimed.get("status") or "").lower() in SKIP_STATUSES:
+        counts["skipped"] += 1
+        return
+    batch.append(claimed)
+    counts["queued"] += 1
+
+
+def _appointment_started(item: Dict, now: datetime) -> bool:
+    # reminderAt was derived from startTime in the owner's timezone, so it
+    # gives the start without looking the owner up.
+    due = datetime.strptime(item["reminderAt"], REMINDER_AT_FORMAT).replace(tzinfo=timezone.utc)
+    return due + timedelta(hours=REMINDER_LEAD_HOURS) <= now
+
+
+def sweep_stale_reminders(now: Optional[datetime] = None) -> Dict[str, int]:
+    now = now or _utcnow()
+    counts = {"stale": 0, "queued": 0, "skipped": 0, "expired": 0}
+    batch: List[Dict] = []
+    try:
+        for item in iter_stale_reminders(stale_buckets(now, swept_until())):
+            counts["stale"] += 1
+            if _appointment_started(item, now) or (item.get("status") or "").lower() in SKIP_STATUSES:
+                if expire_reminder(item, now) is not None:
+                    counts["expired"] += 1
+                continue
+            _claim(item, now, counts, batch)
+        mark_swept(due_buckets(now)[0])
+    finally:
+        # Claimed reminders are queued even if the sweep fails part way.
+        enqueue_appointment_emails(batch, template="reminder")
+    return counts
+
+
+def run_reminder_tick(now: Optional[datetime] = None) -> Dict[str, int]:
+    now = now or _utcnow()
+    counts = {"due": 0, "queued": 0, "skipped": 0}
+    batch: List[Dict] = []
+    try:
+        for item in iter_due_reminders(now):
+            counts["due"] += 1
+            _claim(item, now, counts, batch)
+    finally:
+        enqueue_appointment_emails(batch, template="reminder")
+    return counts
+
+
+class ReminderScheduler:
+    def __init__(
+        self,
+        interval: float = REMINDER_TICK_SECONDS,
+        clock: Callable[[], datetime] = _utcnow,
+        sweep_interval: float = REMINDER_SWEEP_SECONDS,
+    ):
+        self.interval = interval
+        self.clock = clock
+        self.sweep_interval = sweep_interval
+        self.ticks = 0
+        self.queued = 0
+        self.expired = 0
+        self.errors = 0
+        self.last_tick_at: Optional[str] = None
+        self.last_sweep: Optional[datetime] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def tick(self) -> Dict[str, int]:
+        now = self.clock()
+        # The first tick after a start sweeps too, catching up on downtime.
+        if self.last_sweep is None or (now - self.last_sweep).total_seconds() >= self.sweep_interval:
+            swept = sweep_stale_reminders(now)
+            self.last_sweep = now
+            self.queued += swept["queued"]
+            self.expired += swept["expired"]
+        counts = run_reminder_tick(now)
+        self.ticks += 1
+        self.queued += counts["queued"]
+        self.last_tick_at = now.isoformat()
+        return counts
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                self.errors += 1
+                print("Reminder tick failed:", repr(e))
+            self._stop.wait(self.interval)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "running": self._thread is not None,
+            "ticks": self.ticks,
+            "queued": self.queued,
+            "expired": self.expired,
+            "errors": self.errors,
+            "last_tick_at": self.last_tick_at,
+        }
+
+
+reminder_scheduler = ReminderScheduler()
@@ -0,0 +1,119 @@
+"""
+Slot claims that keep a provider from being double-booked.
+
+An appointment's [start, end) range is discretized into BOOKING_SLOT_MINUTES
+slots in UTC. Each slot is claimed by a `<userId>#<slot start>` item in the
+slots table, written with attribute_not_exists in the same transaction as the
+appointment itself. Two concurrent bookings that share any slot cannot both
+commit: DynamoDB cancels the loser's transaction. Claims carry an expiresAt
+epoch so a table TTL can prune past slots, and the appointment records the
+keys it holds in slotKeys so they can be released on cancel or reschedule.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from botocore.exceptions import ClientError
+
+from app.core.config import BOOKING_MAX_SLOTS, BOOKING_SLOT_MINUTES
+from app.core.ddb import cancellation_codes, slots_table, transact_write
+
+SLOT_KEY_FORMAT = "%Y-%m-%dT%H:%M"
+# Claims stay around this long after the slot ends before TTL removes them.
+CLAIM_RETENTION = timedelta(days=30)
+
+
+class BookingConflictError(ValueError):
+    pass
+
+
+class InvalidBookingError(ValueError):
+    pass
+
+
+def _floor_slot(d: datetime) -> datetime:
+    d = d.astimezone(timezone.utc).replace(second=0, microsecond=0)
+    return d - timedelta(minutes=(d.hour * 60 + d.minute) % BOOKING_SLOT_MINUTES)
+
+
+def slot_keys(user_id: str, start_utc: datetime, end_utc: datetime) -> List[str]:
+    if end_utc <= start_utc:
+        raise InvalidBookingError("End time must be after start time")
+    step = timedelta(minutes=BOOKING_SLOT_MINUTES)
+    keys = []
+    t = _floor_slot(start_utc)
+    while t < end_utc:
+        keys.append(f"{user_id}#{t.strftime(SLOT_KEY_FORMAT)}")
+        if len(keys) > BOOKING_MAX_SLOTS:
+            raise InvalidBookingError(
+                f"Appointments are limited to {BOOKING_MAX_SLOTS * BOOKING_SLOT_MINUTES} minutes"
+            )
+        t += step
+    return keys
+
+
+def claim_items(keys: List[str], appointment: Dict, end_utc: datetime) -> List[Dict]:
+    expires_at = int((end_utc + CLAIM_RETENTION).timestamp())
+    return [
+        {
+            "slotKey": key,
+            "appointmentId": appointment["appointmentId"],
+            "businessId": appointment["businessId"],
+            "expiresAt": expires_at,
+        }
+        for key in keys
+    ]
+
+
+def claim_actions(keys: List[str], appointment: Dict, end_utc: datetime) -> List[Dict]:
+    table = slots_table().name
+    return [
+        {"Put": {
+            "TableName": table,
+            "Item": claim,
+            "ConditionExpression": "attribute_not_exists(slotKey)",
+        }}
+        for claim in claim_items(keys, appointment, end_utc)
+    ]
+
+
+def release_actions(keys: List[str], appointment_id: str) -> List[Dict]:
+    # Only delete claims this appointment holds; appointments created before
+    # claims existed may overlap slots that belong to another booking.
+    table = slots_table().name
+    return [
+        {"Delete": {
+            "TableName": table,
+            "Key": {"slotKey": key},
+            "ConditionExpression": "attribute_not_exists(slotKey) OR appointmentId = :a",
+            "ExpressionAttributeValues": {":a": appointment_id},
+        }}
+        for key in keys
+    ]
+
+
+def is_slot_conflict(e: ClientError, claim_indexes: range) -> bool:
+    codes = cancellation_codes(e)
+    return any(i < len(codes) and codes[i] == "ConditionalCheckFailed" for i in claim_indexes)
+
+
+def release_slots(keys: List[str], appointment_id: str) -> None:
+    if not keys:
+        return
+    try:
+        transact_write(release_actions(keys, appointment_id))
+        return
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "TransactionCanceledException":
+            raise
+    table = slots_table()
+    for action in release_actions(keys, appointment_id):
+        delete = action["Delete"]
+        try:
+            table.delete_item(
+                Key=delete["Key"],
+                ConditionExpression=delete["ConditionExpression"],
+                ExpressionAttributeValues=delete["ExpressionAttributeValues"],
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
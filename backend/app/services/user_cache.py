@@ -0,0 +1,10 @@
+from app.core.cache import TTLCache
+from app.core.config import USER_CACHE_MAXSIZE, USER_CACHE_TTL_SECONDS
+
+# Process-wide cache of users-table items keyed by userId. Anything that writes
+# a user item must call invalidate_user so the next read goes to DynamoDB.
+user_cache = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: str) -> None:
+    user_cache.pop(user_id)
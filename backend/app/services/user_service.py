@@ -1,28 +1,43 @@
 from datetime import datetime, timezone
 from typing import Optional, Dict
 
-from app.core.ddb import users_table
+from app.core.ddb import run_ddb, users_table
 from app.models.user import UserBootstrapIn
 from app.models.business import BusinessCreate
-from app.services.business_service import (
-    find_business_by_name,
-    create_business_for_user,
-    set_default_business_for_user,
-)
+from app.services.business_service import join_or_create_business
+from app.services.user_cache import user_cache, invalidate_user
 
 
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def get_user_by_id(user_id: str) -> Optional[Dict]:
+def get_user_by_id(user_id: str, use_cache: bool = True) -> Optional[Dict]:
+    if use_cache:
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            return dict(cached)
+
+    generation = user_cache.generation()
     resp = users_table().get_item(Key={"userId": user_id})
-    return resp.get("Item")
+    item = resp.get("Item")
+    if item is None:
+        return None
+    user_cache.set(user_id, item, generation=generation)
+    return dict(item)
+
+
+async def aget_user_by_id(user_id: str) -> Optional[Dict]:
+    # Cache hits are answered on the event loop; only misses go to a thread.
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return dict(cached)
+    return await run_ddb(get_user_by_id, user_id)
 
 
 def bootstrap_user(user_id: str, payload: UserBootstrapIn) -> Dict:
     table = users_table()
-    existing = get_user_by_id(user_id)
+    existing = get_user_by_id(user_id, use_cache=False)
     t = now_iso()
 
     if existing:
@@ -49,21 +64,13 @@ def bootstrap_user(user_id: str, payload: UserBootstrapIn) -> Dict:
         }
 
     table.put_item(Item=user_item)
+    invalidate_user(user_id)
 
-    business = find_business_by_name(payload.businessName)
-
-    if business:
-        business_id = business["businessId"]
-        set_default_business_for_user(user_id, business_id)
-    else:
-        business_payload = BusinessCreate(
-            businessName=payload.businessName,
-            location=payload.location or "",
-        )
-        business = create_business_for_user(user_item, business_payload)
-        business_id = business["businessId"]
-
-    user_item["defaultBusinessId"] = business_id
+    business_payload = BusinessCreate(
+        businessName=payload.businessName,
+        location=payload.location or "",
+    )
+    business = join_or_create_business(user_item, business_payload)
 
-    final_user = get_user_by_id(user_id)
-    return final_user or user_item
+    user_item["defaultBusinessId"] = business["businessId"]
+    return user_item
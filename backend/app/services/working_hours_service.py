@@ -1,13 +1,104 @@
-from typing import Any, Optional, Mapping, cast, Dict
+from datetime import date
+from functools import lru_cache
+from typing import Any, Optional, Mapping, cast, Dict, List, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
 from botocore.exceptions import ClientError
 
+from app.core.cache import TTLCache
+from app.core.config import USER_CACHE_MAXSIZE, USER_CACHE_TTL_SECONDS
 from app.core.ddb import users_table
 from app.models.working_hours import WorkingHours
+from app.services.user_cache import invalidate_user
 
 ATTR = "working_hours"
 
+DEFAULT_WORKING_HOURS = {
+    "timezone": "America/Los_Angeles",
+    "weekly": [
+        {"day": "Sunday", "enabled": False, "start": "09:00", "end": "17:00"},
+        {"day": "Monday", "enabled": True, "start": "09:00", "end": "17:00"},
+        {"day": "Tuesday", "enabled": True, "start": "09:00", "end": "17:00"},
+        {"day": "Wednesday", "enabled": True, "start": "09:00", "end": "17:00"},
+        {"day": "Thursday", "enabled": True, "start": "09:00", "end": "17:00"},
+        {"day": "Friday", "enabled": True, "start": "09:00", "end": "17:00"},
+        {"day": "Saturday", "enabled": False, "start": "09:00", "end": "17:00"},
+    ],
+    "overrides": [],
+}
+
+
+# date.weekday() order
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+MinuteRange = Tuple[int, int]
+
+
+def _minutes(hhmm: str) -> int:
+    h, m = hhmm.split(":")
+    return int(h) * 60 + int(m)
+
+
+def _zone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name)
+    except ZoneInfoNotFoundError:
+        return ZoneInfo("UTC")
+
+
+class ResolvedWorkingHours:
+    """WorkingHours compiled for lookups: open minutes per weekday and per override date."""
+
+    def __init__(self, wh: WorkingHours):
+        self.zone = _zone(wh.timezone)
+        self.weekly: List[Optional[MinuteRange]] = [None] * 7
+        for d in wh.weekly:
+            if d.enabled:
+                self.weekly[DAY_NAMES.index(d.day)] = (_minutes(d.start), _minutes(d.end))
+        self.overrides: Dict[date, Optional[MinuteRange]] = {
+            o.date: (_minutes(o.start), _minutes(o.end)) if o.enabled and o.start and o.end else None
+            for o in wh.overrides
+        }
+
+    def minutes_for(self, day: date) -> Optional[MinuteRange]:
+        if day in self.overrides:
+            return self.overrides[day]
+        return self.weekly[day.weekday()]
+
+
+# Parsed working hours keyed by userId, built from the (already cached) user
+# item so availability lookups need no extra read. Each entry keeps the raw
+# attribute it was parsed from and is only reused for an item carrying the
+# same one: a caller holding a user item read before save_working_hours can
+# refill the cache, but never serve its stale hours to a fresher item.
+working_hours_cache = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+
+def user_working_hours(user_item: Mapping[str, Any]) -> WorkingHours:
+    return WorkingHours.model_validate(user_item.get(ATTR) or DEFAULT_WORKING_HOURS)
+
+
+def resolved_working_hours(user_item: Mapping[str, Any]) -> ResolvedWorkingHours:
+    user_id = user_item.get("userId")
+    source = user_item.get(ATTR)
+    cached = working_hours_cache.get(user_id) if user_id else None
+    if cached is not None and cached[0] == source:
+        return cached[1]
+    resolved = ResolvedWorkingHours(user_working_hours(user_item))
+    if user_id:
+        working_hours_cache.set(user_id, (source, resolved))
+    return resolved
+
+
+def user_timezone(user_item: Mapping[str, Any]) -> ZoneInfo:
+    # The zone availability is computed in; bookings, reminders and the
+    # assistant read naive times in it too, so they all agree on one slot.
+    return resolved_working_hours(user_item).zone
+
 
+@lru_cache(maxsize=1)
 def _get_table_keys() -> Dict[str, Optional[str]]:
+    # Table.key_schema issues a DescribeTable; the schema never changes at runtime.
     table = users_table()
     pk = None
     sk = None
@@ -68,5 +159,8 @@ def save_working_hours(user_sub: str, wh: WorkingHours) -> Mapping[str, Any]:
         )
     except ClientError as e:
         raise RuntimeError(str(e))
+    finally:
+        invalidate_user(user_sub)
+        working_hours_cache.pop(user_sub)
 
     return data
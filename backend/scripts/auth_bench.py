@@ -0,0 +1,105 @@
+"""
+Microbenchmark for access-token verification (app.core.auth_cognito).
+
+Mints RS256 tokens with a throwaway key installed in the JWKS store, so no
+Cognito pool or network is involved, and reports the median cost per request
+of:
+
+  * baseline: header parse + jose decode against the raw JWK dict, the path
+    before keys were prebuilt and claims cached;
+  * miss: verify_access_token with the claims cache cleared (prebuilt key);
+  * hit: verify_access_token answered from the claims cache.
+
+Usage (from backend/):
+    python -m scripts.auth_bench [--iterations 500] [--repeats 5]
+"""
+import argparse
+import os
+import statistics
+import time
+from typing import Callable, Dict, Tuple
+
+# Tokens are minted here, so any pool settings do; .env values win if present.
+os.environ.setdefault("COG_REGION", "us-east-1")
+os.environ.setdefault("COG_USER_POOL_ID", "us-east-1_bench")
+os.environ.setdefault("COG_CLIENT_ID", "bench-client")
+
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from jose import jwk, jwt  # noqa: E402
+
+from app.core import auth_cognito  # noqa: E402
+from app.core.auth_cognito import ALGS, CLIENT, ISSUER, jwks_store, verify_access_token  # noqa: E402
+
+KID = "bench"
+
+
+def signing_key() -> Tuple[bytes, Dict]:
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public = private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_jwk = {
+        k: v.decode() if isinstance(v, bytes) else v
+        for k, v in jwk.construct(public, ALGS[0]).to_dict().items()
+    }
+    return pem, {**public_jwk, "kid": KID}
+
+
+def mint(pem: bytes) -> str:
+    now = int(time.time())
+    claims = {
+        "sub": "bench-user",
+        "iss": ISSUER,
+        "client_id": CLIENT,
+        "aud": CLIENT,
+        "token_use": "access",
+        "scope": "openid",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return jwt.encode(claims, pem, algorithm=ALGS[0], headers={"kid": KID})
+
+
+def per_request_us(fn: Callable[[], None], iterations: int, repeats: int) -> float:
+    fn()
+    runs = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        runs.append((time.perf_counter() - started) / iterations * 1e6)
+    return statistics.median(runs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    pem, public_jwk = signing_key()
+    jwks_store._install({"keys": [public_jwk]})
+    token = mint(pem)
+
+    def baseline():
+        jwt.get_unverified_header(token)
+        jwt.decode(token, public_jwk, algorithms=ALGS, audience=CLIENT, issuer=ISSUER)
+
+    def miss():
+        auth_cognito._token_cache.clear()
+        verify_access_token(token)
+
+    def hit():
+        verify_access_token(token)
+
+    print(f"Median per request over {args.repeats} x {args.iterations}:")
+    for name, fn in (("baseline", baseline), ("miss", miss), ("hit", hit)):
+        print(f"  {name:9} {per_request_us(fn, args.iterations, args.repeats):9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Requests-per-second benchmark for DynamoDB calls made from async routes
+(app.core.ddb.run_ddb), on one worker (one event loop).
+
+DynamoDB is moto with --latency-ms of simulated network round trip added to
+every call, so a blocking call costs what it would against AWS. Three routes
+do the same users-table GetItem:
+
+  * blocking: an async route calling boto3 directly, which stalls the event
+    loop (the path before run_ddb);
+  * run_ddb: an async route awaiting run_ddb, the shipped path;
+  * sync: a plain def route on AnyIO's thread pool, for comparison.
+
+--concurrency clients issue --requests requests in total per route.
+
+Usage (from backend/, needs requirements-dev.txt for moto):
+    python -m scripts.concurrency_bench [--requests 500] [--concurrency 50] [--latency-ms 20]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+# Everything below talks to moto, never to AWS.
+os.environ.update(
+    AWS_ACCESS_KEY_ID="bench",
+    AWS_SECRET_ACCESS_KEY="bench",
+    AWS_REGION="us-east-1",
+    AWS_DEFAULT_REGION="us-east-1",
+)
+os.environ.pop("AWS_PROFILE", None)
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+from app.core.config import DDB_TABLE_USERS  # noqa: E402
+from app.core.ddb import get_ddb, run_ddb, users_table  # noqa: E402
+
+KEY = {"userId": "bench-user"}
+
+app = FastAPI()
+
+
+def read_user():
+    return users_table().get_item(Key=KEY).get("Item")
+
+
+@app.get("/blocking")
+async def blocking():
+    return read_user()
+
+
+@app.get("/run_ddb")
+async def offloaded():
+    return await run_ddb(read_user)
+
+
+@app.get("/sync")
+def sync():
+    return read_user()
+
+
+def add_latency(latency_ms: float) -> None:
+    def sleep(**kwargs):
+        time.sleep(latency_ms / 1000)
+
+    # Ahead of moto's handler, which answers the request.
+    get_ddb().meta.client.meta.events.register_first("before-send.dynamodb", sleep)
+
+
+async def requests_per_second(path: str, total: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    remaining = iter(range(total))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in remaining:
+                resp = await client.get(path)
+                resp.raise_for_status()
+
+        await client.get(path)
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return total / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with mock_aws():
+        get_ddb.cache_clear()
+        get_ddb().meta.client.create_table(
+            TableName=DDB_TABLE_USERS,
+            KeySchema=[{"AttributeName": "userId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "userId", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        users_table().put_item(Item={**KEY, "email": "owner@example.com"})
+        add_latency(args.latency_ms)
+
+        print(
+            f"{args.requests} requests, {args.concurrency} concurrent, "
+            f"{args.latency_ms:.0f} ms per DynamoDB call, one worker:"
+        )
+        for path in ("/blocking", "/run_ddb", "/sync"):
+            rps = asyncio.run(requests_per_second(path, args.requests, args.concurrency))
+            print(f"  {path:10} {rps:8,.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
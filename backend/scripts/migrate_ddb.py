@@ -0,0 +1,272 @@
+"""
+DynamoDB schema migrations for the OfficeMate tables.
+
+Creates the global secondary indexes the services query and the booking slots
+table, and backfills the attributes and slot claims they rely on. Safe to
+re-run: indexes and tables that already exist are left alone and backfills
+only touch items that are missing the attribute.
+
+Usage (from backend/):
+    python -m scripts.migrate_ddb
+"""
+import re
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from app.core.config import (
+    DDB_APPTS_REMINDER_INDEX,
+    DDB_TABLE_SLOTS,
+    DDB_APPTS_START_INDEX,
+    DDB_BUSINESSES_OWNER_INDEX,
+)
+from app.core.ddb import (
+    appointments_table,
+    businesses_table,
+    scan_all,
+    slots_table,
+    transact_write,
+    users_table,
+)
+from app.services.appointment_service import parse_dt_utc, reminder_fields
+from app.services.business_service import NAME_KEY_PREFIX, NAME_TARGET_ATTR, name_key, name_target
+from app.services.slot_service import claim_actions, is_slot_conflict, slot_keys
+from app.services.working_hours_service import user_timezone
+
+# Business ids are minted as biz_<ownerUserId>_<unix seconds>.
+_BUSINESS_ID_RE = re.compile(r"^biz_(.+)_\d+$")
+
+
+def _index_status(table, index_name: str) -> Optional[str]:
+    table.reload()
+    for idx in table.global_secondary_indexes or []:
+        if idx["IndexName"] == index_name:
+            return idx["IndexStatus"]
+    return None
+
+
+def ensure_gsi(table, index_name: str, hash_key: str, range_key: Optional[str] = None) -> None:
+    if _index_status(table, index_name):
+        print(f"{table.name}: index {index_name} already exists")
+    else:
+        attrs = [{"AttributeName": hash_key, "AttributeType": "S"}]
+        key_schema = [{"AttributeName": hash_key, "KeyType": "HASH"}]
+        if range_key:
+            attrs.append({"AttributeName": range_key, "AttributeType": "S"})
+            key_schema.append({"AttributeName": range_key, "KeyType": "RANGE"})
+
+        create = {
+            "IndexName": index_name,
+            "KeySchema": key_schema,
+            "Projection": {"ProjectionType": "ALL"},
+        }
+        billing = (table.billing_mode_summary or {}).get("BillingMode")
+        if billing != "PAY_PER_REQUEST":
+            pt = table.provisioned_throughput
+            create["ProvisionedThroughput"] = {
+                "ReadCapacityUnits": pt["ReadCapacityUnits"],
+                "WriteCapacityUnits": pt["WriteCapacityUnits"],
+            }
+
+        print(f"{table.name}: creating index {index_name}")
+        table.meta.client.update_table(
+            TableName=table.name,
+            AttributeDefinitions=attrs,
+            GlobalSecondaryIndexUpdates=[{"Create": create}],
+        )
+
+    while _index_status(table, index_name) != "ACTIVE":
+        time.sleep(5)
+    print(f"{table.name}: index {index_name} is ACTIVE")
+
+
+def ensure_slots_table() -> None:
+    table = slots_table()
+    client = table.meta.client
+    try:
+        table.load()
+        print(f"{DDB_TABLE_SLOTS}: table already exists")
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ResourceNotFoundException":
+            raise
+        print(f"{DDB_TABLE_SLOTS}: creating table")
+        client.create_table(
+            TableName=DDB_TABLE_SLOTS,
+            AttributeDefinitions=[{"AttributeName": "slotKey", "AttributeType": "S"}],
+            KeySchema=[{"AttributeName": "slotKey", "KeyType": "HASH"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        client.get_waiter("table_exists").wait(TableName=DDB_TABLE_SLOTS)
+
+    ttl = client.describe_time_to_live(TableName=DDB_TABLE_SLOTS)["TimeToLiveDescription"]
+    if ttl.get("TimeToLiveStatus") not in ("ENABLED", "ENABLING"):
+        client.update_time_to_live(
+            TableName=DDB_TABLE_SLOTS,
+            TimeToLiveSpecification={"Enabled": True, "AttributeName": "expiresAt"},
+        )
+    print(f"{DDB_TABLE_SLOTS}: TTL on expiresAt")
+
+
+def backfill_business_owners(table) -> None:
+    fixed = 0
+    skipped = 0
+    for item in scan_all(
+        table,
+        FilterExpression=Attr("ownerUserId").not_exists()
+        & ~Attr("businessId").begins_with(NAME_KEY_PREFIX),
+    ):
+        m = _BUSINESS_ID_RE.match(item["businessId"])
+        if not m:
+            skipped += 1
+            print(f"{table.name}: cannot infer owner for {item['businessId']}")
+            continue
+        table.update_item(
+            Key={"businessId": item["businessId"]},
+            UpdateExpression="SET ownerUserId = :o",
+            ConditionExpression=Attr("ownerUserId").not_exists(),
+            ExpressionAttributeValues={":o": m.group(1)},
+        )
+        fixed += 1
+    print(f"{table.name}: backfilled ownerUserId on {fixed} item(s), skipped {skipped}")
+
+
+def backfill_business_names(table) -> None:
+    items = list(
+        scan_all(
+            table,
+            FilterExpression=~Attr("businessId").begins_with(NAME_KEY_PREFIX)
+            & Attr("businessName").exists(),
+        )
+    )
+    # Oldest business keeps the name when legacy data has duplicates.
+    items.sort(key=lambda b: b.get("createdAt", ""))
+
+    written = 0
+    for item in items:
+        try:
+            table.put_item(
+                Item={**name_key(item["businessName"]), NAME_TARGET_ATTR: item["businessId"]},
+                ConditionExpression=Attr("businessId").not_exists(),
+            )
+            written += 1
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            existing = table.get_item(Key=name_key(item["businessName"]))["Item"]
+            if name_target(existing) != item["businessId"]:
+                print(
+                    f"{table.name}: name '{item['businessName']}' of {item['businessId']} "
+                    f"is already held by {name_target(existing)}"
+                )
+    print(f"{table.name}: wrote {written} business name item(s)")
+
+    # Earlier name items embedded a copy of the business; keep only its id.
+    converted = 0
+    for existing in scan_all(
+        table,
+        FilterExpression=Attr("businessId").begins_with(NAME_KEY_PREFIX)
+        & Attr(NAME_TARGET_ATTR).not_exists(),
+    ):
+        table.update_item(
+            Key={"businessId": existing["businessId"]},
+            UpdateExpression=f"SET {NAME_TARGET_ATTR} = :t REMOVE business",
+            ExpressionAttributeValues={":t": name_target(existing)},
+        )
+        converted += 1
+    print(f"{table.name}: converted {converted} legacy business name item(s)")
+
+
+def _user_zones():
+    zones = {}
+
+    def zone_for(user_id):
+        if user_id not in zones:
+            user = users_table().get_item(Key={"userId": user_id}).get("Item") if user_id else None
+            zones[user_id] = user_timezone(user or {})
+        return zones[user_id]
+
+    return zone_for
+
+
+def backfill_reminders(table) -> None:
+    zone_for = _user_zones()
+    written = 0
+    for item in scan_all(
+        table,
+        FilterExpression=Attr("reminderAt").not_exists()
+        & Attr("reminderSentAt").not_exists()
+        & Attr("startTime").exists(),
+    ):
+        fields = reminder_fields(item["startTime"], zone_for(item.get("userId")))
+        if not fields:
+            continue
+        table.update_item(
+            Key={"businessId": item["businessId"], "appointmentId": item["appointmentId"]},
+            UpdateExpression="SET reminderAt = :ra, reminderBucket = :rb",
+            ConditionExpression=Attr("reminderAt").not_exists(),
+            ExpressionAttributeValues={
+                ":ra": fields["reminderAt"],
+                ":rb": fields["reminderBucket"],
+            },
+        )
+        written += 1
+    print(f"{table.name}: scheduled reminders on {written} upcoming appointment(s)")
+
+
+def backfill_slot_claims(table) -> None:
+    zone_for = _user_zones()
+    now = datetime.now(timezone.utc)
+    claimed = 0
+    conflicts = 0
+    for item in scan_all(
+        table,
+        FilterExpression=Attr("slotKeys").not_exists() & Attr("status").ne("cancelled"),
+    ):
+        zone = zone_for(item.get("userId"))
+        try:
+            start_utc = parse_dt_utc(item["startTime"], zone)
+            end_utc = parse_dt_utc(item["endTime"], zone)
+            keys = slot_keys(item["userId"], start_utc, end_utc)
+        except (KeyError, ValueError):
+            continue
+        if end_utc <= now:
+            continue
+        try:
+            transact_write([
+                {"Update": {
+                    "TableName": table.name,
+                    "Key": {"businessId": item["businessId"], "appointmentId": item["appointmentId"]},
+                    "UpdateExpression": "SET slotKeys = :k",
+                    "ConditionExpression": "attribute_not_exists(slotKeys)",
+                    "ExpressionAttributeValues": {":k": keys},
+                }},
+                *claim_actions(keys, item, end_utc),
+            ])
+            claimed += 1
+        except ClientError as e:
+            if not is_slot_conflict(e, range(1, len(keys) + 1)):
+                raise
+            conflicts += 1
+            print(f"{table.name}: {item['appointmentId']} overlaps an existing booking")
+    print(f"{table.name}: claimed slots for {claimed} appointment(s), {conflicts} overlap(s)")
+
+
+def main() -> None:
+    appointments = appointments_table()
+    ensure_gsi(appointments, DDB_APPTS_START_INDEX, "businessId", "startTime")
+    backfill_reminders(appointments)
+    ensure_slots_table()
+    backfill_slot_claims(appointments)
+    ensure_gsi(appointments, DDB_APPTS_REMINDER_INDEX, "reminderBucket", "reminderAt")
+
+    businesses = businesses_table()
+    backfill_business_owners(businesses)
+    backfill_business_names(businesses)
+    ensure_gsi(businesses, DDB_BUSINESSES_OWNER_INDEX, "ownerUserId")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Prompt-size and latency benchmark for the assistant (app.agent.run_agent).
+
+Runs one "what's on today?" chat turn against an OpenAI-compatible fake that
+first asks for get_today_appointments and then answers. DynamoDB is moto,
+seeded with --rows appointments for today, and the chat carries --history
+earlier messages. The fake bills prompt tokens with the same estimate the app
+budgets with (app.agent_context.estimate_tokens) and answers after
+--base-ms plus --ms-per-1k-tokens of simulated prefill, so latency follows
+prompt size the way a hosted model's does.
+
+Two modes are compared:
+
+  * raw: tool results json-dumped as returned, full history (the path before
+    context compaction);
+  * compact: the shipped path (projected, budgeted tool results and trimmed
+    history).
+
+Usage (from backend/, needs requirements-dev.txt for moto):
+    python -m scripts.prompt_bench [--rows 100] [--history 40] [--runs 3]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+# Everything below talks to moto and a local fake model, never to AWS/OpenAI.
+os.environ.update(
+    AWS_ACCESS_KEY_ID="bench",
+    AWS_SECRET_ACCESS_KEY="bench",
+    AWS_REGION="us-east-1",
+    AWS_DEFAULT_REGION="us-east-1",
+    OPENAI_API_KEY="sk-bench",
+    REMINDERS_ENABLED="false",
+)
+os.environ.pop("AWS_PROFILE", None)
+
+import uvicorn  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+from app import agent, agent_tools  # noqa: E402
+from app.agent_context import estimate_tokens, serialize  # noqa: E402
+from app.core.config import DDB_APPTS_START_INDEX, DDB_TABLE_APPOINTMENTS, DDB_TABLE_BUSINESSES  # noqa: E402
+from app.core.ddb import get_ddb  # noqa: E402
+from app.models.appointment import AppointmentCreate  # noqa: E402
+from app.services.appointment_service import build_appointment_item  # noqa: E402
+
+USER = {"userId": "bench-user", "email": "owner@example.com", "defaultBusinessId": "bench-biz"}
+ANSWER = "You have a full day; the first appointment is at 00:30."
+
+
+class FakeModel:
+    def __init__(self, base_ms: float, ms_per_1k_tokens: float):
+        self.base_ms = base_ms
+        self.ms_per_1k_tokens = ms_per_1k_tokens
+        self.prompt_tokens: List[int] = []
+        self.tool_tokens: List[int] = []
+        self.app = FastAPI()
+        self.app.post("/v1/chat/completions")(self.completions)
+
+    async def completions(self, body: dict):
+        tokens = estimate_tokens(serialize(body["messages"]))
+        self.prompt_tokens.append(tokens)
+        self.tool_tokens.extend(
+            estimate_tokens(m["content"]) for m in body["messages"] if m["role"] == "tool"
+        )
+        await asyncio.sleep((self.base_ms + tokens / 1000 * self.ms_per_1k_tokens) / 1000)
+        if body["messages"][-1]["role"] == "tool":
+            message = {"role": "assistant", "content": ANSWER}
+        else:
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": f"call-{len(self.prompt_tokens)}",
+                    "type": "function",
+                    "function": {"name": "get_today_appointments", "arguments": "{}"},
+                }],
+            }
+        return {
+            "id": "bench",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": tokens, "completion_tokens": 10, "total_tokens": tokens + 10},
+        }
+
+    def start(self) -> str:
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        server = uvicorn.Server(uvicorn.Config(self.app, log_level="error", ws="none"))
+        threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True).start()
+        while not server.started:
+            time.sleep(0.01)
+        return f"http://127.0.0.1:{sock.getsockname()[1]}/v1"
+
+
+def seed(rows: int) -> None:
+    client = get_ddb().meta.client
+    client.create_table(
+        TableName=DDB_TABLE_BUSINESSES,
+        KeySchema=[{"AttributeName": "businessId", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "businessId", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    client.create_table(
+        TableName=DDB_TABLE_APPOINTMENTS,
+        KeySchema=[
+            {"AttributeName": "businessId", "KeyType": "HASH"},
+            {"AttributeName": "appointmentId", "KeyType": "RANGE"},
+        ],
+        AttributeDefinitions=[
+            {"AttributeName": "businessId", "AttributeType": "S"},
+            {"AttributeName": "appointmentId", "AttributeType": "S"},
+            {"AttributeName": "startTime", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[{
+            "IndexName": DDB_APPTS_START_INDEX,
+            "KeySchema": [
+                {"AttributeName": "businessId", "KeyType": "HASH"},
+                {"AttributeName": "startTime", "KeyType": "RANGE"},
+            ],
+            "Projection": {"ProjectionType": "ALL"},
+        }],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    day = datetime.now(timezone.utc).replace(hour=0, minute=30, second=0, microsecond=0)
+    with get_ddb().Table(DDB_TABLE_APPOINTMENTS).batch_writer() as batch:
+        for n in range(rows):
+            start = day + timedelta(minutes=10 * (n % 140))
+            item, _ = build_appointment_item(USER, AppointmentCreate(
+                title=f"Consultation {n}",
+                client_name=f"Client {n}",
+                email=f"client{n}@example.com",
+                start_time=start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                end_time=(start + timedelta(minutes=10)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                location="Main office, room 2",
+                notes="Prefers morning slots; bring the intake form and last visit's summary.",
+            ))
+            batch.put_item(Item=item)
+
+
+def chat_history(turns: int) -> List[Dict[str, str]]:
+    return [
+        {
+            "role": "user" if n % 2 == 0 else "assistant",
+            "content": f"Message {n}: " + "could you check my schedule and move things around a bit? " * 3,
+        }
+        for n in range(turns)
+    ]
+
+
+COMPACT_TOOL_RESULT = agent_tools.compact_tool_result
+TRUNCATE_HISTORY = agent.truncate_history
+
+
+def set_mode(mode: str) -> None:
+    if mode == "raw":
+        agent_tools.compact_tool_result = lambda result, zone, budget: json.dumps(result, default=str)
+        agent.truncate_history = lambda history, budget: history
+    else:
+        agent_tools.compact_tool_result = COMPACT_TOOL_RESULT
+        agent.truncate_history = TRUNCATE_HISTORY
+
+
+async def run(model: FakeModel, mode: str, history: List[Dict[str, str]], runs: int) -> Dict[str, float]:
+    set_mode(mode)
+    seconds, tokens, tool_tokens = [], [], []
+    for n in range(runs):
+        agent.answer_cache.clear()
+        model.prompt_tokens.clear()
+        model.tool_tokens.clear()
+        started = time.perf_counter()
+        output = await agent.run_agent(f"what's on today? ({mode} {n})", history, USER)
+        seconds.append(time.perf_counter() - started)
+        tokens.append(sum(model.prompt_tokens))
+        tool_tokens.append(sum(model.tool_tokens))
+        if output != ANSWER:
+            raise SystemExit(f"unexpected answer: {output!r}")
+    return {
+        "prompt_tokens": statistics.median(tokens),
+        "tool_tokens": statistics.median(tool_tokens),
+        "ms": statistics.median(seconds) * 1000,
+    }
+
+
+async def run_all(model: FakeModel, history: List[Dict[str, str]], runs: int) -> Dict[str, Dict[str, float]]:
+    # One event loop for every turn, as in the server: the OpenAI client's
+    # connection pool is tied to the loop it was first used on.
+    await run(model, "compact", history, 1)
+    return {mode: await run(model, mode, history, runs) for mode in ("raw", "compact")}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--history", type=int, default=40)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--base-ms", type=float, default=150.0)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=40.0)
+    args = parser.parse_args()
+
+    model = FakeModel(args.base_ms, args.ms_per_1k_tokens)
+    os.environ["OPENAI_BASE_URL"] = model.start()
+    agent.get_openai_client.cache_clear()
+    history = chat_history(args.history)
+
+    with mock_aws():
+        get_ddb.cache_clear()
+        seed(args.rows)
+        results = asyncio.run(run_all(model, history, args.runs))
+
+    print(f"{args.rows} appointments today, {args.history} history messages, median of {args.runs}:")
+    print(f"  {'mode':8} {'tool result':>12} {'prompt (all calls)':>19} {'latency':>10}")
+    for mode, r in results.items():
+        print(f"  {mode:8} {r['tool_tokens']:12,.0f} {r['prompt_tokens']:19,.0f} {r['ms']:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
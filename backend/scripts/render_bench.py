@@ -0,0 +1,73 @@
+"""
+Throughput benchmark for appointment email rendering (app.services.notification_service).
+
+Renders --count synthetic appointments per email kind through
+render_appointment_emails (subject, text and HTML, RSVP links included) with
+provider names supplied, so no DynamoDB or SES is involved. Reports the
+one-off template compile time and, per kind, the median emails per second.
+
+Usage (from backend/):
+    python -m scripts.render_bench [--count 2000] [--repeats 5]
+"""
+import argparse
+import os
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+# Rendering only reads settings; nothing here connects to AWS.
+os.environ.setdefault("COG_REGION", "us-east-1")
+os.environ.setdefault("COG_USER_POOL_ID", "us-east-1_bench")
+os.environ.setdefault("COG_CLIENT_ID", "bench-client")
+os.environ.setdefault("APPOINTMENT_RSVP_BASE_URL", "https://app.example.com")
+
+from app.services.notification_service import (  # noqa: E402
+    EMAIL_KINDS,
+    _templates,
+    render_appointment_emails,
+)
+
+PROVIDERS = {f"u{n}": f"Provider {n} & Partners" for n in range(10)}
+
+
+def synthetic_appointments(count: int) -> List[Dict]:
+    start = datetime(2030, 1, 7, 9, tzinfo=timezone.utc)
+    return [
+        {
+            "businessId": "bench-biz",
+            "appointmentId": f"a{n}",
+            "userId": f"u{n % len(PROVIDERS)}",
+            "title": f"Consultation <{n}>",
+            "inviteeEmail": f"client{n}@example.com",
+            "startTime": (start + timedelta(minutes=30 * n)).isoformat(),
+            "endTime": (start + timedelta(minutes=30 * n + 30)).isoformat(),
+            "rsvpToken": f"token-{n}",
+        }
+        for n in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    _templates()
+    print(f"Compiled templates in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    appointments = synthetic_appointments(args.count)
+    print(f"Median over {args.repeats} x {args.count} appointments:")
+    for kind in EMAIL_KINDS:
+        rates = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            messages = render_appointment_emails(kind, appointments, PROVIDERS)
+            rates.append(len(messages) / (time.perf_counter() - started))
+        print(f"  {kind:13} {statistics.median(rates):9,.0f} emails/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Latency benchmark for appointment prefix search (app.services.appointment_search).
+
+Builds one business's index over --size synthetic appointments (a few common
+names among thousands of random ones, so both crowded and sparse posting
+lists occur) and times each query in QUERIES: short prefixes, full names,
+multi-word queries and misses. Reports build time and, per query, the hit
+count and median/worst lookup time.
+
+Usage (from backend/):
+    python -m scripts.search_bench [--size 50000] [--runs 50] [--max-ms 10]
+
+With --max-ms the script exits non-zero when any query's worst lookup is over
+budget, so CI can hold the search latency.
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+from typing import Dict, List
+
+# The index is pure Python; settings are only read, never used to connect.
+os.environ.setdefault("COG_REGION", "us-east-1")
+os.environ.setdefault("COG_USER_POOL_ID", "us-east-1_bench")
+os.environ.setdefault("COG_CLIENT_ID", "bench-client")
+
+from app.services.appointment_search import AppointmentSearchIndex  # noqa: E402
+
+QUERIES = ["a", "j", "ja", "jane", "jane do", "JOHN SMITH", "gar", "consult", "example", "m k", "zzzz"]
+COMMON_FIRST = ["Jane", "John", "Maria", "Mohammed", "Li", "Ana", "Peter", "Olga", "Sam", "Priya"]
+COMMON_LAST = ["Doe", "Smith", "Garcia", "Khan", "Wang", "Novak"]
+TITLES = ["Consult", "Follow-up", "Intake", "Cleaning"]
+
+
+def synthetic_appointments(size: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+
+    def word(n: int) -> str:
+        return "".join(rng.choices(string.ascii_lowercase, k=n)).title()
+
+    first = [word(6) for _ in range(2000)]
+    last = [word(7) for _ in range(3000)]
+    items = []
+    for n in range(size):
+        # A third of clients share a handful of names, like real client lists.
+        common = rng.random() < 0.3
+        f = rng.choice(COMMON_FIRST if common else first)
+        l = rng.choice(COMMON_LAST if common else last)
+        items.append({
+            "appointmentId": f"a{n}",
+            "businessId": "bench-biz",
+            "clientName": f"{f} {l}",
+            "title": rng.choice(TITLES),
+            "inviteeEmail": f"{f}.{l}{n}@example.com".lower(),
+            "startTime": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(8, 17):02d}:00:00Z",
+        })
+    return items
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    items = synthetic_appointments(args.size, args.seed)
+    started = time.perf_counter()
+    index = AppointmentSearchIndex(items)
+    print(f"Built index over {len(index):,} appointments in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    print(f"  {'query':14} {'hits':>5} {'median':>10} {'worst':>10}")
+    worst_overall = 0.0
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            hits = index.search(query, args.limit)
+            timings.append((time.perf_counter() - started) * 1000)
+        worst = max(timings)
+        worst_overall = max(worst_overall, worst)
+        print(f"  {query!r:14} {len(hits):5} {statistics.median(timings):7.3f} ms {worst:7.3f} ms")
+
+    if args.max_ms is not None and worst_overall > args.max_ms:
+        sys.exit(f"Slowest lookup {worst_overall:.2f} ms exceeds budget of {args.max_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Throughput benchmark for outbound email (app.core.email_ses).
+
+Sends --count messages two ways and reports messages per second:
+
+  * sequential: one send_email call after another, as the queue workers did
+    before bulk sends;
+  * bulk: send_bulk_email, concurrent sends sharing the process's
+    TokenBucket.
+
+By default SES is moto with --latency-ms of simulated round trip per call.
+Pass --endpoint (or set SES_ENDPOINT_URL) to hit a local SES stub instead;
+never point this at real SES. The send rate is --rate msgs/s
+(SES_MAX_SEND_RATE), so bulk throughput should sit at that rate (a little
+above it for short runs: the bucket starts with a second's worth of tokens)
+while sequential throughput is bounded by latency.
+
+Usage (from backend/, needs requirements-dev.txt for moto):
+    python -m scripts.ses_bench [--count 200] [--rate 50] [--latency-ms 40]
+"""
+import argparse
+import os
+import time
+from contextlib import nullcontext
+
+# Credentials and sender for moto or a local stub, never real AWS.
+os.environ.update(
+    AWS_ACCESS_KEY_ID="bench",
+    AWS_SECRET_ACCESS_KEY="bench",
+    AWS_REGION="us-east-1",
+    AWS_DEFAULT_REGION="us-east-1",
+    SES_FROM_EMAIL="bench@example.com",
+)
+os.environ.pop("AWS_PROFILE", None)
+
+from moto import mock_aws  # noqa: E402
+
+from app.core import email_ses  # noqa: E402
+
+
+def messages(count: int):
+    return [
+        {"to": f"client{n}@example.com", "subject": "Reminder", "body_text": f"See you soon, #{n}."}
+        for n in range(count)
+    ]
+
+
+def add_latency(latency_ms: float) -> None:
+    def sleep(**kwargs):
+        time.sleep(latency_ms / 1000)
+
+    # Ahead of moto's handler, which answers the request.
+    email_ses.get_ses_client().meta.events.register_first("before-send.ses", sleep)
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=50.0)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--endpoint", default=os.getenv("SES_ENDPOINT_URL"))
+    args = parser.parse_args()
+
+    os.environ["SES_MAX_SEND_RATE"] = str(args.rate)
+    if args.endpoint:
+        os.environ["SES_ENDPOINT_URL"] = args.endpoint
+
+    with nullcontext() if args.endpoint else mock_aws():
+        email_ses.get_ses_client.cache_clear()
+        if not args.endpoint:
+            email_ses.get_ses_client().verify_email_identity(EmailAddress=os.environ["SES_FROM_EMAIL"])
+            add_latency(args.latency_ms)
+
+        # Fresh buckets per mode, so the second run doesn't inherit the first's debt.
+        email_ses._limiter = None
+        batch = messages(args.count)
+        sequential = timed(lambda: [email_ses.send_email(m["to"], m["subject"], m["body_text"]) for m in batch])
+        email_ses._limiter = None
+        results = []
+        bulk = timed(lambda: results.extend(email_ses.send_bulk_email(batch)))
+
+    failed = sum(not r["ok"] for r in results)
+    target = args.endpoint or f"moto, {args.latency_ms:.0f} ms per call"
+    print(f"{args.count} messages at SES_MAX_SEND_RATE={args.rate:g} ({target}):")
+    print(f"  sequential {args.count / sequential:8.1f} msgs/s")
+    print(f"  bulk       {args.count / bulk:8.1f} msgs/s  ({failed} failed)")
+
+
+if __name__ == "__main__":
+    main()
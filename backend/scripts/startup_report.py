@@ -0,0 +1,111 @@
+"""
+Cold-start report for the API entrypoint (index.py).
+
+Every measurement runs in a fresh interpreter, so nothing is warm:
+
+  * an import-time breakdown of `import index` (python -X importtime), by
+    top-level package and by app module;
+  * the time from process spawn to the first /health response, served
+    in-process through the ASGI app with its lifespan.
+
+Usage (from backend/):
+    python -m scripts.startup_report [--runs 5] [--top 12] [--max-ms 1500]
+
+With --max-ms the script exits non-zero when the median time to first /health
+is over budget, so CI can hold the cold-start number.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+_FIRST_REQUEST = """
+import json, sys, time
+spawned = float(sys.argv[1])
+started = time.time()
+import index
+imported = time.time()
+from starlette.testclient import TestClient
+with TestClient(index.app) as client:
+    status = client.get("/health").status_code
+done = time.time()
+print(json.dumps({
+    "interpreter_ms": (started - spawned) * 1000,
+    "import_ms": (imported - started) * 1000,
+    "first_health_ms": (done - spawned) * 1000,
+    "status": status,
+}))
+"""
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+
+
+def import_breakdown() -> Tuple[Dict[str, float], Dict[str, float]]:
+    proc = _run(["-X", "importtime", "-c", "import index"])
+    if proc.returncode != 0:
+        sys.exit(proc.stderr)
+    by_package: Dict[str, float] = defaultdict(float)
+    app_modules: Dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        by_package[name.split(".")[0]] += int(self_us) / 1000
+        if name == "index" or name.startswith("app."):
+            app_modules[name] = int(cumulative_us) / 1000
+    return by_package, app_modules
+
+
+def first_request() -> Dict[str, float]:
+    proc = _run(["-c", _FIRST_REQUEST, repr(time.time())])
+    if proc.returncode != 0:
+        sys.exit(proc.stderr)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _print_top(title: str, rows: Dict[str, float], top: int) -> None:
+    print(title)
+    for name, ms in sorted(rows.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"  {ms:9.1f} ms  {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    # Untimed warm-up so .pyc compilation is not counted as cold start.
+    first_request()
+
+    by_package, app_modules = import_breakdown()
+    _print_top("Import self time by top-level package:", by_package, args.top)
+    _print_top("Cumulative import time of app modules:", app_modules, args.top)
+
+    runs = [first_request() for _ in range(args.runs)]
+    if any(r["status"] != 200 for r in runs):
+        sys.exit("/health did not return 200")
+    print(f"Cold start over {args.runs} run(s), median:")
+    for key in ("interpreter_ms", "import_ms", "first_health_ms"):
+        print(f"  {key:16} {statistics.median(r[key] for r in runs):9.1f} ms")
+
+    median = statistics.median(r["first_health_ms"] for r in runs)
+    if args.max_ms is not None and median > args.max_ms:
+        sys.exit(f"Cold start {median:.0f} ms exceeds budget of {args.max_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
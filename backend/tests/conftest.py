@@ -0,0 +1,130 @@
+import os
+
+# Settings are read from the environment at import time; point everything at
+# moto before any app module loads.
+os.environ.update(
+    AWS_REGION="us-east-1",
+    AWS_DEFAULT_REGION="us-east-1",
+    AWS_ACCESS_KEY_ID="testing",
+    AWS_SECRET_ACCESS_KEY="testing",
+    COG_REGION="us-east-1",
+    COG_USER_POOL_ID="us-east-1_test",
+    COG_CLIENT_ID="test-client",
+    OPENAI_API_KEY="sk-test",
+    SES_FROM_EMAIL="noreply@example.com",
+    REMINDERS_ENABLED="false",
+)
+os.environ.pop("AWS_PROFILE", None)
+
+import threading
+
+import boto3
+import pytest
+from moto import mock_aws
+from moto.dynamodb.models import DynamoDBBackend
+
+from app.core import config
+from app.core.ddb import get_ddb
+
+
+def _create_tables(client) -> None:
+    def table(name, keys, attrs, indexes=()):
+        kwargs = {}
+        if indexes:
+            kwargs["GlobalSecondaryIndexes"] = [
+                {
+                    "IndexName": index,
+                    "KeySchema": [
+                        {"AttributeName": a, "KeyType": t} for a, t in zip(index_keys, ("HASH", "RANGE"))
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+                for index, index_keys in indexes
+            ]
+        client.create_table(
+            TableName=name,
+            KeySchema=[{"AttributeName": a, "KeyType": t} for a, t in zip(keys, ("HASH", "RANGE"))],
+            AttributeDefinitions=[{"AttributeName": a, "AttributeType": "S"} for a in attrs],
+            BillingMode="PAY_PER_REQUEST",
+            **kwargs,
+        )
+
+    table(config.DDB_TABLE_USERS, ["userId"], ["userId"])
+    table(
+        config.DDB_TABLE_BUSINESSES,
+        ["businessId"],
+        ["businessId", "ownerUserId"],
+        [(config.DDB_BUSINESSES_OWNER_INDEX, ["ownerUserId"])],
+    )
+    table(
+        config.DDB_TABLE_APPOINTMENTS,
+        ["businessId", "appointmentId"],
+        ["businessId", "appointmentId", "startTime", "reminderBucket", "reminderAt"],
+        [
+            (config.DDB_APPTS_START_INDEX, ["businessId", "startTime"]),
+            (config.DDB_APPTS_REMINDER_INDEX, ["reminderBucket", "reminderAt"]),
+        ],
+    )
+    table(config.DDB_TABLE_SLOTS, ["slotKey"], ["slotKey"])
+
+
+def _clear_process_caches() -> None:
+    from app.services.appointment_search import _indexes
+    from app.services.user_cache import user_cache
+    from app.services.working_hours_service import _get_table_keys, working_hours_cache
+
+    for cache in (_indexes, user_cache, working_hours_cache):
+        cache.clear()
+    _get_table_keys.cache_clear()
+
+
+def _serialize_writes(monkeypatch) -> None:
+    # DynamoDB evaluates a condition and applies the write atomically; moto
+    # does neither under a lock, so concurrent conditional writes could both
+    # pass their checks.
+    lock = threading.RLock()
+    for name in ("put_item", "update_item", "delete_item", "transact_write_items"):
+        def locked(self, *args, _write=getattr(DynamoDBBackend, name), **kwargs):
+            with lock:
+                return _write(self, *args, **kwargs)
+
+        monkeypatch.setattr(DynamoDBBackend, name, locked)
+
+
+@pytest.fixture
+def ddb(monkeypatch):
+    _serialize_writes(monkeypatch)
+    with mock_aws():
+        get_ddb.cache_clear()
+        _clear_process_caches()
+        _create_tables(boto3.client("dynamodb", region_name="us-east-1"))
+        yield get_ddb()
+        get_ddb.cache_clear()
+        _clear_process_caches()
+
+
+@pytest.fixture
+def sent_emails(monkeypatch):
+    # Email jobs are recorded instead of rendered and sent through SES.
+    from app.services.email_queue import email_dispatcher
+
+    sent = []
+    monkeypatch.setitem(email_dispatcher.handlers, "appointment_email", sent.append)
+    monkeypatch.setitem(
+        email_dispatcher.handlers,
+        "appointment_emails",
+        lambda payload: sent.extend(
+            {"template": payload["template"], "appointment": a} for a in payload["appointments"]
+        ),
+    )
+    return sent
+
+
+@pytest.fixture
+def user(ddb):
+    item = {"userId": "u1", "email": "owner@example.com", "defaultBusinessId": "b1"}
+    ddb.Table(config.DDB_TABLE_USERS).put_item(Item=item)
+    ddb.Table(config.DDB_TABLE_BUSINESSES).put_item(
+        Item={"businessId": "b1", "ownerUserId": "u1", "businessName": "Test Shop"}
+    )
+    return item
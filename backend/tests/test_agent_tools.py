@@ -0,0 +1,65 @@
+import asyncio
+import itertools
+
+import pytest
+
+from app import agent_tools
+from app.agent_tools import execute_tool_calls
+
+USER = {"userId": "u1", "defaultBusinessId": "b1"}
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    log = []
+    counter = itertools.count()
+
+    def today(current_user):
+        log.append("today")
+        return {"read": next(counter)}
+
+    def reschedule(current_user, appointment_id, start_time, end_time):
+        log.append("resched")
+        return {"appointmentId": appointment_id, "startTime": start_time}
+
+    monkeypatch.setitem(agent_tools.TOOL_HANDLERS, "get_today_appointments", today)
+    monkeypatch.setitem(agent_tools.TOOL_HANDLERS, "reschedule_appointment", reschedule)
+    return log
+
+
+def call(i, name, arguments="{}"):
+    return {"id": f"c{i}", "type": "function", "function": {"name": name, "arguments": arguments}}
+
+
+RESCHEDULE = '{"appointment_id": "a1", "start_time": "2030-01-07T11:00", "end_time": "2030-01-07T11:30"}'
+
+
+def test_identical_calls_in_a_turn_run_once(calls):
+    memo = {}
+
+    async def turn():
+        first = await execute_tool_calls(
+            [call(1, "get_today_appointments"), call(2, "get_today_appointments")], USER, memo
+        )
+        second = await execute_tool_calls([call(3, "get_today_appointments")], USER, memo)
+        return first, second
+
+    first, second = asyncio.run(turn())
+    assert calls == ["today"]
+    assert first[0] == first[1] == second[0]
+
+
+def test_reads_after_a_write_are_not_served_from_the_memo(calls):
+    memo = {}
+
+    async def turn():
+        before = await execute_tool_calls([call(1, "get_today_appointments")], USER, memo)
+        await execute_tool_calls([call(2, "reschedule_appointment", RESCHEDULE)], USER, memo)
+        after = await execute_tool_calls([call(3, "get_today_appointments")], USER, memo)
+        return before[0], after[0]
+
+    before, after = asyncio.run(turn())
+    assert calls == ["today", "resched", "today"]
+    assert before != after
+    # The write is still recorded, so the answer is not cached.
+    assert any(name in agent_tools.MUTATING_TOOLS for name, _ in memo)
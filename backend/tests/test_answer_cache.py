@@ -0,0 +1,48 @@
+import asyncio
+
+from app.agent import answer_cache_key
+from app.core.config import DDB_TABLE_BUSINESSES
+from app.models.appointment import AppointmentCreate, AppointmentUpdate
+from app.services.appointment_service import (
+    create_appointment,
+    update_appointment,
+    update_appointment_status,
+)
+from app.services.appointment_versions import appointments_version
+
+
+def key(user):
+    return asyncio.run(answer_cache_key("what's on today?", [], user))
+
+
+def test_every_appointment_write_changes_the_cache_key(user, sent_emails):
+    keys = [key(user)]
+    appt = create_appointment(user, AppointmentCreate(
+        title="Cut",
+        client_name="Ann",
+        email="ann@example.com",
+        start_time="2030-01-07T18:00:00Z",
+        end_time="2030-01-07T18:30:00Z",
+    ))
+    keys.append(key(user))
+    update_appointment(user, appt["appointmentId"], AppointmentUpdate(title="Trim"))
+    keys.append(key(user))
+    update_appointment(user, appt["appointmentId"], AppointmentUpdate(
+        start_time="2030-01-07T19:00:00Z", end_time="2030-01-07T19:30:00Z"
+    ))
+    keys.append(key(user))
+    update_appointment_status("b1", appt["appointmentId"], "cancelled")
+    keys.append(key(user))
+    assert len(set(keys)) == len(keys)
+
+
+def test_version_is_shared_through_dynamodb(ddb, user, sent_emails):
+    # Another instance's write is visible here: the stamp lives on the
+    # business item, not in process memory.
+    ddb.Table(DDB_TABLE_BUSINESSES).update_item(
+        Key={"businessId": "b1"},
+        UpdateExpression="ADD appointmentsVersion :n",
+        ExpressionAttributeValues={":n": 5},
+    )
+    assert appointments_version("b1") == 5
+    assert key(user)[2] == 5
@@ -0,0 +1,68 @@
+import asyncio
+
+from app.core.config import DDB_TABLE_APPOINTMENTS, DDB_TABLE_SLOTS
+from app.services import appointment_import
+from app.services.appointment_import import import_appointments
+
+CSV = b"""Title,Client Name,Email,Start,End,Notes
+Cut,Ann,ann@example.com,2030-01-07T18:00:00Z,2030-01-07T19:00:00Z,"two
+lines"
+Overlap,Bob,bob@example.com,2030-01-07T18:30:00Z,2030-01-07T19:30:00Z,
+Bad,Cy,not-an-email,2030-01-07T20:00:00Z,2030-01-07T21:00:00Z,
+"""
+
+
+def run_import(user, body: bytes, fmt: str = "csv", notify: str = "none"):
+    async def chunks():
+        for i in range(0, len(body), 16):
+            yield body[i:i + 16]
+
+    return asyncio.run(import_appointments(user, chunks(), fmt, notify))
+
+
+def test_csv_import_validates_and_writes_rows(ddb, user):
+    result = run_import(user, CSV)
+    assert (result["rows"], result["imported"], result["failed"]) == (3, 1, 2)
+    assert [e["row"] for e in result["errors"]] == [2, 3]
+
+    items = ddb.Table(DDB_TABLE_APPOINTMENTS).scan()["Items"]
+    assert [i["notes"] for i in items] == ["two\nlines"]
+    assert ddb.Table(DDB_TABLE_SLOTS).scan(Select="COUNT")["Count"] == 4
+
+
+def test_queued_notifications_go_out_as_one_batch_per_chunk(ddb, user, monkeypatch):
+    batches = []
+    monkeypatch.setattr(
+        appointment_import,
+        "enqueue_appointment_emails",
+        lambda items, template="confirmation": batches.append([i["inviteeEmail"] for i in items]),
+    )
+    body = b"title,client_name,email,start_time,end_time\n" + b"".join(
+        f"Cut,C{n},c{n}@example.com,2030-01-{7 + n:02d}T18:00:00Z,2030-01-{7 + n:02d}T18:30:00Z\n".encode()
+        for n in range(3)
+    )
+    result = run_import(user, body, notify="queue")
+
+    assert result["imported"] == 3
+    assert batches == [["c0@example.com", "c1@example.com", "c2@example.com"]]
+
+
+def test_row_split_across_batches_is_undone_when_a_batch_fails(ddb, user, monkeypatch):
+    # Eight hours is 32 claims plus the appointment: two BatchWriteItem calls.
+    body = b"title,client_name,email,start_time,end_time\nDay,Ann,ann@example.com,2030-01-07T09:00:00Z,2030-01-07T17:00:00Z\n"
+    write = appointment_import.batch_write
+    calls = []
+
+    def second_call_unprocessed(request_items, max_attempts):
+        calls.append(request_items)
+        if len(calls) == 2:
+            return request_items
+        return write(request_items, max_attempts)
+
+    monkeypatch.setattr(appointment_import, "batch_write", second_call_unprocessed)
+    result = run_import(user, body)
+
+    assert len(calls) == 2
+    assert (result["imported"], result["failed"]) == (0, 1)
+    assert ddb.Table(DDB_TABLE_SLOTS).scan(Select="COUNT")["Count"] == 0
+    assert ddb.Table(DDB_TABLE_APPOINTMENTS).scan(Select="COUNT")["Count"] == 0
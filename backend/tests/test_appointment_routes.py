@@ -0,0 +1,243 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_user_item
+from app.core.config import DDB_TABLE_APPOINTMENTS
+from app.core.ddb import encode_cursor
+from app.main import app
+from app.services import appointment_service
+from app.services.appointment_service import get_appointment_by_id
+
+
+@pytest.fixture
+def client(user):
+    app.dependency_overrides[get_current_user_item] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_current_user_item)
+
+
+@pytest.mark.parametrize("tz", ["Mars/Olympus_Mons", "", "../etc/passwd"])
+@pytest.mark.parametrize("path", ["/appointments", "/appointments/summary?date=2030-01-07"])
+def test_unknown_timezone_is_a_bad_request(client, path, tz):
+    resp = client.get(path, params={"tz": tz})
+    assert resp.status_code == 400
+    assert "timezone" in resp.json()["detail"]
+
+
+def test_known_timezone_is_accepted(client):
+    assert client.get("/appointments", params={"tz": "Europe/Berlin"}).status_code == 200
+    resp = client.get("/appointments/summary", params={"date": "2030-01-07", "tz": "Europe/Berlin"})
+    assert resp.status_code == 200
+    assert resp.json()["counts"]["total"] == 0
+
+
+def test_invalid_summary_date_is_a_bad_request(client):
+    resp = client.get("/appointments/summary", params={"date": "someday"})
+    assert resp.status_code == 400
+
+
+def put_appointments(ddb, business_id: str, starts) -> None:
+    with ddb.Table(DDB_TABLE_APPOINTMENTS).batch_writer() as batch:
+        for n, start in enumerate(starts):
+            batch.put_item(Item={
+                "businessId": business_id,
+                "appointmentId": f"{business_id}-{n:02d}",
+                "userId": "u1",
+                "title": "Cut",
+                "inviteeEmail": f"client{n}@example.com",
+                "startTime": start.isoformat(),
+                "endTime": (start + timedelta(minutes=30)).isoformat(),
+            })
+
+
+def hourly(start: datetime, count: int):
+    return [start + timedelta(hours=n) for n in range(count)]
+
+
+def page_through(client, limit: int, **params):
+    ids, cursor = [], None
+    while True:
+        resp = client.get("/appointments", params={**params, "limit": limit, "cursor": cursor})
+        assert resp.status_code == 200
+        body = resp.json()
+        assert len(body["items"]) <= limit
+        ids += [i["appointmentId"] for i in body["items"]]
+        cursor = body["nextCursor"]
+        if not cursor:
+            return ids
+
+
+DAY = datetime(2030, 1, 7, tzinfo=timezone.utc)
+
+
+def test_cursor_round_trips_over_the_table(client, ddb):
+    put_appointments(ddb, "b1", hourly(DAY, 7))
+    put_appointments(ddb, "b2", hourly(DAY, 3))
+
+    assert page_through(client, 3) == [f"b1-{n:02d}" for n in range(7)]
+
+
+def test_cursor_round_trips_over_a_window(client, ddb):
+    # The evening before falls inside the index range read for the window
+    # but is filtered out; pages still fill to the limit past those rows.
+    put_appointments(ddb, "b1", hourly(DAY - timedelta(hours=8), 16))
+
+    resp = client.get("/appointments", params={"from": "2030-01-07T00:00:00Z", "limit": 3})
+    assert [i["startTime"][:13] for i in resp.json()["items"]] == [
+        "2030-01-07T00", "2030-01-07T01", "2030-01-07T02",
+    ]
+    ids = page_through(client, 3, **{"from": "2030-01-07T00:00:00Z", "to": "2030-01-07T05:00:00Z"})
+    assert ids == [f"b1-{n:02d}" for n in range(8, 14)]
+
+
+@pytest.mark.parametrize("key", [
+    {"businessId": "b2", "appointmentId": "b2-00"},
+    {"businessId": "b1"},
+    {"businessId": "b1", "appointmentId": "b1-00", "extra": "x"},
+    {"businessId": "b1", "appointmentId": 5},
+])
+def test_cursor_for_another_business_or_shape_is_a_bad_request(client, ddb, key):
+    resp = client.get("/appointments", params={"limit": 2, "cursor": encode_cursor(key)})
+    assert resp.status_code == 400
+
+
+def test_table_cursor_is_rejected_by_a_window_listing(client, ddb):
+    put_appointments(ddb, "b1", hourly(DAY, 4))
+    cursor = client.get("/appointments", params={"limit": 2}).json()["nextCursor"]
+
+    resp = client.get("/appointments", params={"limit": 2, "cursor": cursor, "from": "2030-01-07T00:00:00Z"})
+    assert resp.status_code == 400
+    assert client.get("/appointments", params={"cursor": "not base64 json"}).status_code == 400
+
+
+def test_ndjson_streams_every_row_one_per_line(client, ddb):
+    put_appointments(ddb, "b1", hourly(DAY, 5))
+
+    resp = client.get("/appointments", params={"format": "ndjson", "limit": 2})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = resp.text.splitlines()
+    assert resp.text.endswith("\n")
+    assert [json.loads(line)["appointmentId"] for line in lines] == [f"b1-{n:02d}" for n in range(5)]
+
+
+def test_ndjson_honours_the_window(client, ddb):
+    put_appointments(ddb, "b1", hourly(DAY - timedelta(hours=2), 6))
+
+    resp = client.get("/appointments", params={
+        "format": "ndjson", "from": "2030-01-07T00:00:00Z", "to": "2030-01-07T02:00:00Z",
+    })
+    assert [json.loads(line)["startTime"][:13] for line in resp.text.splitlines()] == [
+        "2030-01-07T00", "2030-01-07T01", "2030-01-07T02",
+    ]
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    out = []
+    monkeypatch.setattr(
+        appointment_service,
+        "enqueue_appointment_email",
+        lambda item, template: out.append((item["appointmentId"], template)),
+    )
+    return out
+
+
+@pytest.fixture
+def booked(client, queued):
+    resp = client.post("/appointments", json={
+        "title": "Cut",
+        "client_name": "Ann",
+        "email": "ann@example.com",
+        "start_time": "2030-01-07T18:00:00Z",
+        "end_time": "2030-01-07T18:30:00Z",
+    })
+    assert resp.status_code == 200
+    queued.clear()
+    return resp.json()
+
+
+def test_patch_fields_bumps_the_version_without_email(client, booked, queued):
+    resp = client.patch(f"/appointments/{booked['appointmentId']}", json={"title": "Trim", "version": booked["version"]})
+    assert resp.status_code == 200
+    assert resp.json()["title"] == "Trim"
+    assert resp.json()["version"] == booked["version"] + 1
+    assert queued == []
+
+
+def test_patch_times_reschedules_and_emails(client, booked, queued):
+    path = f"/appointments/{booked['appointmentId']}"
+    resp = client.patch(path, json={
+        "start_time": "2030-01-07T19:00:00Z", "end_time": "2030-01-07T19:30:00Z",
+    })
+    assert resp.status_code == 200
+    assert resp.json()["startTime"] == "2030-01-07T19:00:00Z"
+    assert queued == [(booked["appointmentId"], "reschedule")]
+
+    # Same times again: nothing moved, nobody is told.
+    resp = client.patch(path, json={
+        "start_time": "2030-01-07T19:00:00Z", "end_time": "2030-01-07T19:30:00Z",
+    })
+    assert resp.status_code == 200
+    assert queued == [(booked["appointmentId"], "reschedule")]
+
+
+@pytest.mark.parametrize("change", [
+    {"title": "Trim"},
+    {"start_time": "2030-01-07T19:00:00Z", "end_time": "2030-01-07T19:30:00Z"},
+])
+def test_patch_with_a_stale_version_is_a_conflict(client, booked, queued, change):
+    path = f"/appointments/{booked['appointmentId']}"
+    read = booked["version"]
+    assert client.patch(path, json={"notes": "first", "version": read}).status_code == 200
+
+    resp = client.patch(path, json={**change, "version": read})
+    assert resp.status_code == 409
+    current = client.get("/appointments").json()["items"][0]
+    assert (current["title"], current["startTime"], current["version"]) == ("Cut", "2030-01-07T18:00:00Z", read + 1)
+    assert queued == []
+
+
+def test_patch_unknown_appointment_is_not_found(client, queued):
+    assert client.patch("/appointments/nope", json={"title": "Trim"}).status_code == 404
+
+
+def rsvp(client, appointment, choice, token=None):
+    return client.get("/appointments/rsvp", params={
+        "businessId": appointment["businessId"],
+        "appointmentId": appointment["appointmentId"],
+        "token": token or rsvp_token(appointment),
+        "choice": choice,
+    })
+
+
+def rsvp_token(appointment):
+    return get_appointment_by_id(appointment["businessId"], appointment["appointmentId"])["rsvpToken"]
+
+
+def test_rsvp_needs_the_appointments_token(client, booked, queued):
+    assert rsvp(client, booked, "accepted", token="guess").status_code == 400
+    assert client.get("/appointments").json()["items"][0]["status"] == "pending"
+
+    resp = rsvp(client, booked, "accepted")
+    assert resp.status_code == 200
+    assert client.get("/appointments").json()["items"][0]["status"] == "confirmed"
+    assert queued == []
+
+
+def test_rsvp_decline_cancels_once_and_emails(client, booked, queued):
+    assert rsvp(client, booked, "declined").status_code == 200
+    assert client.get("/appointments").json()["items"][0]["status"] == "cancelled"
+    assert queued == [(booked["appointmentId"], "cancellation")]
+
+    # The link is spent once the appointment is cancelled.
+    assert rsvp(client, booked, "accepted").status_code == 409
+    assert queued == [(booked["appointmentId"], "cancellation")]
+
+
+def test_rsvp_for_unknown_appointment_is_not_found(client, queued):
+    resp = rsvp(client, {"businessId": "b1", "appointmentId": "nope"}, "accepted", token="t")
+    assert resp.status_code == 404
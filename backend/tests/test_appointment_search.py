@@ -0,0 +1,38 @@
+import random
+
+from app.services.appointment_search import AppointmentSearchIndex, _item_tokens, tokenize
+
+
+def brute_force(docs, query, limit):
+    words = tokenize(query)
+    hits = [d for d in docs.values() if all(any(t.startswith(w) for t in _item_tokens(d)) for w in words)]
+    hits.sort(key=lambda d: (d["startTime"], d["appointmentId"]), reverse=True)
+    return [d["appointmentId"] for d in hits[:limit]]
+
+
+def test_index_matches_a_full_scan_through_upserts():
+    rng = random.Random(23)
+
+    def word():
+        return "".join(rng.choices("abcde", k=rng.randint(1, 5)))
+
+    items = [
+        {
+            "appointmentId": f"a{n}",
+            "clientName": f"{word()} {word()}",
+            "title": word(),
+            "inviteeEmail": f"{word()}@{word()}.com",
+            "startTime": f"2026-01-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00",
+        }
+        for n in range(3000)
+    ]
+    index = AppointmentSearchIndex(items)
+    docs = {i["appointmentId"]: i for i in items}
+
+    for n in range(300):
+        if n % 3 == 0:
+            moved = {**rng.choice(items), "clientName": f"{word()} {word()}", "startTime": f"2026-02-{rng.randint(1, 28):02d}T00:00"}
+            index.upsert(moved)
+            docs[moved["appointmentId"]] = moved
+        query = " ".join(word()[:rng.randint(1, 3)] for _ in range(rng.randint(1, 2)))
+        assert [d["appointmentId"] for d in index.search(query, 20)] == brute_force(docs, query, 20), query
@@ -0,0 +1,82 @@
+import asyncio
+import socket
+import threading
+import time
+
+import httpx
+import pytest
+import uvicorn
+from fastapi import FastAPI
+
+from app import agent
+from app.api.deps import get_current_user_item
+from app.main import app
+
+LLM_DELAY = 0.5
+PARALLEL = 10
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    # An OpenAI-compatible endpoint that takes LLM_DELAY to answer each call.
+    llm = FastAPI()
+    calls = []
+
+    @llm.post("/v1/chat/completions")
+    async def completions(body: dict):
+        calls.append(body)
+        await asyncio.sleep(LLM_DELAY)
+        return {
+            "id": "cmpl",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "You're free all day."},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(llm, log_level="error", ws="none"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{sock.getsockname()[1]}/v1")
+    agent.get_openai_client.cache_clear()
+    yield calls
+    server.should_exit = True
+    thread.join(5)
+    agent.get_openai_client.cache_clear()
+    agent.answer_cache.clear()
+
+
+def test_parallel_chats_do_not_serialize(user, fake_llm):
+    app.dependency_overrides[get_current_user_item] = lambda: user
+
+    async def chat_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            await client.post("/assistant/ui-chat", json={"message": "warm up"})
+            started = time.perf_counter()
+            responses = await asyncio.gather(*[
+                client.post("/assistant/ui-chat", json={"message": f"am I free on day {n}?"})
+                for n in range(PARALLEL)
+            ])
+            return responses, time.perf_counter() - started
+
+    try:
+        responses, elapsed = asyncio.run(chat_all())
+    finally:
+        app.dependency_overrides.pop(get_current_user_item)
+
+    assert [r.status_code for r in responses] == [200] * PARALLEL
+    assert responses[0].json() == {"output": "You're free all day."}
+    assert len(fake_llm) == PARALLEL + 1
+    # Serialized calls would take PARALLEL * LLM_DELAY.
+    assert elapsed < 3 * LLM_DELAY
@@ -0,0 +1,166 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app import agent
+from app.api.deps import get_current_user_item
+from app.main import app
+
+
+def text(content: str):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content, tool_calls=None))])
+
+
+def tool_call(call_id: str, name: str, arguments: str = "{}"):
+    tc = SimpleNamespace(index=0, id=call_id, function=SimpleNamespace(name=name, arguments=arguments))
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None, tool_calls=[tc]))])
+
+
+class FakeStream:
+    def __init__(self, chunks, hang: bool = False):
+        self.chunks = chunks
+        self.hang = hang
+        self.closed = False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+        if self.hang:
+            # A model that keeps generating until the stream is closed.
+            await asyncio.Event().wait()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    """Stands in for AsyncOpenAI: each create() serves the next canned stream."""
+
+    def __init__(self, streams):
+        self.streams = list(streams)
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.requests.append([dict(m) for m in kwargs["messages"]])
+        return self.streams.pop(0)
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    def install(*streams):
+        client = FakeClient(streams)
+        monkeypatch.setattr(agent, "get_openai_client", lambda: client)
+        return client
+
+    yield install
+    agent.answer_cache.clear()
+
+
+async def collect(user, message: str = "what's on today?"):
+    return [d async for d in agent.stream_agent(message, [], user)]
+
+
+def test_sse_frames_deltas_then_done(user, fake_openai):
+    fake_openai(FakeStream([text("You're "), text("free.")]))
+    app.dependency_overrides[get_current_user_item] = lambda: user
+
+    async def post():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/assistant/ui-chat/stream", json={"message": "hi"})
+
+    try:
+        resp = asyncio.run(post())
+    finally:
+        app.dependency_overrides.pop(get_current_user_item)
+
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert resp.text.endswith("\n\n")
+    frames = [f.split("\n") for f in resp.text.strip("\n").split("\n\n")]
+    assert frames == [
+        ['data: {"delta": "You\'re "}'],
+        ['data: {"delta": "free."}'],
+        ["event: done", "data: {}"],
+    ]
+
+
+def test_sse_reports_failures_as_an_error_event(user, fake_openai):
+    client = fake_openai()  # No canned stream: create() raises.
+    app.dependency_overrides[get_current_user_item] = lambda: user
+
+    async def post():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            return await c.post("/assistant/ui-chat/stream", json={"message": "hi"})
+
+    try:
+        resp = asyncio.run(post())
+    finally:
+        app.dependency_overrides.pop(get_current_user_item)
+
+    assert client.requests
+    head, data = resp.text.strip("\n").split("\n")
+    assert head == "event: error"
+    assert "detail" in json.loads(data.removeprefix("data: "))
+
+
+def test_disconnect_closes_the_model_stream(user, fake_openai):
+    stream = FakeStream([text("Let me think")], hang=True)
+    fake_openai(stream)
+
+    async def disconnect_after_first_delta():
+        first = asyncio.Event()
+
+        async def consume():
+            async for _ in agent.stream_agent("what's on today?", [], user):
+                first.set()
+
+        # Starlette cancels the response generator when the client goes away.
+        task = asyncio.create_task(consume())
+        await first.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(disconnect_after_first_delta())
+    assert stream.closed
+    assert len(agent.answer_cache) == 0
+
+
+def test_text_streamed_with_tool_calls_goes_back_to_the_model(user, fake_openai):
+    client = fake_openai(
+        FakeStream([text("Let me check. "), tool_call("call-1", "get_today_appointments")]),
+        FakeStream([text("Nothing today.")]),
+    )
+
+    assert asyncio.run(collect(user)) == ["Let me check. ", "Nothing today."]
+
+    assistant = client.requests[1][-2]
+    assert assistant["role"] == "assistant"
+    assert assistant["content"] == "Let me check. "
+    assert assistant["tool_calls"][0]["id"] == "call-1"
+    assert client.requests[1][-1]["role"] == "tool"
+
+    # The cached replay is what the user saw.
+    assert asyncio.run(collect(user)) == ["Let me check. Nothing today."]
+
+
+def test_turn_with_a_failed_tool_call_is_not_cached(user, fake_openai):
+    client = fake_openai(
+        FakeStream([tool_call("call-1", "get_today_appointments", "[1]")]),
+        FakeStream([text("I couldn't look that up.")]),
+        FakeStream([tool_call("call-2", "get_today_appointments")]),
+        FakeStream([text("Nothing today.")]),
+    )
+
+    assert asyncio.run(collect(user)) == ["I couldn't look that up."]
+    assert "error" in json.loads(client.requests[1][-1]["content"])
+    assert len(agent.answer_cache) == 0
+
+    # Asked again, the model is consulted instead of replaying the failure.
+    assert asyncio.run(collect(user)) == ["Nothing today."]
+    assert len(agent.answer_cache) == 1
@@ -0,0 +1,36 @@
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from app.core.config import DDB_TABLE_APPOINTMENTS
+from app.services.agent_service import get_today_appointments
+from app.services.assistant_tools import tool_get_today_appointments
+
+LA = ZoneInfo("America/Los_Angeles")
+
+
+def put(ddb, appointment_id: str, start: str) -> None:
+    ddb.Table(DDB_TABLE_APPOINTMENTS).put_item(Item={
+        "businessId": "b1",
+        "appointmentId": appointment_id,
+        "userId": "u1",
+        "title": "Cut",
+        "startTime": start,
+    })
+
+
+def test_today_is_the_local_day_late_in_the_evening(ddb, user):
+    # 23:30 on Jan 7 in Los Angeles is already Jan 8 in UTC.
+    now = datetime(2030, 1, 8, 7, 30, tzinfo=timezone.utc)
+    put(ddb, "naive-evening", "2030-01-07T22:00")  # local wall time
+    put(ddb, "utc-morning", "2030-01-07T10:00:00Z")  # 02:00 local, Jan 7
+    put(ddb, "utc-tomorrow", "2030-01-08T09:00:00Z")  # 01:00 local, Jan 8
+    put(ddb, "naive-tomorrow", "2030-01-08T00:30")
+
+    today = get_today_appointments("u1", "b1", zone=LA, now=now)
+
+    assert today["date"] == "2030-01-07"
+    assert sorted(i["appointmentId"] for i in today["appointments"]) == ["naive-evening", "utc-morning"]
+
+
+def test_tool_uses_the_users_zone(ddb, user):
+    assert tool_get_today_appointments(user)["date"] == datetime.now(LA).date().isoformat()
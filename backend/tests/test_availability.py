@@ -0,0 +1,141 @@
+"""
+Property tests for the interval helpers across 2026 DST transitions.
+
+Each case draws a random schedule and window and compares the intervals
+against a brute-force reading of the clock, minute by minute: a day's range
+[start, end) opens at the first instant the local clock reads start or later
+and closes at the first instant it reads end or later.
+"""
+import random
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.models.working_hours import WorkingHours
+from app.services.availability_service import merge_intervals, subtract_intervals, working_intervals
+from app.services.working_hours_service import DAY_NAMES, ResolvedWorkingHours
+
+MINUTE = timedelta(minutes=1)
+
+# (zone, 2026 spring-forward date, 2026 fall-back date)
+TRANSITIONS = [
+    ("America/Los_Angeles", date(2026, 3, 8), date(2026, 11, 1)),
+    ("Europe/Berlin", date(2026, 3, 29), date(2026, 10, 25)),
+    # Half-hour shift, southern hemisphere.
+    ("Australia/Lord_Howe", date(2026, 10, 4), date(2026, 4, 5)),
+]
+CASES = [(zone, day) for zone, spring, fall in TRANSITIONS for day in (spring, fall)]
+
+
+def hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def random_range(rng: random.Random):
+    # Quarter-hour boundaries, weighted toward the small hours where the
+    # transitions happen.
+    if rng.random() < 0.6:
+        start = rng.randrange(0, 5 * 60, 15)
+    else:
+        start = rng.randrange(0, 23 * 60, 15)
+    end = rng.randrange(start + 15, 24 * 60 + 1, 15)
+    return start, end
+
+
+def random_hours(rng: random.Random, zone: str, around: date) -> ResolvedWorkingHours:
+    weekly = []
+    for day in DAY_NAMES:
+        start, end = random_range(rng)
+        weekly.append({"day": day, "enabled": rng.random() < 0.8, "start": hhmm(start), "end": hhmm(end)})
+    overrides = []
+    for offset in range(-2, 3):
+        if rng.random() < 0.3:
+            start, end = random_range(rng)
+            enabled = rng.random() < 0.7
+            overrides.append({
+                "date": (around + timedelta(days=offset)).isoformat(),
+                "enabled": enabled,
+                "start": hhmm(start) if enabled else None,
+                "end": hhmm(end) if enabled else None,
+            })
+    return ResolvedWorkingHours(
+        WorkingHours.model_validate({"timezone": zone, "weekly": weekly, "overrides": overrides})
+    )
+
+
+def first_instant_at_or_after(day: date, minutes: int, zone: ZoneInfo) -> datetime:
+    u = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc) - timedelta(hours=16)
+    while True:
+        local = u.astimezone(zone)
+        if local.date() > day or (local.date() == day and local.hour * 60 + local.minute >= minutes):
+            return u
+        u += MINUTE
+
+
+def brute_force_open(wh: ResolvedWorkingHours, start: datetime, end: datetime):
+    open_ranges = []
+    day = start.astimezone(wh.zone).date() - timedelta(days=1)
+    while day <= end.astimezone(wh.zone).date() + timedelta(days=1):
+        minutes = wh.minutes_for(day)
+        if minutes:
+            open_ranges.append((
+                first_instant_at_or_after(day, minutes[0], wh.zone),
+                first_instant_at_or_after(day, minutes[1], wh.zone),
+            ))
+        day += timedelta(days=1)
+    return lambda t: start <= t < end and any(s <= t < e for s, e in open_ranges)
+
+
+def covers(intervals, t: datetime) -> bool:
+    return any(s <= t < e for s, e in intervals)
+
+
+def assert_normalized(intervals):
+    for s, e in intervals:
+        assert s < e
+    for (_, e1), (s2, _) in zip(intervals, intervals[1:]):
+        assert e1 < s2
+
+
+@pytest.mark.parametrize("zone,day", CASES)
+def test_working_intervals_match_the_local_clock(zone, day):
+    rng = random.Random(f"{zone}-{day}")
+    tz = ZoneInfo(zone)
+    for _ in range(15):
+        wh = random_hours(rng, zone, day)
+        midnight = datetime.combine(day, datetime.min.time(), tzinfo=tz).astimezone(timezone.utc)
+        start = midnight - timedelta(minutes=rng.randrange(0, 2 * 1440))
+        end = midnight + timedelta(minutes=rng.randrange(1, 3 * 1440))
+
+        intervals = working_intervals(wh, start, end)
+        assert_normalized(intervals)
+        expected = brute_force_open(wh, start, end)
+        t = start
+        while t < end:
+            assert covers(intervals, t) == expected(t), (t.astimezone(tz), intervals)
+            t += MINUTE
+
+
+@pytest.mark.parametrize("zone,day", CASES)
+def test_subtract_and_merge_match_minute_sets(zone, day):
+    rng = random.Random(f"subtract-{zone}-{day}")
+    tz = ZoneInfo(zone)
+    start = datetime.combine(day, datetime.min.time(), tzinfo=tz).astimezone(timezone.utc) - timedelta(days=1)
+    end = start + timedelta(days=3)
+    for _ in range(20):
+        free = working_intervals(random_hours(rng, zone, day), start, end)
+        raw_busy = []
+        for _ in range(rng.randrange(0, 12)):
+            s = start + timedelta(minutes=rng.randrange(0, 3 * 1440))
+            raw_busy.append((s, s + timedelta(minutes=rng.randrange(1, 300))))
+        busy = merge_intervals(raw_busy)
+        assert_normalized(busy)
+
+        result = subtract_intervals(free, busy)
+        assert_normalized(result)
+        t = start
+        while t < end:
+            assert covers(busy, t) == covers(raw_busy, t)
+            assert covers(result, t) == (covers(free, t) and not covers(raw_busy, t))
+            t += MINUTE
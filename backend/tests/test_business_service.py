@@ -0,0 +1,77 @@
+import threading
+from collections import Counter
+
+import pytest
+from boto3.dynamodb.conditions import Attr
+
+from app.core.ddb import businesses_table, users_table
+from app.models.business import BusinessCreate
+from app.services.business_service import (
+    NAME_KEY_PREFIX,
+    BusinessNameTaken,
+    create_business_for_user,
+    find_business_by_name,
+    join_or_create_business,
+    name_key,
+)
+from app.services.user_service import get_user_by_id
+
+
+def owner(user_id: str) -> dict:
+    item = {"userId": user_id, "email": f"{user_id}@example.com", "defaultBusinessId": None}
+    users_table().put_item(Item=item)
+    return item
+
+
+def businesses_named(name: str):
+    return [
+        b for b in businesses_table().scan(
+            FilterExpression=~Attr("businessId").begins_with(NAME_KEY_PREFIX)
+        )["Items"]
+        if b["businessName"] == name
+    ]
+
+
+def test_name_item_points_at_the_live_business(ddb):
+    created = create_business_for_user(owner("u1"), BusinessCreate(businessName="Corner Cuts"))
+    assert "business" not in businesses_table().get_item(Key=name_key("Corner Cuts"))["Item"]
+
+    businesses_table().update_item(
+        Key={"businessId": created["businessId"]},
+        UpdateExpression="SET #l = :l",
+        ExpressionAttributeNames={"#l": "location"},
+        ExpressionAttributeValues={":l": "Main St"},
+    )
+
+    found = find_business_by_name("  corner   CUTS ")
+    assert found["businessId"] == created["businessId"]
+    assert found["location"] == "Main St"
+
+
+def test_duplicate_name_is_taken(ddb):
+    create_business_for_user(owner("u1"), BusinessCreate(businessName="Corner Cuts"))
+    with pytest.raises(BusinessNameTaken):
+        create_business_for_user(owner("u2"), BusinessCreate(businessName="corner cuts"))
+
+
+def test_concurrent_join_or_create_ends_with_one_business(ddb):
+    users = [owner(f"u{n}") for n in range(8)]
+    results = []
+    barrier = threading.Barrier(len(users))
+
+    def join(user_item):
+        barrier.wait()
+        try:
+            results.append(join_or_create_business(user_item, BusinessCreate(businessName="Corner Cuts")))
+        except Exception as e:
+            results.append(repr(e))
+
+    threads = [threading.Thread(target=join, args=(u,)) for u in users]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    [business] = businesses_named("Corner Cuts")
+    assert Counter(r["businessId"] for r in results) == {business["businessId"]: len(users)}
+    assert {get_user_by_id(u["userId"])["defaultBusinessId"] for u in users} == {business["businessId"]}
@@ -0,0 +1,137 @@
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.services.email_queue import BatchSendError, EmailDispatcher, InMemoryEmailQueue
+
+MAX_ATTEMPTS = 3
+
+
+def throttled():
+    return ClientError({"Error": {"Code": "Throttling", "Message": "slow down"}}, "SendEmail")
+
+
+def rejected():
+    return ClientError({"Error": {"Code": "MessageRejected", "Message": "bad address"}}, "SendEmail")
+
+
+@pytest.fixture
+def make_dispatcher():
+    dispatchers = []
+
+    def make(handler, workers: int = 2):
+        d = EmailDispatcher(
+            InMemoryEmailQueue(),
+            handlers={"job": handler},
+            workers=workers,
+            max_attempts=MAX_ATTEMPTS,
+            retry_base=0.01,
+            retry_max=0.01,
+        )
+        dispatchers.append(d)
+        return d
+
+    yield make
+    for d in dispatchers:
+        d.stop()
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_enqueue_runs_the_handler_off_the_caller_thread(make_dispatcher):
+    seen = []
+    d = make_dispatcher(lambda payload: seen.append((payload, threading.current_thread().name)))
+
+    d.enqueue("job", {"n": 1})
+    wait_for(lambda: d.stats()["sent"] == 1)
+    assert seen[0][0] == {"n": 1}
+    assert seen[0][1].startswith("email-worker-")
+    assert d.stats() == {"sent": 1, "failed": 0, "queued": 0}
+
+
+def test_unknown_kind_is_rejected_at_enqueue(make_dispatcher):
+    d = make_dispatcher(lambda payload: None)
+    with pytest.raises(ValueError):
+        d.enqueue("nope", {})
+    assert d._threads == []
+
+
+def test_transient_failures_are_retried(make_dispatcher):
+    calls = []
+
+    def flaky(payload):
+        calls.append(payload)
+        if len(calls) < MAX_ATTEMPTS:
+            raise throttled()
+
+    d = make_dispatcher(flaky)
+    d.enqueue("job", {"n": 1})
+    wait_for(lambda: d.stats()["sent"] == 1)
+    assert len(calls) == MAX_ATTEMPTS
+    assert d.stats()["failed"] == 0
+    assert not d.backend.dead_letters
+
+
+def test_exhausted_retries_are_dead_lettered(make_dispatcher):
+    calls = []
+
+    def down(payload):
+        calls.append(payload)
+        raise throttled()
+
+    d = make_dispatcher(down)
+    d.enqueue("job", {"n": 1})
+    wait_for(lambda: d.stats()["failed"] == 1)
+    assert len(calls) == MAX_ATTEMPTS
+    [dead] = d.backend.dead_letters
+    assert dead["payload"] == {"n": 1}
+    assert dead["attempts"] == MAX_ATTEMPTS
+    assert "Throttling" in dead["error"]
+
+
+def test_permanent_failure_is_dead_lettered_without_retry(make_dispatcher):
+    calls = []
+
+    def bounce(payload):
+        calls.append(payload)
+        raise rejected()
+
+    d = make_dispatcher(bounce)
+    d.enqueue("job", {"n": 1})
+    wait_for(lambda: d.stats()["failed"] == 1)
+    time.sleep(0.05)
+    assert len(calls) == 1
+    assert d.backend.dead_letters[0]["attempts"] == 1
+
+
+def test_partial_batch_retries_and_dead_letters_only_the_failures(make_dispatcher):
+    payloads = []
+
+    def batch(payload):
+        payloads.append(payload["items"])
+        if len(payloads) == 1:
+            raise BatchSendError("mixed", sent=2, retry={"items": ["c"]}, dead={"items": ["d"]})
+        return len(payload["items"])
+
+    d = make_dispatcher(batch)
+    d.enqueue("job", {"items": ["a", "b", "c", "d"]})
+    wait_for(lambda: d.stats()["sent"] == 3)
+    assert payloads == [["a", "b", "c", "d"], ["c"]]
+    assert d.stats()["failed"] == 1
+    assert [j["payload"] for j in d.backend.dead_letters] == [{"items": ["d"]}]
+
+
+def test_counters_are_exact_under_concurrent_workers(make_dispatcher):
+    jobs = 2000
+    d = make_dispatcher(lambda payload: 1, workers=8)
+    for n in range(jobs):
+        d.enqueue("job", {"n": n})
+    wait_for(lambda: d.stats()["sent"] == jobs, timeout=20)
+    assert d.stats() == {"sent": jobs, "failed": 0, "queued": 0}
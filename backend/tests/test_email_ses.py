@@ -0,0 +1,90 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from app.core import email_ses
+from app.core.rate_limit import TokenBucket
+from app.services.email_queue import BatchSendError, _send_appointment_emails_job
+
+
+def client_error(code: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, "SendEmail")
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(email_ses, "_limiter", TokenBucket(1000.0))
+
+
+def appointment(n: int, email: str):
+    return {
+        "businessId": "b1",
+        "appointmentId": f"a{n}",
+        "userId": "u1",
+        "inviteeEmail": email,
+        "startTime": "2030-01-07T18:00:00+00:00",
+        "endTime": "2030-01-07T19:00:00+00:00",
+    }
+
+
+def test_bulk_send_returns_a_result_per_message_on_unexpected_errors(limiter, monkeypatch):
+    monkeypatch.delenv("SES_FROM_EMAIL")
+    monkeypatch.setattr(email_ses, "get_ses_client", lambda: None)
+    messages = [{"to": f"x{i}@example.com", "subject": "s", "body_text": "b"} for i in range(3)]
+
+    results = email_ses.send_bulk_email(messages)
+
+    assert [r["to"] for r in results] == [m["to"] for m in messages]
+    assert all(not r["ok"] and not r["retryable"] and "SES_FROM_EMAIL" in r["error"] for r in results)
+
+
+def test_failed_send_quota_is_not_cached(monkeypatch):
+    answers = [client_error("Throttling"), {"MaxSendRate": 14.0}]
+
+    class FakeSes:
+        def get_send_quota(self):
+            answer = answers.pop(0)
+            if isinstance(answer, Exception):
+                raise answer
+            return answer
+
+    monkeypatch.delenv("SES_MAX_SEND_RATE", raising=False)
+    monkeypatch.setattr(email_ses, "get_ses_client", FakeSes)
+    monkeypatch.setattr(email_ses, "SES_QUOTA_RETRY_SECONDS", 0)
+    monkeypatch.setattr(email_ses, "_limiter", None)
+    monkeypatch.setattr(email_ses, "_quota_retry_at", 0.0)
+
+    assert email_ses.get_send_limiter().rate == 1.0
+    limiter = email_ses.get_send_limiter()
+    assert limiter.rate == 14.0
+    assert email_ses.get_send_limiter() is limiter
+
+
+def test_batch_job_sends_together_and_narrows_failures(user, limiter, monkeypatch):
+    sent = []
+
+    def fake_send(to_email, subject, body_text, body_html=None):
+        if to_email == "slow@example.com":
+            raise client_error("Throttling")
+        if to_email == "bad@example.com":
+            raise client_error("MessageRejected")
+        sent.append(to_email)
+        return "m-" + to_email
+
+    monkeypatch.setattr(email_ses, "send_email", fake_send)
+    payload = {
+        "template": "reminder",
+        "appointments": [
+            appointment(1, "ok@example.com"),
+            appointment(2, "slow@example.com"),
+            appointment(3, "bad@example.com"),
+        ],
+    }
+
+    with pytest.raises(BatchSendError) as failure:
+        _send_appointment_emails_job(payload)
+
+    assert sent == ["ok@example.com"]
+    assert failure.value.sent == 1
+    assert [a["appointmentId"] for a in failure.value.retry["appointments"]] == ["a2"]
+    assert [a["appointmentId"] for a in failure.value.dead["appointments"]] == ["a3"]
+    assert failure.value.retry["template"] == "reminder"
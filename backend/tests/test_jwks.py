@@ -0,0 +1,220 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from app.core import auth_cognito
+from app.core.auth_cognito import CLIENT, ISSUER, JWKSStore, verify_access_token_async
+
+TTL = 3600.0
+MISS_INTERVAL = 30.0
+
+
+def signing_key(kid: str):
+    private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    public = private.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    jwk_dict = {
+        k: v.decode() if isinstance(v, bytes) else v
+        for k, v in jwk.construct(public, "RS256").to_dict().items()
+    }
+    return pem, {**jwk_dict, "kid": kid}
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return {kid: signing_key(kid) for kid in ("k1", "k2")}
+
+
+class JwksServer:
+    """Serves a mutable key set; `gate` can hold responses to observe background refreshes."""
+
+    def __init__(self):
+        self.keys = []
+        self.hits = 0
+        self.down = False
+        self.gate = threading.Event()
+        self.gate.set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits += 1
+                server.gate.wait(5)
+                if server.down:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = json.dumps({"keys": server.keys}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/.well-known/jwks.json"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def server():
+    s = JwksServer()
+    yield s
+    s.gate.set()
+    s.httpd.shutdown()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def store(server, clock):
+    return JWKSStore(server.url, ttl=TTL, miss_refetch_interval=MISS_INTERVAL, clock=clock)
+
+
+def test_unknown_kid_refetches_to_pick_up_rotation(server, store, clock, keys):
+    server.keys = [keys["k1"][1]]
+
+    async def scenario():
+        assert await store.get_key("k1") is not None
+        assert server.hits == 1
+        server.keys = [keys["k1"][1], keys["k2"][1]]
+        clock.now += MISS_INTERVAL
+        return await store.get_key("k2")
+
+    assert asyncio.run(scenario()) is not None
+    assert server.hits == 2
+
+
+def test_unknown_kid_refetch_is_rate_limited(server, store, clock, keys):
+    server.keys = [keys["k1"][1]]
+
+    async def scenario():
+        await store.get_key("k1")
+        clock.now += MISS_INTERVAL
+        for _ in range(20):
+            assert await store.get_key("bogus") is None
+        assert server.hits == 2
+        clock.now += MISS_INTERVAL - 1
+        assert await store.get_key("bogus") is None
+        assert server.hits == 2
+        clock.now += 1
+        assert await store.get_key("bogus") is None
+        assert server.hits == 3
+
+    asyncio.run(scenario())
+
+
+def test_failed_first_fetch_is_retried_at_the_refetch_interval(server, store, clock, keys):
+    server.down = True
+
+    async def scenario():
+        for _ in range(10):
+            with pytest.raises(Exception):
+                await store.get_key("k1")
+        assert server.hits == 1
+        server.down = False
+        server.keys = [keys["k1"][1]]
+        clock.now += MISS_INTERVAL
+        assert await store.get_key("k1") is not None
+        assert server.hits == 2
+
+    asyncio.run(scenario())
+
+
+def test_failed_first_fetch_is_retried_at_the_refetch_interval_sync(server, store, clock, keys):
+    server.down = True
+    for _ in range(10):
+        with pytest.raises(Exception):
+            store.get_key_sync("k1")
+    assert server.hits == 1
+
+    server.down = False
+    server.keys = [keys["k1"][1]]
+    clock.now += MISS_INTERVAL
+    assert store.get_key_sync("k1") is not None
+    assert server.hits == 2
+
+
+def test_stale_keys_serve_when_a_sync_refresh_fails(server, store, clock, keys):
+    server.keys = [keys["k1"][1]]
+    old = store.get_key_sync("k1")
+    server.down = True
+    clock.now += TTL
+
+    for _ in range(10):
+        assert store.get_key_sync("k1") is old
+    assert server.hits == 2
+
+
+def test_stale_keys_serve_while_refreshing_in_background(server, store, clock, keys):
+    server.keys = [keys["k1"][1]]
+
+    async def scenario():
+        old = await store.get_key("k1")
+        server.keys = [keys["k1"][1], keys["k2"][1]]
+        server.gate.clear()
+        clock.now += TTL
+
+        started = time.monotonic()
+        assert await store.get_key("k1") is old
+        assert time.monotonic() - started < 1.0
+        refresh = store._inflight
+        assert refresh is not None and not refresh.done()
+        assert await store.get_key("k1") is old  # one refresh in flight, not one per request
+
+        server.gate.set()
+        await refresh
+        assert "k2" in store._keys
+        assert server.hits == 2
+
+    asyncio.run(scenario())
+
+
+def test_token_signed_with_a_rotated_key_verifies(server, store, clock, keys, monkeypatch):
+    server.keys = [keys["k1"][1]]
+    monkeypatch.setattr(auth_cognito, "jwks_store", store)
+    now = int(time.time())
+    claims = {
+        "sub": "u1",
+        "iss": ISSUER,
+        "client_id": CLIENT,
+        "aud": CLIENT,
+        "token_use": "access",
+        "iat": now,
+        "exp": now + 600,
+    }
+    old_token = jwt.encode(claims, keys["k1"][0], algorithm="RS256", headers={"kid": "k1"})
+    new_token = jwt.encode(claims, keys["k2"][0], algorithm="RS256", headers={"kid": "k2"})
+
+    async def scenario():
+        assert (await verify_access_token_async(old_token))["sub"] == "u1"
+        server.keys = [keys["k1"][1], keys["k2"][1]]
+        clock.now += MISS_INTERVAL
+        assert (await verify_access_token_async(new_token))["sub"] == "u1"
+
+    asyncio.run(scenario())
+    assert server.hits == 2
@@ -0,0 +1,43 @@
+import pytest
+
+from app.services.notification_service import EMAIL_KINDS, render_appointment_emails
+
+TITLE = "<script>alert(1)</script>"
+
+
+def appointment(**extra):
+    return {
+        "businessId": "b1",
+        "appointmentId": "a1",
+        "userId": "u1",
+        "title": TITLE,
+        "inviteeEmail": "ann@example.com",
+        "startTime": "2030-01-07T18:00:00+00:00",
+        "endTime": "2030-01-07T18:30:00+00:00",
+        "rsvpToken": "tok&en",
+        **extra,
+    }
+
+
+@pytest.mark.parametrize("kind", EMAIL_KINDS)
+def test_every_kind_renders_escaped_html_and_raw_text(kind, monkeypatch):
+    monkeypatch.setenv("APPOINTMENT_RSVP_BASE_URL", "https://app.example.com/")
+    [message] = render_appointment_emails(kind, [appointment()], {"u1": "Bo & Co"})
+
+    assert message["to"] == "ann@example.com"
+    assert message["appointmentId"] == "a1"
+    assert TITLE in message["body_text"]
+    assert TITLE not in message["body_html"]
+    assert "&lt;script&gt;" in message["body_html"]
+    assert "Bo &amp; Co" in message["body_html"]
+    assert message["subject"] and "\n" not in message["subject"]
+
+
+def test_rsvp_links_are_url_encoded(monkeypatch):
+    monkeypatch.setenv("APPOINTMENT_RSVP_BASE_URL", "https://app.example.com")
+    [message] = render_appointment_emails("confirmation", [appointment()], {"u1": "Bo"})
+    assert "token=tok%26en" in message["body_text"]
+
+
+def test_appointments_without_an_invitee_are_skipped():
+    assert render_appointment_emails("reminder", [appointment(inviteeEmail="")], {"u1": "Bo"}) == []
@@ -0,0 +1,57 @@
+import pytest
+
+from app.core.rate_limit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def bucket(rate, capacity=None):
+    clock = FakeClock()
+    return TokenBucket(rate, capacity, clock=clock, sleep=clock.sleep), clock
+
+
+def test_burst_up_to_capacity_then_paced_at_the_rate():
+    limiter, clock = bucket(rate=4)
+    for _ in range(4):
+        limiter.acquire()
+    assert clock.sleeps == []
+
+    for _ in range(8):
+        limiter.acquire()
+    assert clock.now == pytest.approx(2.0)
+    assert all(s == pytest.approx(0.25) for s in clock.sleeps)
+
+
+def test_idle_time_refills_but_never_beyond_capacity():
+    limiter, clock = bucket(rate=2, capacity=3)
+    for _ in range(3):
+        limiter.acquire()
+    clock.now += 60
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.sleeps == []
+    limiter.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+
+
+def test_fractional_rate_defaults_to_one_token_of_capacity():
+    limiter, clock = bucket(rate=0.5)
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.sleeps == [pytest.approx(2.0)]
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
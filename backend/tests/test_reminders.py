@@ -0,0 +1,128 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import DDB_APPTS_REMINDER_INDEX, DDB_TABLE_APPOINTMENTS
+from app.models.appointment import AppointmentCreate
+from app.services import reminder_service
+from app.services.appointment_service import (
+    create_appointment,
+    reschedule_appointment,
+    update_appointment_status,
+)
+from app.services.reminder_service import ReminderScheduler, run_reminder_tick
+
+# Reminders fall due REMINDER_LEAD_HOURS (24) before the start.
+START = datetime(2030, 1, 8, 18, 0, tzinfo=timezone.utc)
+DUE = START - timedelta(hours=24)
+MINUTE = timedelta(minutes=1)
+
+
+def iso(d: datetime) -> str:
+    return d.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def book(user, start: datetime = START):
+    return create_appointment(user, AppointmentCreate(
+        title="Cut",
+        client_name="Ann",
+        email="ann@example.com",
+        start_time=iso(start),
+        end_time=iso(start + timedelta(minutes=30)),
+    ))
+
+
+@pytest.fixture
+def queued(monkeypatch, sent_emails):
+    out = []
+    monkeypatch.setattr(
+        reminder_service,
+        "enqueue_appointment_emails",
+        lambda items, template: out.extend((item["appointmentId"], template) for item in items),
+    )
+    return out
+
+
+def test_reminder_is_queued_once_when_due(user, queued):
+    appt = book(user)
+    assert run_reminder_tick(DUE - MINUTE)["queued"] == 0
+    assert run_reminder_tick(DUE + MINUTE)["queued"] == 1
+    assert run_reminder_tick(DUE + 2 * MINUTE)["queued"] == 0
+    assert queued == [(appt["appointmentId"], "reminder")]
+
+
+def test_cancelled_appointment_gets_no_reminder(user, queued):
+    appt = book(user)
+    update_appointment_status("b1", appt["appointmentId"], "cancelled")
+    assert run_reminder_tick(DUE + MINUTE)["queued"] == 0
+    assert queued == []
+
+
+def test_rescheduled_reminder_follows_the_new_start(user, queued):
+    appt = book(user)
+    later = START + timedelta(hours=3)
+    reschedule_appointment("b1", appt["appointmentId"], iso(later), iso(later + timedelta(minutes=30)))
+    assert run_reminder_tick(DUE + MINUTE)["queued"] == 0
+    assert run_reminder_tick(DUE + timedelta(hours=3, minutes=1))["queued"] == 1
+
+
+def test_concurrent_schedulers_send_each_reminder_once(user, queued):
+    book(user)
+    barrier = threading.Barrier(4)
+
+    def tick():
+        barrier.wait()
+        run_reminder_tick(DUE + MINUTE)
+
+    threads = [threading.Thread(target=tick) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(queued) == 1
+
+
+def test_scheduler_catches_up_after_an_outage_longer_than_the_lookback(ddb, user, queued):
+    upcoming = book(user)
+    # Started before the scheduler comes back: dropped, not sent.
+    missed = book(user, START - timedelta(hours=22))
+    now = DUE + timedelta(hours=11)
+
+    assert run_reminder_tick(now)["due"] == 0
+    scheduler = ReminderScheduler(clock=lambda: now)
+    scheduler.tick()
+
+    assert queued == [(upcoming["appointmentId"], "reminder")]
+    assert scheduler.stats()["expired"] == 1
+    index = ddb.Table(DDB_TABLE_APPOINTMENTS).scan(IndexName=DDB_APPTS_REMINDER_INDEX)
+    assert index["Items"] == []
+    item = ddb.Table(DDB_TABLE_APPOINTMENTS).get_item(
+        Key={"businessId": "b1", "appointmentId": missed["appointmentId"]}
+    )["Item"]
+    assert "reminderExpiredAt" in item and "reminderSentAt" not in item
+
+
+def test_sweep_reads_only_buckets_that_went_stale_since_the_last_sweep(ddb, user, queued):
+    client = ddb.meta.client
+    calls = []
+    client.meta.events.register(
+        "provide-client-params.dynamodb.*",
+        lambda params, model, **kwargs: calls.append((model.name, params.get("IndexName"))),
+    )
+    now = DUE + timedelta(hours=11)
+
+    reminder_service.sweep_stale_reminders(now)
+    assert ("Scan", DDB_APPTS_REMINDER_INDEX) not in calls
+    assert reminder_service.swept_until() == reminder_service.due_buckets(now)[0]
+
+    calls.clear()
+    stale = book(user, START + timedelta(days=1))  # falls due a day after the first
+    reminder_service.sweep_stale_reminders(now + timedelta(hours=2))
+    assert calls.count(("Query", DDB_APPTS_REMINDER_INDEX)) == 2
+    assert queued == []
+
+    calls.clear()
+    reminder_service.sweep_stale_reminders(now + timedelta(days=1, hours=2))
+    assert calls.count(("Query", DDB_APPTS_REMINDER_INDEX)) == 24
+    assert queued == [(stale["appointmentId"], "reminder")]
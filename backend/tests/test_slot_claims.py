@@ -0,0 +1,63 @@
+import threading
+from collections import Counter
+
+import pytest
+
+from app.models.appointment import AppointmentCreate
+from app.services.appointment_service import create_appointment
+from app.services.availability_service import get_availability
+from app.services.slot_service import BookingConflictError, InvalidBookingError
+
+
+def booking(start: str, end: str) -> AppointmentCreate:
+    return AppointmentCreate(
+        title="Cut", client_name="Ann", email="ann@example.com", start_time=start, end_time=end
+    )
+
+
+def test_overlapping_booking_is_rejected(user, sent_emails):
+    create_appointment(user, booking("2030-01-07T10:00:00Z", "2030-01-07T11:00:00Z"))
+    with pytest.raises(BookingConflictError):
+        create_appointment(user, booking("2030-01-07T10:45:00Z", "2030-01-07T11:15:00Z"))
+    create_appointment(user, booking("2030-01-07T11:00:00Z", "2030-01-07T11:30:00Z"))
+
+
+def test_end_before_start_is_invalid(user, sent_emails):
+    with pytest.raises(InvalidBookingError):
+        create_appointment(user, booking("2030-01-07T11:00:00Z", "2030-01-07T10:00:00Z"))
+
+
+def test_concurrent_bookings_of_one_slot_exactly_one_wins(user, sent_emails):
+    results = []
+    barrier = threading.Barrier(20)
+
+    def book():
+        barrier.wait()
+        try:
+            create_appointment(user, booking("2030-01-08T09:00:00Z", "2030-01-08T09:30:00Z"))
+            results.append("ok")
+        except BookingConflictError:
+            results.append("conflict")
+        except Exception as e:
+            results.append(repr(e))
+
+    threads = [threading.Thread(target=book) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert Counter(results) == {"ok": 1, "conflict": 19}
+
+
+def test_naive_times_use_the_same_zone_as_availability(user, sent_emails):
+    # No saved working hours: availability falls back to the default schedule's
+    # zone (America/Los_Angeles), so naive bookings must be read there too.
+    item = create_appointment(user, booking("2030-01-07T10:00", "2030-01-07T10:30"))
+    assert item["slotKeys"][0] == "u1#2030-01-07T18:00"
+
+    slots = get_availability(user, "2030-01-07T00:00", "2030-01-08T00:00", 30)["slots"]
+    assert not any(s["start"].startswith("2030-01-07T10:00") for s in slots)
+
+    # The offset form /availability returns names the same slot.
+    with pytest.raises(BookingConflictError):
+        create_appointment(user, booking("2030-01-07T10:00:00-08:00", "2030-01-07T10:30:00-08:00"))
@@ -0,0 +1,37 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from scripts.startup_report import first_request
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+_IMPORT_ONLY = """
+import json, sys
+import index
+from app.core.ddb import get_ddb
+from app.core.email_ses import get_ses_client
+print(json.dumps({
+    "loaded": sorted(m for m in ("openai", "jinja2", "httpx") if m in sys.modules),
+    "ddb_built": get_ddb.cache_info().currsize,
+    "ses_built": get_ses_client.cache_info().currsize,
+}))
+"""
+
+
+def test_import_defers_heavy_dependencies_and_clients():
+    # A fresh interpreter: this test process has already imported everything.
+    proc = subprocess.run(
+        [sys.executable, "-c", _IMPORT_ONLY], cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    assert proc.returncode == 0, proc.stderr
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    assert report == {"loaded": [], "ddb_built": 0, "ses_built": 0}
+
+
+def test_first_health_response_within_a_generous_budget():
+    report = first_request()
+    assert report["status"] == 200
+    # Far above a normal cold start; catches an import-time regression, not noise.
+    assert report["first_health_ms"] < 5000
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import DDB_TABLE_APPOINTMENTS
+from app.services.agent_service import get_today_appointments, today_bounds
+
+
+@pytest.fixture
+def read_meter(ddb):
+    # Totals what DynamoDB reports for every Query and Scan the app issues.
+    client = ddb.meta.client
+    totals = {"calls": 0, "scanned": 0, "units": 0.0}
+
+    def ask_for_capacity(params, **kwargs):
+        params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+    def record(parsed, **kwargs):
+        totals["calls"] += 1
+        totals["scanned"] += parsed.get("ScannedCount", 0)
+        totals["units"] += parsed.get("ConsumedCapacity", {}).get("CapacityUnits", 0.0)
+
+    for op in ("Query", "Scan"):
+        client.meta.events.register(f"provide-client-params.dynamodb.{op}", ask_for_capacity)
+        client.meta.events.register(f"after-call.dynamodb.{op}", record)
+    return totals
+
+
+def put_today(table, business_id: str, count: int, start: datetime) -> None:
+    with table.batch_writer() as batch:
+        for n in range(count):
+            batch.put_item(Item={
+                "businessId": business_id,
+                "appointmentId": f"{business_id}-{n}",
+                "userId": f"owner-{business_id}",
+                "title": "Cut",
+                "startTime": (start + timedelta(minutes=n % 600)).isoformat(),
+            })
+
+
+def measure(meter) -> dict:
+    for k in meter:
+        meter[k] = 0
+    assert get_today_appointments("owner-b1", "b1")["count"] == 5
+    return dict(meter)
+
+
+def test_today_query_reads_stay_flat_as_other_tenants_grow(ddb, read_meter):
+    table = ddb.Table(DDB_TABLE_APPOINTMENTS)
+    start = today_bounds()[1] + timedelta(hours=1)
+    put_today(table, "b1", 5, start)
+
+    baseline = measure(read_meter)
+    for n in range(1, 4):
+        put_today(table, f"other{n}", 1000, start)
+        assert measure(read_meter) == baseline
+
+    assert (baseline["calls"], baseline["scanned"]) == (1, 5)
+    assert baseline["units"] > 0
+    # A full scan, for contrast, reads every tenant's rows.
+    table.scan(Select="COUNT")
+    assert read_meter["scanned"] == 3005 + baseline["scanned"]
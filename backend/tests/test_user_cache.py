@@ -0,0 +1,73 @@
+"""
+Invalidation of the process-wide user and working-hours caches: a write
+followed by a read must see the write, including when the read's GetItem
+raced the write.
+"""
+from app.core.ddb import users_table
+from app.models.working_hours import WorkingHours
+from app.services import user_service
+from app.services.user_cache import invalidate_user, user_cache
+from app.services.user_service import get_user_by_id
+from app.services.working_hours_service import (
+    DEFAULT_WORKING_HOURS,
+    resolved_working_hours,
+    save_working_hours,
+)
+
+
+def berlin_hours() -> WorkingHours:
+    return WorkingHours.model_validate({**DEFAULT_WORKING_HOURS, "timezone": "Europe/Berlin"})
+
+
+def test_write_then_read_sees_new_user(user):
+    assert get_user_by_id("u1")["email"] == "owner@example.com"
+
+    users_table().update_item(
+        Key={"userId": "u1"},
+        UpdateExpression="SET email = :e",
+        ExpressionAttributeValues={":e": "new@example.com"},
+    )
+    invalidate_user("u1")
+
+    assert get_user_by_id("u1")["email"] == "new@example.com"
+
+
+def test_fill_that_raced_an_invalidation_is_not_cached(user, monkeypatch):
+    table = users_table()
+
+    class RacingTable:
+        def get_item(self, **kwargs):
+            # The read lands before a concurrent writer's update and invalidation.
+            resp = table.get_item(**kwargs)
+            table.update_item(
+                Key={"userId": "u1"},
+                UpdateExpression="SET email = :e",
+                ExpressionAttributeValues={":e": "new@example.com"},
+            )
+            invalidate_user("u1")
+            return resp
+
+    monkeypatch.setattr(user_service, "users_table", RacingTable)
+    assert get_user_by_id("u1")["email"] == "owner@example.com"
+    assert user_cache.get("u1") is None
+
+    monkeypatch.undo()
+    assert get_user_by_id("u1")["email"] == "new@example.com"
+
+
+def test_save_working_hours_then_read_sees_new_hours(user):
+    assert resolved_working_hours(get_user_by_id("u1")).zone.key == "America/Los_Angeles"
+
+    save_working_hours("u1", berlin_hours())
+
+    assert resolved_working_hours(get_user_by_id("u1")).zone.key == "Europe/Berlin"
+
+
+def test_stale_user_item_does_not_shadow_saved_hours(user):
+    stale = get_user_by_id("u1")
+    save_working_hours("u1", berlin_hours())
+
+    # A request that read the user before the save resolves (and caches) its
+    # old hours; the next request, reading the saved item, still sees the new.
+    assert resolved_working_hours(stale).zone.key == "America/Los_Angeles"
+    assert resolved_working_hours(get_user_by_id("u1")).zone.key == "Europe/Berlin"